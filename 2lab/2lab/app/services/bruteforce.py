@@ -1,51 +1,117 @@
+import collections
+import hashlib
 import itertools
+import multiprocessing
+import os
 import threading
-import time
-from typing import List, Callable
+from typing import Callable, Iterator, List, Optional, Tuple
 
 from app.cruds.bruteforce import update_task_status
 
 
-def generate_passwords(charset: str, max_length: int) -> List[str]:
-    all_passwords = []
+RAR5_PREFIX = "$rar5$"
+
+CHUNK_SIZE = 32
+
+
+def iter_passwords(charset: str, max_length: int) -> Iterator[str]:
     for length in range(1, max_length + 1):
         for password in itertools.product(charset, repeat=length):
-            all_passwords.append(''.join(password))
-    return all_passwords
+            yield ''.join(password)
+
+
+def generate_passwords(charset: str, max_length: int) -> List[str]:
+    return list(iter_passwords(charset, max_length))
+
+
+def parse_rar5_hash(hash_string: str) -> Tuple[bytes, int, bytes]:
+    if not hash_string.startswith(RAR5_PREFIX):
+        raise ValueError("Ожидается хеш RAR5 вида $rar5$... (rar2john)")
+
+    fields = hash_string[len(RAR5_PREFIX):].strip().split("$")
+    try:
+        salt_length, salt, lg2_count, _, check_length, check = fields
+        salt = bytes.fromhex(salt)
+        check = bytes.fromhex(check)
+        lg2_count = int(lg2_count)
+    except ValueError:
+        raise ValueError("Некорректный хеш RAR5")
+
+    if len(salt) != int(salt_length) or len(check) != int(check_length) or len(check) != 8:
+        raise ValueError("Некорректный хеш RAR5")
+    if not 0 <= lg2_count <= 24:
+        raise ValueError("Некорректное число итераций RAR5")
+    return salt, 1 << lg2_count, check
+
+
+def rar5_password_check(password: str, salt: bytes, iterations: int) -> bytes:
+    value = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations + 32)
+    check = bytearray(8)
+    for i, byte in enumerate(value):
+        check[i % 8] ^= byte
+    return bytes(check)
 
 
 def check_hash(hash_to_check: str, password: str) -> bool:
-    return hash_to_check == password
+    salt, iterations, check = parse_rar5_hash(hash_to_check)
+    return rar5_password_check(password, salt, iterations) == check
+
+
+def _check_chunk(args: Tuple[bytes, int, bytes, List[str]]) -> Tuple[Optional[str], int]:
+    salt, iterations, check, passwords = args
+    for password in passwords:
+        if rar5_password_check(password, salt, iterations) == check:
+            return password, len(passwords)
+    return None, len(passwords)
+
+
+def _imap_bounded(pool, func: Callable, iterable, window: int):
+    pending = collections.deque()
+    for item in iterable:
+        pending.append(pool.apply_async(func, (item,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
 
 
-def brute_force(task_id: str, hash_to_crack: str, charset: str, max_length: int, 
-                update_callback: Callable[[str, str, float, str], None]) -> None:
+def brute_force(task_id: str, hash_to_crack: str, charset: str, max_length: int,
+                update_callback: Callable[[str, str, float, str], None],
+                workers: int = 0) -> None:
     update_callback(task_id, "running", 0.0, None)
-    
+
     try:
-        passwords = generate_passwords(charset, max_length)
-        total_passwords = len(passwords)
-        
-        for i, password in enumerate(passwords):
-            if check_hash(hash_to_crack, password):
-                update_callback(task_id, "completed", 100.0, password)
-                return
-            
-            if i % 1000 == 0 or i == total_passwords - 1:
-                progress = (i + 1) / total_passwords * 100
-                update_callback(task_id, "running", progress, None)
-        
+        salt, iterations, check = parse_rar5_hash(hash_to_crack)
+        total_passwords = sum(len(charset) ** length for length in range(1, max_length + 1))
+        passwords = iter_passwords(charset, max_length)
+        chunks = (
+            (salt, iterations, check, chunk)
+            for chunk in iter(lambda: list(itertools.islice(passwords, CHUNK_SIZE)), [])
+        )
+
+        checked = 0
+        processes = workers or os.cpu_count() or 1
+        with multiprocessing.Pool(processes=processes) as pool:
+            for found, count in _imap_bounded(pool, _check_chunk, chunks, processes * 2):
+                if found is not None:
+                    pool.terminate()
+                    update_callback(task_id, "completed", 100.0, found)
+                    return
+
+                checked += count
+                update_callback(task_id, "running", checked / total_passwords * 100, None)
+
         update_callback(task_id, "completed", 100.0, None)
-    
+
     except Exception as e:
         update_callback(task_id, "failed", 0.0, str(e))
 
 
-def start_brute_force_task(task_id: str, hash_to_crack: str, charset: str, max_length: int, 
+def start_brute_force_task(task_id: str, hash_to_crack: str, charset: str, max_length: int,
                           db_callback: Callable[[str, str, float, str], None]) -> None:
     thread = threading.Thread(
         target=brute_force,
         args=(task_id, hash_to_crack, charset, max_length, db_callback)
     )
     thread.daemon = True
-    thread.start() 
\ No newline at end of file
+    thread.start()
@@ -6,7 +6,7 @@ from app.models.models import User
 from app.services.auth import get_current_user
 from app.schemas.schemas import BruteForceTaskCreate, BruteForceTaskResponse, BruteForceTaskStatus
 from app.cruds.bruteforce import create_bruteforce_task, get_task_by_id, update_task_status
-from app.services.bruteforce import start_brute_force_task
+from app.services.bruteforce import parse_rar5_hash, start_brute_force_task
 
 router = APIRouter()
 
@@ -20,6 +20,12 @@ def create_hash_brute_task(
     if task.max_length > 8:
         task.max_length = 8  # Ограничение в 8 символов
     
+    # Хеш должен быть в формате rar2john ($rar5$...)
+    try:
+        parse_rar5_hash(task.hash)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     db_task = create_bruteforce_task(db=db, task=task, user_id=current_user.id)
     
     # Запуск задачи брутфорса в отдельном потоке
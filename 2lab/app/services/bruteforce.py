@@ -1,66 +1,150 @@
+import collections
+import hashlib
 import itertools
+import multiprocessing
+import os
 import threading
-import time
-from typing import List, Callable
+from typing import Callable, Iterator, List, Optional, Tuple
 
 from app.cruds.bruteforce import update_task_status
 
 
-def generate_passwords(charset: str, max_length: int) -> List[str]:
-    """Генерирует все возможные пароли из заданного набора символов."""
-    all_passwords = []
+# Префикс хеша RAR5 в формате rar2john
+RAR5_PREFIX = "$rar5$"
+
+# Сколько паролей получает процесс пула за раз: PBKDF2 RAR5 - десятки миллисекунд на пароль
+CHUNK_SIZE = 32
+
+
+def iter_passwords(charset: str, max_length: int) -> Iterator[str]:
+    """Перебирает все возможные пароли из заданного набора символов, не храня их в памяти."""
     for length in range(1, max_length + 1):
         for password in itertools.product(charset, repeat=length):
-            all_passwords.append(''.join(password))
-    return all_passwords
+            yield ''.join(password)
 
 
-def check_hash(hash_to_check: str, password: str) -> bool:
+def generate_passwords(charset: str, max_length: int) -> List[str]:
+    """Генерирует все возможные пароли из заданного набора символов."""
+    return list(iter_passwords(charset, max_length))
+
+
+def parse_rar5_hash(hash_string: str) -> Tuple[bytes, int, bytes]:
     """
-    Проверяет, соответствует ли пароль хешу.
-    В реальном приложении здесь будет проверка хеша RAR-архива.
+    Разбирает хеш RAR5 из rar2john.
+
+    Формат: $rar5$16$соль$log2(итераций)$iv$8$проверочное значение (hex).
+
+    Returns:
+        (соль, число итераций PBKDF2, проверочное значение пароля)
     """
-    # Имитация проверки хеша (для демонстрации)
-    # В реальности используйте rar2john или другой инструмент
-    return hash_to_check == password  # Упрощенная реализация для примера
+    if not hash_string.startswith(RAR5_PREFIX):
+        raise ValueError("Ожидается хеш RAR5 вида $rar5$... (rar2john)")
+
+    fields = hash_string[len(RAR5_PREFIX):].strip().split("$")
+    try:
+        salt_length, salt, lg2_count, _, check_length, check = fields
+        salt = bytes.fromhex(salt)
+        check = bytes.fromhex(check)
+        lg2_count = int(lg2_count)
+    except ValueError:
+        raise ValueError("Некорректный хеш RAR5")
+
+    if len(salt) != int(salt_length) or len(check) != int(check_length) or len(check) != 8:
+        raise ValueError("Некорректный хеш RAR5")
+    # RAR5 хранит log2 числа итераций, в архиве оно не больше 2^24
+    if not 0 <= lg2_count <= 24:
+        raise ValueError("Некорректное число итераций RAR5")
+    return salt, 1 << lg2_count, check
 
 
-def brute_force(task_id: str, hash_to_crack: str, charset: str, max_length: int, 
-                update_callback: Callable[[str, str, float, str], None]) -> None:
+def rar5_password_check(password: str, salt: bytes, iterations: int) -> bytes:
+    """
+    Проверочное значение пароля RAR5.
+
+    RAR5 продолжает PBKDF2-HMAC-SHA256 ключа архива еще на 32 итерации и
+    складывает полученные 32 байта через XOR в 8 байт.
+    """
+    value = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations + 32)
+    check = bytearray(8)
+    for i, byte in enumerate(value):
+        check[i % 8] ^= byte
+    return bytes(check)
+
+
+def check_hash(hash_to_check: str, password: str) -> bool:
+    """Проверяет, соответствует ли пароль хешу RAR5 (rar2john)."""
+    salt, iterations, check = parse_rar5_hash(hash_to_check)
+    return rar5_password_check(password, salt, iterations) == check
+
+
+def _check_chunk(args: Tuple[bytes, int, bytes, List[str]]) -> Tuple[Optional[str], int]:
+    """Проверяет пачку паролей в процессе пула: (найденный пароль или None, сколько проверено)"""
+    salt, iterations, check, passwords = args
+    for password in passwords:
+        if rar5_password_check(password, salt, iterations) == check:
+            return password, len(passwords)
+    return None, len(passwords)
+
+
+def _imap_bounded(pool, func: Callable, iterable, window: int):
+    """Как pool.imap, но держит в очереди пула не больше window задач, а не весь перебор"""
+    pending = collections.deque()
+    for item in iterable:
+        pending.append(pool.apply_async(func, (item,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def brute_force(task_id: str, hash_to_crack: str, charset: str, max_length: int,
+                update_callback: Callable[[str, str, float, str], None],
+                workers: int = 0) -> None:
     """
     Выполняет брутфорс-атаку на хеш.
-    
+
     Args:
         task_id: Идентификатор задачи
         hash_to_crack: Хеш для взлома
         charset: Набор символов для генерации паролей
         max_length: Максимальная длина пароля
         update_callback: Функция обратного вызова для обновления статуса
+        workers: Количество процессов (0 - по числу ядер)
     """
     update_callback(task_id, "running", 0.0, None)
-    
+
     try:
-        passwords = generate_passwords(charset, max_length)
-        total_passwords = len(passwords)
-        
-        for i, password in enumerate(passwords):
-            if check_hash(hash_to_crack, password):
-                update_callback(task_id, "completed", 100.0, password)
-                return
-            
-            # Обновление прогресса каждые 1000 паролей
-            if i % 1000 == 0 or i == total_passwords - 1:
-                progress = (i + 1) / total_passwords * 100
-                update_callback(task_id, "running", progress, None)
-        
+        # Хеш разбирается один раз, процессы получают уже готовые соль и параметры
+        salt, iterations, check = parse_rar5_hash(hash_to_crack)
+        total_passwords = sum(len(charset) ** length for length in range(1, max_length + 1))
+        passwords = iter_passwords(charset, max_length)
+        chunks = (
+            (salt, iterations, check, chunk)
+            for chunk in iter(lambda: list(itertools.islice(passwords, CHUNK_SIZE)), [])
+        )
+
+        checked = 0
+        processes = workers or os.cpu_count() or 1
+        with multiprocessing.Pool(processes=processes) as pool:
+            # Результаты приходят по порядку, в очереди - по две пачки на процесс
+            for found, count in _imap_bounded(pool, _check_chunk, chunks, processes * 2):
+                if found is not None:
+                    pool.terminate()
+                    update_callback(task_id, "completed", 100.0, found)
+                    return
+
+                # Обновление прогресса после каждой пачки
+                checked += count
+                update_callback(task_id, "running", checked / total_passwords * 100, None)
+
         # Если пароль не найден
         update_callback(task_id, "completed", 100.0, None)
-    
+
     except Exception as e:
         update_callback(task_id, "failed", 0.0, str(e))
 
 
-def start_brute_force_task(task_id: str, hash_to_crack: str, charset: str, max_length: int, 
+def start_brute_force_task(task_id: str, hash_to_crack: str, charset: str, max_length: int,
                           db_callback: Callable[[str, str, float, str], None]) -> None:
     """Запускает брутфорс-атаку в отдельном потоке."""
     thread = threading.Thread(
@@ -68,4 +152,4 @@ def start_brute_force_task(task_id: str, hash_to_crack: str, charset: str, max_l
         args=(task_id, hash_to_crack, charset, max_length, db_callback)
     )
     thread.daemon = True
-    thread.start() 
\ No newline at end of file
+    thread.start()
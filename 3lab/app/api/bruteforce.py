@@ -1,17 +1,174 @@
+import os
 import uuid
+import zipfile
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Tuple, Union
 
 from app.db.database import get_db
-from app.schemas.bruteforce import BruteforceRequest, BruteforceResponse, TaskStatus
+from app.schemas.bruteforce import (
+    BruteforceRequest, BruteforceBatchRequest, BruteforceResponse, TaskStatus, HitStatus,
+    WordlistInfo
+)
 from app.cruds import bruteforce as bruteforce_crud
 from app.services.task_manager import task_manager
+from app.services.bruteforce import ENUMERATION_MODES
+from app.services.formats import HashFormat, get_format
+from app.services.kernels import kernel_available
+from app.services.archives import zip_target
+from app.services.attacks import build_keyspace
+from app.services.hybrid import HYBRID_SIDES
+from app.services.rules import load_rules
 from app.core.config import settings
 
 router = APIRouter()
 
 
+def _hash_format(hash_type: str) -> HashFormat:
+    """Формат хеша запроса (400 для неизвестного типа)"""
+    try:
+        return get_format(hash_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _normalize_target(hash_format: HashFormat, target_hash: str) -> str:
+    """Проверяет запись хеша и приводит ее к каноническому виду"""
+    # Архив читается один раз здесь, дальше задача работает со строкой $zip$
+    if hash_format.name == "zip" and not target_hash.startswith("$zip$"):
+        target_hash = _archive_target(target_hash)
+    try:
+        hash_format.parse(target_hash)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Некорректный хеш {target_hash}: {e}")
+    return hash_format.normalize(target_hash)
+
+
+def _check_enumeration_mode(enumeration_mode: str, hash_format: HashFormat):
+    """Проверяет режим перебора: kernel - только при наличии ядра для типа хеша"""
+    if enumeration_mode not in ENUMERATION_MODES:
+        raise HTTPException(status_code=400, detail="Неизвестный режим перебора")
+    if enumeration_mode == "kernel" and not kernel_available(hash_format.name):
+        raise HTTPException(status_code=400,
+                            detail=f"Режим kernel недоступен для {hash_format.name} (нужен numpy, md5 или sha1)")
+
+
+def _check_budget(request: Union[BruteforceRequest, BruteforceBatchRequest]):
+    """Проверяет бюджет задачи: ограничения, если заданы, положительные"""
+    if request.max_seconds is not None and request.max_seconds <= 0:
+        raise HTTPException(status_code=400, detail="max_seconds должен быть больше нуля")
+    if request.max_candidates is not None and request.max_candidates <= 0:
+        raise HTTPException(status_code=400, detail="max_candidates должен быть больше нуля")
+
+
+def _task_status(task) -> TaskStatus:
+    """Статус задачи для ответа API"""
+    return TaskStatus(
+        task_id=task.task_id,
+        task_type=task.task_type or "single",
+        status=task.status,
+        hash_type=task.hash_type,
+        progress=task.progress,
+        current_combination=task.current_combination,
+        combinations_per_second=task.combinations_per_second,
+        result=task.result,
+        outcome=task.outcome,
+        eta_seconds=task.eta_seconds,
+        elapsed_time=task.elapsed_time,
+        created_at=task.created_at,
+        completed_at=task.completed_at
+    )
+
+
+def _data_file(directory: str, name: str, kind: str) -> str:
+    """Путь к файлу в каталоге данных (выход за пределы каталога запрещен)"""
+    directory = os.path.realpath(directory)
+    path = os.path.realpath(os.path.join(directory, name))
+    if os.path.dirname(path) != directory:
+        raise HTTPException(status_code=400, detail=f"Некорректное имя файла: {kind}")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"Файл не найден: {kind}")
+    if os.path.getsize(path) == 0:
+        raise HTTPException(status_code=400, detail=f"Файл пуст: {kind}")
+    return path
+
+
+def _archive_target(name: str) -> str:
+    """Строка цели $zip$ для архива из каталога archives_dir"""
+    path = _data_file(settings.archives_dir, name, "архив")
+    try:
+        return zip_target(path)
+    except (ValueError, zipfile.BadZipFile) as e:
+        raise HTTPException(status_code=400, detail=f"Некорректный архив {name}: {e}")
+
+
+def _list_files(directory: str) -> List[WordlistInfo]:
+    """Файлы каталога данных с размерами"""
+    if not os.path.isdir(directory):
+        return []
+    return [
+        WordlistInfo(name=entry.name, size=entry.stat().st_size)
+        for entry in sorted(os.scandir(directory), key=lambda entry: entry.name)
+        if entry.is_file()
+    ]
+
+
+def _resolve_attack(request: Union[BruteforceRequest, BruteforceBatchRequest]
+                    ) -> Tuple[str, Optional[dict], str, int]:
+    """Определяет режим атаки запроса: (attack_mode, параметры, charset, max_length)"""
+    if request.markov_corpus and (request.wordlist or request.mask or request.rules):
+        raise HTTPException(status_code=400,
+                            detail="Марковский перебор задается только charset и max_length")
+    
+    mask_options = None
+    if request.mask:
+        mask_options = {
+            "mask": request.mask,
+            "custom_charsets": request.custom_charsets,
+            "increment": request.mask_increment,
+            "min_length": request.mask_min_length
+        }
+        try:
+            mask_keyspace = build_keyspace("mask", "", 0, mask_options)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Некорректная маска: {e}")
+    
+    if request.wordlist:
+        options = {"wordlist": _data_file(settings.wordlists_dir, request.wordlist, "словарь")}
+        
+        # Словарь вместе с маской - гибридная атака
+        if mask_options:
+            if request.rules:
+                raise HTTPException(status_code=400, detail="Правила не применяются в гибридной атаке")
+            if request.hybrid_side not in HYBRID_SIDES:
+                raise HTTPException(status_code=400, detail="Сторона маски: right или left")
+            options.update(mask_options, side=request.hybrid_side)
+            return "hybrid", options, mask_keyspace.charset, mask_keyspace.max_length
+        
+        if request.rules:
+            options["rules"] = _data_file(settings.rules_dir, request.rules, "правила")
+            try:
+                load_rules(options["rules"])
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"Некорректные правила: {e}")
+        return "dictionary", options, "", 0
+    if request.rules:
+        raise HTTPException(status_code=400, detail="Правила применяются только к словарю")
+    
+    if mask_options:
+        return "mask", mask_options, mask_keyspace.charset, mask_keyspace.max_length
+    
+    # Используем дефолтный charset если не указан и ограничиваем максимальную длину
+    charset = request.charset or settings.default_charset
+    max_length = min(request.max_length, settings.max_password_length)
+    
+    # Тот же charset и длины, но в порядке убывания вероятности по модели из корпуса
+    if request.markov_corpus:
+        corpus = _data_file(settings.wordlists_dir, request.markov_corpus, "корпус")
+        return "markov", {"corpus": corpus}, charset, max_length
+    return "bruteforce", None, charset, max_length
+
+
 @router.post("/start", response_model=BruteforceResponse)
 async def start_bruteforce(
     request: BruteforceRequest,
@@ -23,19 +180,26 @@ async def start_bruteforce(
     # Используем переданный task_id или генерируем новый
     task_id = getattr(request, 'task_id', None) or str(uuid.uuid4())
     
-    # Используем дефолтный charset если не указан
-    charset = request.charset or settings.default_charset
+    hash_format = _hash_format(request.hash_type)
+    target_hash = _normalize_target(hash_format, request.target_hash)
+    _check_enumeration_mode(request.enumeration_mode, hash_format)
+    _check_budget(request)
     
-    # Ограничиваем максимальную длину
-    max_length = min(request.max_length, settings.max_password_length)
+    # Маска задает набор символов для каждой позиции вместо charset и max_length
+    attack_mode, attack_options, charset, max_length = _resolve_attack(request)
     
     # Запускаем асинхронную задачу
     await task_manager.start_bruteforce_task(
         task_id=task_id,
-        hash_type=request.hash_type,
-        target_hash=request.target_hash,
+        hash_type=hash_format.name,
+        target_hash=target_hash,
         charset=charset,
         max_length=max_length,
+        enumeration_mode=request.enumeration_mode,
+        attack_mode=attack_mode,
+        attack_options=attack_options,
+        max_seconds=request.max_seconds,
+        max_candidates=request.max_candidates,
         user_id=user_id
     )
     
@@ -45,6 +209,67 @@ async def start_bruteforce(
     )
 
 
+@router.post("/start-batch", response_model=BruteforceResponse)
+async def start_batch_bruteforce(
+    request: BruteforceBatchRequest,
+    db: Session = Depends(get_db),
+    user_id: str = "anonymous"
+):
+    """Запуск пакетной задачи: один проход по пространству против списка хешей"""
+    
+    hash_format = _hash_format(request.hash_type)
+    _check_enumeration_mode(request.enumeration_mode, hash_format)
+    _check_budget(request)
+    
+    # Приводим хеши к каноническому виду формата и убираем дубликаты
+    target_hashes = list(dict.fromkeys(
+        _normalize_target(hash_format, h) for h in request.target_hashes
+    ))
+    if not target_hashes:
+        raise HTTPException(status_code=400, detail="Список хешей пуст")
+    
+    task_id = request.task_id or str(uuid.uuid4())
+    attack_mode, attack_options, charset, max_length = _resolve_attack(request)
+    
+    await task_manager.start_batch_task(
+        task_id=task_id,
+        hash_type=hash_format.name,
+        target_hashes=target_hashes,
+        charset=charset,
+        max_length=max_length,
+        enumeration_mode=request.enumeration_mode,
+        attack_mode=attack_mode,
+        attack_options=attack_options,
+        max_seconds=request.max_seconds,
+        max_candidates=request.max_candidates,
+        user_id=user_id
+    )
+    
+    return BruteforceResponse(
+        task_id=task_id,
+        message=f"Пакетная задача запущена ({len(target_hashes)} хешей). "
+                f"Подключитесь к WebSocket /ws/{task_id} для получения уведомлений."
+    )
+
+
+@router.get("/wordlists", response_model=List[WordlistInfo])
+async def get_wordlists():
+    """Список словарей, доступных для атаки по словарю"""
+    return _list_files(settings.wordlists_dir)
+
+
+@router.get("/rules", response_model=List[WordlistInfo])
+async def get_rule_files():
+    """Список файлов правил для атаки по словарю"""
+    return _list_files(settings.rules_dir)
+
+
+@router.get("/archives", response_model=List[WordlistInfo])
+async def get_archives():
+    """Список зашифрованных архивов для hash_type zip"""
+    return _list_files(settings.archives_dir)
+
+
 @router.get("/tasks", response_model=List[TaskStatus])
 async def get_tasks(
     skip: int = 0,
@@ -54,21 +279,7 @@ async def get_tasks(
 ):
     """Получение списка задач пользователя"""
     tasks = bruteforce_crud.get_tasks(db, user_id, skip, limit)
-    return [
-        TaskStatus(
-            task_id=task.task_id,
-            status=task.status,
-            hash_type=task.hash_type,
-            progress=task.progress,
-            current_combination=task.current_combination,
-            combinations_per_second=task.combinations_per_second,
-            result=task.result,
-            elapsed_time=task.elapsed_time,
-            created_at=task.created_at,
-            completed_at=task.completed_at
-        )
-        for task in tasks
-    ]
+    return [_task_status(task) for task in tasks]
 
 
 @router.get("/task/{task_id}", response_model=TaskStatus)
@@ -78,18 +289,19 @@ async def get_task_status(task_id: str, db: Session = Depends(get_db)):
     if not task:
         raise HTTPException(status_code=404, detail="Задача не найдена")
     
-    return TaskStatus(
-        task_id=task.task_id,
-        status=task.status,
-        hash_type=task.hash_type,
-        progress=task.progress,
-        current_combination=task.current_combination,
-        combinations_per_second=task.combinations_per_second,
-        result=task.result,
-        elapsed_time=task.elapsed_time,
-        created_at=task.created_at,
-        completed_at=task.completed_at
-    )
+    return _task_status(task)
+
+
+@router.get("/task/{task_id}/hits", response_model=List[HitStatus])
+async def get_task_hits(task_id: str, db: Session = Depends(get_db)):
+    """Получение найденных паролей пакетной задачи"""
+    if not bruteforce_crud.get_task(db, task_id):
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    
+    return [
+        HitStatus(target_hash=hit.target_hash, result=hit.result, found_at=hit.found_at)
+        for hit in bruteforce_crud.get_hits(db, task_id)
+    ]
 
 
 @router.delete("/task/{task_id}")
@@ -114,25 +326,13 @@ async def get_active_tasks():
 
 @router.get("/demo-hash/{password}")
 async def create_demo_hash(password: str, hash_type: str = "md5"):
-    """Создание демонстрационного хеша для тестирования"""
-    import hashlib
-    
-    hash_functions = {
-        "md5": hashlib.md5,
-        "sha1": hashlib.sha1,
-        "sha256": hashlib.sha256,
-        "sha512": hashlib.sha512
-    }
-    
-    if hash_type not in hash_functions:
-        raise HTTPException(status_code=400, detail="Неподдерживаемый тип хеша")
-    
-    hash_func = hash_functions[hash_type]
-    result_hash = hash_func(password.encode()).hexdigest()
+    """Создание демонстрационного хеша для тестирования (соль - случайная)"""
+    hash_format = _hash_format(hash_type)
+    result_hash = hash_format.encode(password.encode())
     
     return {
         "password": password,
-        "hash_type": hash_type,
+        "hash_type": hash_format.name,
         "hash": result_hash,
         "message": f"Используйте этот хеш для тестирования брутфорса: {result_hash}"
     } 
\ No newline at end of file
@@ -0,0 +1,34 @@
+import time
+from fastapi import APIRouter, HTTPException
+
+from app.services.lookup import lookup_tables
+
+router = APIRouter()
+
+
+@router.get("/tables")
+async def list_tables(hash_type: str = None):
+    """Таблицы поиска, построенные build_tables.py"""
+    return [table.info() for table in lookup_tables.tables(hash_type)]
+
+
+@router.get("/{hash_type}/{digest}")
+async def lookup_hash(hash_type: str, digest: str):
+    """Поиск хеша в таблицах поиска"""
+    try:
+        binary = bytes.fromhex(digest)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Хеш должен быть в шестнадцатеричном виде")
+    
+    start = time.perf_counter()
+    for table in lookup_tables.tables(hash_type):
+        plaintext = table.lookup(binary)
+        if plaintext is not None:
+            return {
+                "hash_type": table.hash_type,
+                "hash": digest.lower(),
+                "result": plaintext,
+                "table": table.info()["name"],
+                "lookup_time_us": round((time.perf_counter() - start) * 1e6, 1)
+            }
+    raise HTTPException(status_code=404, detail="Хеш не найден в таблицах поиска")
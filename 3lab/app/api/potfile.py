@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.db.database import get_db
+from app.cruds import bruteforce as bruteforce_crud
+from app.services import potfile
+
+router = APIRouter()
+
+
+@router.get("/export", response_class=PlainTextResponse)
+async def export_potfile(hash_type: Optional[str] = None, db: Session = Depends(get_db)):
+    """Выгрузка взломанных хешей в формате hash_type:hash:password"""
+    lines = [
+        potfile.format_entry(cracked.hash_type, cracked.digest, cracked.plaintext)
+        for cracked in bruteforce_crud.get_all_cracked(db, hash_type)
+    ]
+    return "\n".join(lines) + ("\n" if lines else "")
+
+
+@router.post("/import")
+async def import_potfile(request: Request, db: Session = Depends(get_db)):
+    """Загрузка взломанных хешей из potfile другой установки"""
+    body = (await request.body()).decode("utf-8", errors="replace")
+    
+    try:
+        entries = list(potfile.parse_lines(body.splitlines()))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    imported = 0
+    for hash_type, digest, plaintext in entries:
+        if not bruteforce_crud.get_cracked(db, hash_type, digest):
+            bruteforce_crud.add_cracked(db, hash_type, digest, plaintext)
+            imported += 1
+    
+    return {"imported": imported, "total": len(entries)}
+
+
+@router.get("/{hash_type}/{digest}")
+async def lookup_potfile(hash_type: str, digest: str, db: Session = Depends(get_db)):
+    """Поиск хеша в potfile"""
+    try:
+        cracked = bruteforce_crud.get_cracked(db, hash_type, digest)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not cracked:
+        raise HTTPException(status_code=404, detail="Хеш не найден в potfile")
+    return {"hash_type": cracked.hash_type, "hash": cracked.digest, "result": cracked.plaintext}
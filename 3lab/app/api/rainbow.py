@@ -0,0 +1,36 @@
+import asyncio
+import time
+from fastapi import APIRouter, HTTPException
+
+from app.services.rainbow import rainbow_tables
+
+router = APIRouter()
+
+
+@router.get("/tables")
+async def list_tables(hash_type: str = None):
+    """Радужные таблицы, построенные build_tables.py --rainbow"""
+    return [table.info() for table in rainbow_tables.tables(hash_type)]
+
+
+@router.get("/{hash_type}/{digest}")
+async def lookup_hash(hash_type: str, digest: str):
+    """Поиск хеша в радужных таблицах"""
+    try:
+        binary = bytes.fromhex(digest)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Хеш должен быть в шестнадцатеричном виде")
+    
+    start = time.perf_counter()
+    for table in rainbow_tables.tables(hash_type):
+        # Проход цепочек - квадратичный по длине цепочки, не в цикле событий
+        plaintext = await asyncio.to_thread(table.lookup, binary)
+        if plaintext is not None:
+            return {
+                "hash_type": table.hash_type,
+                "hash": digest.lower(),
+                "result": plaintext,
+                "table": table.info()["name"],
+                "lookup_time_ms": round((time.perf_counter() - start) * 1e3, 2)
+            }
+    raise HTTPException(status_code=404, detail="Хеш не найден в радужных таблицах")
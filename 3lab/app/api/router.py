@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api import bruteforce
+from app.api import bruteforce, lookup, potfile, rainbow
 
 api_router = APIRouter()
 
@@ -7,4 +7,22 @@ api_router.include_router(
     bruteforce.router,
     prefix="/bruteforce",
     tags=["bruteforce"]
-) 
\ No newline at end of file
+)
+
+api_router.include_router(
+    potfile.router,
+    prefix="/potfile",
+    tags=["potfile"]
+)
+
+api_router.include_router(
+    lookup.router,
+    prefix="/lookup",
+    tags=["lookup"]
+)
+
+api_router.include_router(
+    rainbow.router,
+    prefix="/rainbow",
+    tags=["rainbow"]
+)
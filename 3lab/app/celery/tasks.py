@@ -3,10 +3,12 @@ from datetime import datetime
 from celery import current_task
 from app.celery.celery_app import celery_app
 from app.services.bruteforce import BruteforceService
+from app.services.progress import OUTCOME_BUDGET_EXCEEDED, Budget
 from app.db.database import SessionLocal
 from app.cruds import bruteforce as bruteforce_crud
 from app.websocket.manager import websocket_manager
 from app.schemas.bruteforce import WebSocketMessage
+from app.core.config import settings
 
 
 @celery_app.task(bind=True)
@@ -35,11 +37,12 @@ def bruteforce_task(self, task_id: str, hash_type: str, target_hash: str,
         # Создаем сервис брутфорса
         bruteforce_service = BruteforceService(hash_type)
         
-        def progress_callback(progress: int, current_combination: str, combinations_per_second: int):
+        def progress_callback(progress: int, current_combination: str, combinations_per_second: int,
+                              eta_seconds: int = None):
             """Callback для отправки прогресса через WebSocket"""
             # Обновляем в базе данных
             bruteforce_crud.update_task_progress(
-                db, task_id, progress, current_combination, combinations_per_second
+                db, task_id, progress, current_combination, combinations_per_second, eta_seconds
             )
             
             # Отправляем WebSocket уведомление о прогрессе
@@ -48,13 +51,16 @@ def bruteforce_task(self, task_id: str, hash_type: str, target_hash: str,
                 task_id=task_id,
                 progress=progress,
                 current_combination=current_combination,
-                combinations_per_second=combinations_per_second
+                combinations_per_second=combinations_per_second,
+                eta_seconds=eta_seconds
             )
             websocket_manager.send_message_to_task(task_id, progress_message.dict())
         
         # Выполняем брутфорс
         result = bruteforce_service.bruteforce(
-            target_hash, charset, max_length, progress_callback
+            target_hash, charset, max_length, progress_callback,
+            workers=settings.bruteforce_workers,
+            budget=Budget(max_seconds=settings.celery_max_seconds or None)
         )
         
         # Вычисляем время выполнения
@@ -65,14 +71,21 @@ def bruteforce_task(self, task_id: str, hash_type: str, target_hash: str,
         elapsed_time = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
         
         # Обновляем задачу как завершенную
-        found_password = result if result else "Пароль не найден"
-        bruteforce_crud.complete_task(db, task_id, found_password, elapsed_time)
+        if result:
+            found_password = result
+        elif bruteforce_service.outcome == OUTCOME_BUDGET_EXCEEDED:
+            found_password = "Пароль не найден: бюджет задачи исчерпан"
+        else:
+            found_password = "Пароль не найден"
+        bruteforce_crud.complete_task(db, task_id, found_password, elapsed_time,
+                                      found=result is not None, outcome=bruteforce_service.outcome)
         
         # Отправляем WebSocket уведомление о завершении
         completion_message = WebSocketMessage(
             status="COMPLETED",
             task_id=task_id,
             result=found_password,
+            outcome=bruteforce_service.outcome,
             elapsed_time=elapsed_time
         )
         websocket_manager.send_message_to_task(task_id, completion_message.dict())
@@ -16,6 +16,26 @@ class Settings(BaseSettings):
     # Bruteforce settings
     max_password_length: int = 8
     default_charset: str = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+    # Количество процессов для перебора (0 - по числу ядер)
+    bruteforce_workers: int = 0
+    # Сколько задач TaskManager выполняет одновременно (остальные ждут в очереди)
+    max_concurrent_tasks: int = 2
+    # Способ запуска процессов перебора: spawn безопасен при работающих потоках сервера
+    worker_start_method: str = "spawn"
+    # Минимальный интервал записи прогресса задачи в БД и WebSocket (секунды)
+    progress_interval: float = 1.0
+    # Интервал сохранения контрольной точки задачи (секунды)
+    checkpoint_interval: int = 30
+    # Бюджет задач Celery по времени (секунды, 0 - без ограничения): запрос Celery бюджет не задает
+    celery_max_seconds: float = 600
+    # Каталог со словарями для атаки по словарю
+    wordlists_dir: str = "wordlists"
+    # Каталог с файлами правил для атаки по словарю
+    rules_dir: str = "rules"
+    # Каталог с таблицами поиска (build_tables.py)
+    tables_dir: str = "tables"
+    # Каталог с зашифрованными архивами (hash_type zip: target_hash - имя архива)
+    archives_dir: str = "archives"
     
     class Config:
         env_file = ".env"
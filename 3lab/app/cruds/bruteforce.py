@@ -1,17 +1,48 @@
+import json
 from sqlalchemy.orm import Session
-from app.models.bruteforce import BruteforceTask
-from app.schemas.bruteforce import BruteforceRequest
-from typing import List, Optional
+from app.models.bruteforce import BruteforceTask, BruteforceHit, CrackedHash
+from app.schemas.bruteforce import BruteforceRequest, BruteforceBatchRequest
+from app.services.formats import normalize_hash
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
-def create_task(db: Session, task_id: str, request: BruteforceRequest, user_id: str = None) -> BruteforceTask:
+def create_task(db: Session, task_id: str, request: BruteforceRequest, user_id: str = None,
+                attack_mode: str = "bruteforce", attack_options: dict = None) -> BruteforceTask:
     db_task = BruteforceTask(
         task_id=task_id,
         hash_type=request.hash_type,
         target_hash=request.target_hash,
         charset=request.charset or "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789",
         max_length=request.max_length,
+        enumeration_mode=request.enumeration_mode,
+        attack_mode=attack_mode,
+        attack_options=json.dumps(attack_options) if attack_options else None,
+        max_seconds=request.max_seconds,
+        max_candidates=request.max_candidates,
+        user_id=user_id
+    )
+    db.add(db_task)
+    db.commit()
+    db.refresh(db_task)
+    return db_task
+
+
+def create_batch_task(db: Session, task_id: str, request: BruteforceBatchRequest,
+                      user_id: str = None, attack_mode: str = "bruteforce",
+                      attack_options: dict = None) -> BruteforceTask:
+    db_task = BruteforceTask(
+        task_id=task_id,
+        task_type="batch",
+        hash_type=request.hash_type,
+        target_hash="\n".join(request.target_hashes),
+        charset=request.charset or "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789",
+        max_length=request.max_length,
+        enumeration_mode=request.enumeration_mode,
+        attack_mode=attack_mode,
+        attack_options=json.dumps(attack_options) if attack_options else None,
+        max_seconds=request.max_seconds,
+        max_candidates=request.max_candidates,
         user_id=user_id
     )
     db.add(db_task)
@@ -32,34 +63,141 @@ def get_tasks(db: Session, user_id: str = None, skip: int = 0, limit: int = 100)
 
 
 def update_task_progress(db: Session, task_id: str, progress: int, current_combination: str, 
-                        combinations_per_second: int) -> Optional[BruteforceTask]:
+                        combinations_per_second: int,
+                        eta_seconds: Optional[int] = None) -> Optional[BruteforceTask]:
     db_task = get_task(db, task_id)
     if db_task:
         db_task.progress = progress
         db_task.current_combination = current_combination
         db_task.combinations_per_second = combinations_per_second
+        db_task.eta_seconds = eta_seconds
         db_task.status = "PROGRESS"
         db.commit()
         db.refresh(db_task)
     return db_task
 
 
-def complete_task(db: Session, task_id: str, result: str, elapsed_time: str) -> Optional[BruteforceTask]:
+def complete_task(db: Session, task_id: str, result: str, elapsed_time: str,
+                  found: bool = False, outcome: Optional[str] = None) -> Optional[BruteforceTask]:
     db_task = get_task(db, task_id)
     if db_task:
         db_task.status = "COMPLETED"
         db_task.result = result
+        db_task.outcome = outcome
+        db_task.eta_seconds = None
         db_task.elapsed_time = elapsed_time
         db_task.completed_at = datetime.utcnow()
         db.commit()
         db.refresh(db_task)
+        
+        # Сохраняем взломанные хеши в potfile
+        if db_task.task_type == "batch":
+            for hit in get_hits(db, task_id):
+                add_cracked(db, db_task.hash_type, hit.target_hash, hit.result)
+        elif found:
+            add_cracked(db, db_task.hash_type, db_task.target_hash, result)
     return db_task
 
 
+def save_checkpoint(db: Session, task_id: str, index: int, attempts: int,
+                    elapsed: float) -> Optional[BruteforceTask]:
+    db_task = get_task(db, task_id)
+    if db_task:
+        db_task.checkpoint_index = index
+        db_task.checkpoint_attempts = attempts
+        db_task.checkpoint_elapsed = elapsed
+        db_task.checkpoint_at = datetime.utcnow()
+        db.commit()
+        db.refresh(db_task)
+    return db_task
+
+
+def get_unfinished_tasks(db: Session) -> List[BruteforceTask]:
+    """Задачи, прерванные перезапуском сервера"""
+    return db.query(BruteforceTask).filter(
+        BruteforceTask.status.in_(["STARTED", "PROGRESS"])
+    ).all()
+
+
 def start_task(db: Session, task_id: str) -> Optional[BruteforceTask]:
     db_task = get_task(db, task_id)
     if db_task:
         db_task.status = "STARTED"
         db.commit()
         db.refresh(db_task)
-    return db_task 
\ No newline at end of file
+    return db_task
+
+
+def cancel_task(db: Session, task_id: str) -> Optional[BruteforceTask]:
+    """Отмечает задачу отмененной, чтобы она не продолжилась после перезапуска"""
+    db_task = get_task(db, task_id)
+    if db_task:
+        db_task.status = "CANCELLED"
+        db_task.completed_at = datetime.utcnow()
+        db.commit()
+        db.refresh(db_task)
+    return db_task
+
+
+def fail_task(db: Session, task_id: str, result: str) -> Optional[BruteforceTask]:
+    """Отмечает задачу завершенной с ошибкой (в том числе не продолженную после перезапуска)"""
+    db_task = get_task(db, task_id)
+    if db_task:
+        db_task.status = "FAILED"
+        db_task.result = result
+        db_task.completed_at = datetime.utcnow()
+        db.commit()
+        db.refresh(db_task)
+    return db_task
+
+
+def add_hit(db: Session, task_id: str, target_hash: str, result: str) -> BruteforceHit:
+    db_hit = BruteforceHit(task_id=task_id, target_hash=target_hash, result=result)
+    db.add(db_hit)
+    db.commit()
+    db.refresh(db_hit)
+    return db_hit
+
+
+def get_hits(db: Session, task_id: str) -> List[BruteforceHit]:
+    return db.query(BruteforceHit).filter(BruteforceHit.task_id == task_id).all()
+
+
+def get_cracked(db: Session, hash_type: str, digest: str) -> Optional[CrackedHash]:
+    return db.query(CrackedHash).filter(
+        CrackedHash.hash_type == hash_type.lower(),
+        CrackedHash.digest == normalize_hash(hash_type, digest)
+    ).first()
+
+
+def get_cracked_many(db: Session, hash_type: str, digests: List[str]) -> Dict[str, str]:
+    """Возвращает {хеш: пароль} для уже взломанных хешей из списка"""
+    cracked = {}
+    digests = [normalize_hash(hash_type, digest) for digest in digests]
+    # Ограничение SQLite на количество параметров в запросе
+    for start in range(0, len(digests), 500):
+        rows = db.query(CrackedHash).filter(
+            CrackedHash.hash_type == hash_type.lower(),
+            CrackedHash.digest.in_(digests[start:start + 500])
+        ).all()
+        cracked.update((row.digest, row.plaintext) for row in rows)
+    return cracked
+
+
+def get_all_cracked(db: Session, hash_type: str = None) -> List[CrackedHash]:
+    query = db.query(CrackedHash)
+    if hash_type:
+        query = query.filter(CrackedHash.hash_type == hash_type.lower())
+    return query.order_by(CrackedHash.id).all()
+
+
+def add_cracked(db: Session, hash_type: str, digest: str, plaintext: str) -> CrackedHash:
+    db_cracked = get_cracked(db, hash_type, digest)
+    if db_cracked:
+        return db_cracked
+    db_cracked = CrackedHash(hash_type=hash_type.lower(), digest=normalize_hash(hash_type, digest),
+                             plaintext=plaintext)
+    db.add(db_cracked)
+    db.commit()
+    db.refresh(db_cracked)
+    return db_cracked
\ No newline at end of file
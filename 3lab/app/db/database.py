@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 from app.models.bruteforce import Base
@@ -10,8 +10,38 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Создаем таблицы
+
+
+def _sql_literal(value) -> str:
+    """Представление значения по умолчанию в DDL"""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def upgrade_schema():
+    """Добавляет в существующие таблицы столбцы, появившиеся в моделях"""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = (f"ALTER TABLE {table.name} ADD COLUMN {column.name} "
+                       f"{column.type.compile(dialect=engine.dialect)}")
+                if column.default is not None and column.default.is_scalar:
+                    ddl += f" DEFAULT {_sql_literal(column.default.arg)}"
+                connection.execute(text(ddl))
+
+
+# Создаем таблицы и добавляем недостающие столбцы
 Base.metadata.create_all(bind=engine)
+upgrade_schema()
 
 
 def get_db():
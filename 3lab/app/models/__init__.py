@@ -1,3 +1,3 @@
-from .bruteforce import BruteforceTask
+from .bruteforce import BruteforceTask, BruteforceHit, CrackedHash
 
-__all__ = ["BruteforceTask"] 
\ No newline at end of file
+__all__ = ["BruteforceTask", "BruteforceHit", "CrackedHash"] 
\ No newline at end of file
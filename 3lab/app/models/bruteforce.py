@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, BigInteger, Float, String, DateTime, Boolean, Text, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -10,10 +10,14 @@ class BruteforceTask(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     task_id = Column(String, unique=True, index=True, nullable=False)
+    task_type = Column(String, default="single")  # single, batch
     hash_type = Column(String, nullable=False)
-    target_hash = Column(String, nullable=False)
+    target_hash = Column(String, nullable=False)  # Для batch - хеши через перевод строки
     charset = Column(String, nullable=False)
     max_length = Column(Integer, nullable=False)
+    enumeration_mode = Column(String, default="direct")  # direct, incremental, kernel
+    attack_mode = Column(String, default="bruteforce")  # bruteforce, mask, dictionary, hybrid, markov
+    attack_options = Column(Text, nullable=True)  # JSON с параметрами режима атаки
     status = Column(String, default="PENDING")
     result = Column(String, nullable=True)
     progress = Column(Integer, default=0)
@@ -22,4 +26,37 @@ class BruteforceTask(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
     elapsed_time = Column(String, nullable=True)
-    user_id = Column(String, nullable=True)  # Для аутентификации 
\ No newline at end of file
+    user_id = Column(String, nullable=True)  # Для аутентификации
+    # Контрольная точка для продолжения после перезапуска
+    checkpoint_index = Column(BigInteger, default=0)  # Все кандидаты до этого индекса проверены
+    checkpoint_attempts = Column(BigInteger, default=0)
+    checkpoint_elapsed = Column(Float, default=0.0)  # Секунды работы до контрольной точки
+    checkpoint_at = Column(DateTime, nullable=True)
+    # Бюджет задачи (None - без ограничения) и исход прохода: FOUND, EXHAUSTED, BUDGET_EXCEEDED
+    max_seconds = Column(Float, nullable=True)
+    max_candidates = Column(BigInteger, nullable=True)
+    outcome = Column(String, nullable=True)
+    eta_seconds = Column(Integer, nullable=True)  # Оценка оставшегося времени по скорости
+
+
+class BruteforceHit(Base):
+    """Найденный пароль для одного из хешей пакетной задачи"""
+    __tablename__ = "bruteforce_hits"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(String, index=True, nullable=False)
+    target_hash = Column(String, nullable=False)
+    result = Column(String, nullable=False)
+    found_at = Column(DateTime, default=datetime.utcnow)
+
+
+class CrackedHash(Base):
+    """Взломанный хеш (potfile), общий для всех задач"""
+    __tablename__ = "cracked_hashes"
+    __table_args__ = (UniqueConstraint("hash_type", "digest", name="uq_cracked_hash"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    hash_type = Column(String, nullable=False)
+    digest = Column(String, nullable=False)  # Хеш в записи формата (normalize_hash)
+    plaintext = Column(String, nullable=False)
+    cracked_at = Column(DateTime, default=datetime.utcnow)
@@ -1,16 +1,46 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
 class BruteforceRequest(BaseModel):
-    hash_type: str = "md5"  # md5, sha1, sha256, rar, zip
-    target_hash: str
+    hash_type: str = "md5"  # Имя формата: md5, sha1, md5_salt, md5crypt, pbkdf2-sha256, zip, ...
+    target_hash: str  # Для zip - строка $zip$ или имя архива в каталоге archives_dir
     charset: Optional[str] = None
     max_length: int = 6
+    enumeration_mode: str = "direct"  # direct, incremental, kernel
+    mask: Optional[str] = None  # Например ?u?l?l?l?l?l?d?d - вместо charset и max_length
+    custom_charsets: Optional[Dict[str, str]] = None  # Наборы ?1..?4, например {"1": "?l?d"}
+    mask_increment: bool = False  # Перебирать и префиксы маски
+    mask_min_length: int = 1  # Минимальная длина префикса маски при mask_increment
+    wordlist: Optional[str] = None  # Имя файла словаря в каталоге wordlists_dir
+    rules: Optional[str] = None  # Имя файла правил в каталоге rules_dir (только со словарем)
+    hybrid_side: str = "right"  # wordlist + mask: маска справа (right) или слева (left) от слова
+    markov_corpus: Optional[str] = None  # Словарь для обучения марковской модели (charset, max_length)
+    max_seconds: Optional[float] = None  # Бюджет задачи по времени (секунды работы)
+    max_candidates: Optional[int] = None  # Бюджет задачи по числу проверенных кандидатов
     task_id: Optional[str] = None  # Опциональный ID для WebSocket совместимости
 
 
+class BruteforceBatchRequest(BaseModel):
+    hash_type: str = "md5"  # Имя формата, как в BruteforceRequest
+    target_hashes: List[str]  # Хеши одного формата
+    charset: Optional[str] = None
+    max_length: int = 6
+    enumeration_mode: str = "direct"  # direct, incremental, kernel
+    mask: Optional[str] = None
+    custom_charsets: Optional[Dict[str, str]] = None
+    mask_increment: bool = False
+    mask_min_length: int = 1
+    wordlist: Optional[str] = None
+    rules: Optional[str] = None
+    hybrid_side: str = "right"
+    markov_corpus: Optional[str] = None
+    max_seconds: Optional[float] = None
+    max_candidates: Optional[int] = None
+    task_id: Optional[str] = None
+
+
 class BruteforceResponse(BaseModel):
     task_id: str
     message: str
@@ -18,17 +48,31 @@ class BruteforceResponse(BaseModel):
 
 class TaskStatus(BaseModel):
     task_id: str
+    task_type: str = "single"
     status: str
     hash_type: str
     progress: int
     current_combination: Optional[str] = None
     combinations_per_second: int
     result: Optional[str] = None
+    outcome: Optional[str] = None  # FOUND, EXHAUSTED, BUDGET_EXCEEDED (после COMPLETED)
+    eta_seconds: Optional[int] = None  # Оценка оставшегося времени по измеренной скорости
     elapsed_time: Optional[str] = None
     created_at: datetime
     completed_at: Optional[datetime] = None
 
 
+class WordlistInfo(BaseModel):
+    name: str
+    size: int  # Байт
+
+
+class HitStatus(BaseModel):
+    target_hash: str
+    result: str
+    found_at: datetime
+
+
 class WebSocketMessage(BaseModel):
     status: str
     task_id: str
@@ -38,5 +82,8 @@ class WebSocketMessage(BaseModel):
     progress: Optional[int] = None
     current_combination: Optional[str] = None
     combinations_per_second: Optional[int] = None
+    eta_seconds: Optional[int] = None
+    target_hash: Optional[str] = None
     result: Optional[str] = None
+    outcome: Optional[str] = None
     elapsed_time: Optional[str] = None 
\ No newline at end of file
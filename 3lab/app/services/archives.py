@@ -0,0 +1,363 @@
+import hashlib
+import hmac
+import os
+import struct
+import zipfile
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.services.formats import HashFormat, register_format
+
+
+# Сколько байт зашифрованных данных файла архива допускается в строке цели: файлы
+# ZipCrypto больше этого попадают в строку только началом (без полной проверки CRC)
+ZIP_DATA_LIMIT = 4096
+
+# Сколько файлов ZipCrypto дают проверочный байт: каждый отсекает 255/256 кандидатов
+ZIP_CHECK_ENTRIES = 3
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END_RECORD = struct.Struct("<IHHHHIIH")
+_AES_EXTRA = struct.Struct("<HHH2sBH")
+
+_AES_METHOD = 99
+# Сила AES: (байт ключа, байт соли)
+_AES_STRENGTHS = {1: (16, 8), 2: (24, 12), 3: (32, 16)}
+_AES_ITERATIONS = 1000
+_AES_AUTH_SIZE = 10
+
+
+def _crc_table() -> Tuple[int, ...]:
+    table = []
+    for value in range(256):
+        for _ in range(8):
+            value = (value >> 1) ^ 0xEDB88320 if value & 1 else value >> 1
+        table.append(value)
+    return tuple(table)
+
+
+_CRC = _crc_table()
+_INITIAL_KEYS = (0x12345678, 0x23456789, 0x34567890)
+
+
+def _zipcrypto_keys(password: bytes, keys: Tuple[int, int, int] = _INITIAL_KEYS) -> Tuple[int, int, int]:
+    """Ключи ZipCrypto после обработки байтов пароля"""
+    key0, key1, key2 = keys
+    crc = _CRC
+    for byte in password:
+        key0 = (key0 >> 8) ^ crc[(key0 ^ byte) & 0xff]
+        key1 = ((key1 + (key0 & 0xff)) * 134775813 + 1) & 0xffffffff
+        key2 = (key2 >> 8) ^ crc[(key2 ^ (key1 >> 24)) & 0xff]
+    return key0, key1, key2
+
+
+def _zipcrypto_decrypt(data: bytes, keys: Tuple[int, int, int]) -> bytes:
+    """Расшифровывает данные ZipCrypto, начиная с ключей keys"""
+    key0, key1, key2 = keys
+    crc = _CRC
+    result = bytearray(len(data))
+    for position, byte in enumerate(data):
+        temp = (key2 | 2) & 0xffff
+        byte ^= ((temp * (temp ^ 1)) >> 8) & 0xff
+        result[position] = byte
+        key0 = (key0 >> 8) ^ crc[(key0 ^ byte) & 0xff]
+        key1 = ((key1 + (key0 & 0xff)) * 134775813 + 1) & 0xffffffff
+        key2 = (key2 >> 8) ^ crc[(key2 ^ (key1 >> 24)) & 0xff]
+    return bytes(result)
+
+
+def _zipcrypto_encrypt(data: bytes, keys: Tuple[int, int, int]) -> bytes:
+    """Шифрует данные ZipCrypto (для генерации тестовых архивов)"""
+    key0, key1, key2 = keys
+    crc = _CRC
+    result = bytearray(len(data))
+    for position, byte in enumerate(data):
+        temp = (key2 | 2) & 0xffff
+        result[position] = byte ^ (((temp * (temp ^ 1)) >> 8) & 0xff)
+        key0 = (key0 >> 8) ^ crc[(key0 ^ byte) & 0xff]
+        key1 = ((key1 + (key0 & 0xff)) * 134775813 + 1) & 0xffffffff
+        key2 = (key2 >> 8) ^ crc[(key2 ^ (key1 >> 24)) & 0xff]
+    return bytes(result)
+
+
+def _header_check(header: bytes, keys: Tuple[int, int, int]) -> int:
+    """Последний байт расшифрованного 12-байтового заголовка ZipCrypto"""
+    key0, key1, key2 = keys
+    crc = _CRC
+    byte = 0
+    for encrypted in header:
+        temp = (key2 | 2) & 0xffff
+        byte = encrypted ^ (((temp * (temp ^ 1)) >> 8) & 0xff)
+        key0 = (key0 >> 8) ^ crc[(key0 ^ byte) & 0xff]
+        key1 = ((key1 + (key0 & 0xff)) * 134775813 + 1) & 0xffffffff
+        key2 = (key2 >> 8) ^ crc[(key2 ^ (key1 >> 24)) & 0xff]
+    return byte
+
+
+def _decompress(data: bytes, method: int) -> Optional[bytes]:
+    """Распаковывает данные файла архива, None - если они повреждены"""
+    if method == zipfile.ZIP_STORED:
+        return data
+    if method == zipfile.ZIP_DEFLATED:
+        try:
+            return zlib.decompressobj(-15).decompress(data)
+        except zlib.error:
+            return None
+    raise ValueError(f"Неподдерживаемый метод сжатия ZIP: {method}")
+
+
+def _inflates_prefix(data: bytes, method: int) -> bool:
+    """Похоже ли начало данных файла на его начало: deflate-поток не обрывается и не кончается раньше"""
+    if method == zipfile.ZIP_STORED:
+        return True
+    if method != zipfile.ZIP_DEFLATED:
+        raise ValueError(f"Неподдерживаемый метод сжатия ZIP: {method}")
+    decompressor = zlib.decompressobj(-15)
+    try:
+        decompressor.decompress(data)
+    except zlib.error:
+        return False
+    # Файл длиннее своего начала: конец потока внутри него - признак неверного ключа
+    return not decompressor.eof
+
+
+def _entry_data(file, info: zipfile.ZipInfo, limit: Optional[int] = None) -> bytes:
+    """Сырые (зашифрованные) данные файла архива по локальному заголовку (не больше limit байт)"""
+    file.seek(info.header_offset)
+    header = _LOCAL_HEADER.unpack(file.read(_LOCAL_HEADER.size))
+    name_length, extra_length = header[9], header[10]
+    file.seek(info.header_offset + _LOCAL_HEADER.size + name_length + extra_length)
+    return file.read(info.compress_size if limit is None else min(info.compress_size, limit))
+
+
+def _aes_extra(info: zipfile.ZipInfo) -> Tuple[int, int]:
+    """(сила AES, настоящий метод сжатия) из дополнительного поля 0x9901"""
+    extra = info.extra
+    offset = 0
+    while offset + 4 <= len(extra):
+        field_id, size = struct.unpack_from("<HH", extra, offset)
+        if field_id == 0x9901 and size >= 7:
+            _, _, _, _, strength, method = _AES_EXTRA.unpack_from(extra, offset)
+            return strength, method
+        offset += 4 + size
+    raise ValueError(f"У файла {info.filename} нет параметров AES")
+
+
+def zip_target(path: str) -> str:
+    """
+    Читает зашифрованный ZIP один раз и возвращает строку цели $zip$
+
+    ZipCrypto: $zip$0*проверочный байт*метод*crc32*данные[*проверочный байт*заголовок]...
+        - полные данные самого маленького файла и 12-байтовые заголовки еще
+        нескольких файлов для раннего отсева
+    ZipCrypto, все файлы больше ZIP_DATA_LIMIT:
+        $zip$2*проверочный байт*метод*начало данных[*проверочный байт*заголовок]...
+        - как у zip2john для больших файлов: только первые ZIP_DATA_LIMIT байт,
+        пароль подтверждают проверочные байты и корректность начала deflate-потока
+        (несжатые файлы - только при ZIP_CHECK_ENTRIES проверочных байтах)
+    WinZip AES: $zip$1*сила*соль*значение проверки пароля*данные*код аутентификации
+        - код аутентификации считается по всем данным, поэтому они не обрезаются
+    """
+    with zipfile.ZipFile(path) as archive:
+        entries = [info for info in archive.infolist() if info.flag_bits & 1 and info.compress_size]
+    if not entries:
+        raise ValueError("В архиве нет зашифрованных файлов")
+    entries.sort(key=lambda info: info.compress_size)
+
+    with open(path, "rb") as file:
+        smallest = entries[0]
+        if smallest.compress_type == _AES_METHOD:
+            if smallest.compress_size > ZIP_DATA_LIMIT:
+                raise ValueError("Файлы WinZip AES в архиве слишком велики")
+            data = _entry_data(file, smallest)
+            strength, _ = _aes_extra(smallest)
+            if strength not in _AES_STRENGTHS:
+                raise ValueError(f"Неизвестная сила AES: {strength}")
+            salt_size = _AES_STRENGTHS[strength][1]
+            salt, verifier = data[:salt_size], data[salt_size:salt_size + 2]
+            encrypted, auth = data[salt_size + 2:-_AES_AUTH_SIZE], data[-_AES_AUTH_SIZE:]
+            return f"$zip$1*{strength}*{salt.hex()}*{verifier.hex()}*{encrypted.hex()}*{auth.hex()}"
+
+        if smallest.compress_size > ZIP_DATA_LIMIT:
+            parts = ["$zip$2", f"{_check_byte(smallest):02x}", str(smallest.compress_type),
+                     _entry_data(file, smallest, ZIP_DATA_LIMIT).hex()]
+        else:
+            parts = ["$zip$0", f"{_check_byte(smallest):02x}", str(smallest.compress_type),
+                     f"{smallest.CRC:08x}", _entry_data(file, smallest).hex()]
+        for info in entries[1:ZIP_CHECK_ENTRIES]:
+            if info.compress_type == _AES_METHOD:
+                continue
+            parts += [f"{_check_byte(info):02x}", _entry_data(file, info, 12).hex()]
+        # Начало несжатого файла ничего не подтверждает: без заголовков других файлов
+        # каждый 256-й кандидат прошел бы проверку
+        if (parts[0] == "$zip$2" and smallest.compress_type == zipfile.ZIP_STORED
+                and len(parts) < 4 + 2 * (ZIP_CHECK_ENTRIES - 1)):
+            raise ValueError("Несжатые зашифрованные файлы архива слишком велики")
+        return "*".join(parts)
+
+
+def _check_byte(info: zipfile.ZipInfo) -> int:
+    """Проверочный байт ZipCrypto: старший байт CRC или времени (если есть дескриптор данных)"""
+    if info.flag_bits & 0x8:
+        hours, minutes, seconds = info.date_time[3:]
+        return ((hours << 11) | (minutes << 5) | (seconds // 2)) >> 8
+    return info.CRC >> 24
+
+
+class ZipFormat(HashFormat):
+    """
+    Пароль зашифрованного ZIP (строка цели из zip_target)
+
+    ZipCrypto: ключи пароля считаются с общего префикса соседних кандидатов,
+    каждый 12-байтовый заголовок дает проверочный байт и отсекает 255/256
+    кандидатов; оставшиеся полностью расшифровываются, распаковываются
+    и сверяются по CRC32. Для больших файлов ($zip$2) есть только начало
+    данных: оно должно распаковаться без ошибки, а у несжатых файлов
+    остаются лишь проверочные байты нескольких файлов.
+    WinZip AES: PBKDF2-HMAC-SHA1 (1000 итераций) и 2-байтовое значение
+    проверки пароля отсекают 65535/65536 кандидатов; у оставшихся сверяется
+    HMAC-SHA1 зашифрованных данных, поэтому AES-расшифровка не нужна.
+    """
+
+    name = "zip"
+    batch_size = 256
+
+    def parse(self, target: str):
+        parts = target.strip().split("*")
+        try:
+            if parts[0] == "$zip$0" and len(parts) >= 5 and len(parts) % 2 == 1:
+                checks = [(int(parts[1], 16), bytes.fromhex(parts[4])[:12])]
+                for position in range(5, len(parts), 2):
+                    checks.append((int(parts[position], 16), bytes.fromhex(parts[position + 1])))
+                if any(len(header) != 12 for _, header in checks):
+                    raise ValueError
+                return ("zipcrypto", tuple(checks), int(parts[2]), int(parts[3], 16),
+                        bytes.fromhex(parts[4])), None
+            if parts[0] == "$zip$2" and len(parts) >= 4 and len(parts) % 2 == 0:
+                checks = [(int(parts[1], 16), bytes.fromhex(parts[3])[:12])]
+                for position in range(4, len(parts), 2):
+                    checks.append((int(parts[position], 16), bytes.fromhex(parts[position + 1])))
+                if any(len(header) != 12 for _, header in checks):
+                    raise ValueError
+                # CRC по началу данных не проверить: None вместо него
+                return ("zipcrypto", tuple(checks), int(parts[2]), None,
+                        bytes.fromhex(parts[3])), None
+            if parts[0] == "$zip$1" and len(parts) == 6:
+                strength = int(parts[1])
+                if strength not in _AES_STRENGTHS:
+                    raise ValueError
+                return ("aes", strength, bytes.fromhex(parts[2]), bytes.fromhex(parts[3]),
+                        bytes.fromhex(parts[4]), bytes.fromhex(parts[5])), None
+        except ValueError:
+            pass
+        raise ValueError("Цель zip - строка $zip$ из zip_target или имя архива")
+
+    def prepare(self, target_hashes: Sequence[str]) -> Dict:
+        return {self.normalize(target_hash): self.parse(target_hash)[0]
+                for target_hash in target_hashes}
+
+    def verify_batch(self, candidates: Sequence[bytes], targets: Dict) -> List[Tuple[str, bytes]]:
+        hits = []
+        for key, params in targets.items():
+            verify = self._verify_zipcrypto if params[0] == "zipcrypto" else self._verify_aes
+            hits.extend((key, candidate) for candidate in verify(candidates, params))
+        return hits
+
+    def _verify_zipcrypto(self, candidates: Sequence[bytes], params) -> List[bytes]:
+        _, checks, method, crc, data = params
+        found = []
+        # Соседние кандидаты отличаются последним символом: ключи префикса считаются один раз
+        prefix = None
+        prefix_keys = _INITIAL_KEYS
+        for candidate in candidates:
+            if candidate[:-1] != prefix:
+                prefix = candidate[:-1]
+                prefix_keys = _zipcrypto_keys(prefix)
+            keys = _zipcrypto_keys(candidate[-1:], prefix_keys)
+            if any(_header_check(header, keys) != check for check, header in checks):
+                continue
+            # Ранняя проверка пройдена (1 из 256 на файл): полная расшифровка и CRC
+            plain = _zipcrypto_decrypt(data, keys)[12:]
+            # У начала данных большого файла проверяется только распаковка
+            if crc is None:
+                if _inflates_prefix(plain, method):
+                    found.append(candidate)
+                continue
+            content = _decompress(plain, method)
+            if content is not None and zlib.crc32(content) == crc:
+                found.append(candidate)
+        return found
+
+    def _verify_aes(self, candidates: Sequence[bytes], params) -> List[bytes]:
+        _, strength, salt, verifier, encrypted, auth = params
+        key_size = _AES_STRENGTHS[strength][0]
+        found = []
+        for candidate in candidates:
+            keys = hashlib.pbkdf2_hmac("sha1", candidate, salt, _AES_ITERATIONS, key_size * 2 + 2)
+            if keys[-2:] != verifier:
+                continue
+            mac = hmac.new(keys[key_size:key_size * 2], encrypted, hashlib.sha1).digest()
+            if mac[:_AES_AUTH_SIZE] == auth:
+                found.append(candidate)
+        return found
+
+    def encode(self, password: bytes, salt: Optional[bytes] = None) -> str:
+        # Демо-хеш: строка цели архива с одним несжатым файлом, зашифрованным ZipCrypto
+        content = b"demo"
+        crc = zlib.crc32(content)
+        header = os.urandom(11) + bytes([crc >> 24])
+        data = _zipcrypto_encrypt(header + content, _zipcrypto_keys(password))
+        return f"$zip$0*{crc >> 24:02x}*{zipfile.ZIP_STORED}*{crc:08x}*{data.hex()}"
+
+
+def write_encrypted_zip(path: str, files: Dict[str, bytes], password: bytes,
+                        encryption: str = "zipcrypto", strength: int = 3):
+    """
+    Записывает зашифрованный ZIP (для бенчмарков и проверки без внешних утилит)
+
+    encryption="aes" записывает файлы WinZip AE-2 с верными солью, значением
+    проверки пароля и HMAC-SHA1; сами данные при этом не шифруются AES
+    (в стандартной библиотеке нет AES), что не влияет на проверку пароля:
+    HMAC считается по записанным байтам.
+    """
+    records = []
+    with open(path, "wb") as file:
+        for name, content in files.items():
+            encoded_name = name.encode()
+            crc = zlib.crc32(content)
+            compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+            compressed = compressor.compress(content) + compressor.flush()
+
+            if encryption == "aes":
+                key_size, salt_size = _AES_STRENGTHS[strength]
+                salt = os.urandom(salt_size)
+                keys = hashlib.pbkdf2_hmac("sha1", password, salt, _AES_ITERATIONS, key_size * 2 + 2)
+                mac = hmac.new(keys[key_size:key_size * 2], compressed, hashlib.sha1).digest()
+                data = salt + keys[-2:] + compressed + mac[:_AES_AUTH_SIZE]
+                method, extra = _AES_METHOD, _AES_EXTRA.pack(0x9901, 7, 2, b"AE", strength,
+                                                             zipfile.ZIP_DEFLATED)
+                crc = 0  # AE-2 не хранит CRC
+            else:
+                header = os.urandom(11) + bytes([crc >> 24])
+                data = _zipcrypto_encrypt(header + compressed, _zipcrypto_keys(password))
+                method, extra = zipfile.ZIP_DEFLATED, b""
+
+            offset = file.tell()
+            file.write(_LOCAL_HEADER.pack(0x04034b50, 51, 1, method, 0, 0x21, crc, len(data),
+                                          len(content), len(encoded_name), len(extra)))
+            file.write(encoded_name + extra + data)
+            records.append((encoded_name, extra, method, crc, len(data), len(content), offset))
+
+        directory_offset = file.tell()
+        for encoded_name, extra, method, crc, size, content_size, offset in records:
+            file.write(_CENTRAL_HEADER.pack(0x02014b50, 51, 51, 1, method, 0, 0x21, crc, size,
+                                            content_size, len(encoded_name), len(extra),
+                                            0, 0, 0, 0, offset))
+            file.write(encoded_name + extra)
+        directory_size = file.tell() - directory_offset
+        file.write(_END_RECORD.pack(0x06054b50, 0, 0, len(records), len(records),
+                                    directory_size, directory_offset, 0))
+
+
+register_format(ZipFormat())
@@ -0,0 +1,46 @@
+from typing import Optional, Union
+
+from app.services.hybrid import HybridKeyspace
+from app.services.keyspace import Keyspace
+from app.services.markov import MarkovKeyspace, MarkovModel
+from app.services.mask import MaskKeyspace
+from app.services.rules import load_rules
+from app.services.wordlist import WordlistKeyspace
+
+
+# Режимы атаки: источник кандидатов задачи
+ATTACK_MODES = ("bruteforce", "mask", "dictionary", "hybrid", "markov")
+
+
+def build_keyspace(attack_mode: str, charset: str, max_length: int,
+                   options: Optional[dict] = None
+                   ) -> Union[Keyspace, WordlistKeyspace, HybridKeyspace, MarkovKeyspace]:
+    """
+    Строит индексируемое пространство кандидатов для режима атаки
+
+    Args:
+        attack_mode: Режим атаки из ATTACK_MODES
+        charset: Набор символов (режимы bruteforce и markov)
+        max_length: Максимальная длина пароля (режимы bruteforce и markov)
+        options: Параметры режима, сохраняемые в задаче (маска, пути к словарю, правилам, корпусу)
+    """
+    options = options or {}
+    if attack_mode == "bruteforce":
+        return Keyspace(charset, max_length)
+    if attack_mode == "mask":
+        return MaskKeyspace(options["mask"], options.get("custom_charsets"),
+                            options.get("increment", False), options.get("min_length", 1))
+    if attack_mode == "dictionary":
+        rules = load_rules(options["rules"]) if options.get("rules") else None
+        return WordlistKeyspace(options["wordlist"], rules)
+    if attack_mode == "hybrid":
+        return HybridKeyspace(options["wordlist"], options["mask"], options.get("custom_charsets"),
+                              options.get("increment", False), options.get("min_length", 1),
+                              options.get("side", "right"))
+    if attack_mode == "markov":
+        # Обучение детерминировано: после перезапуска порядок кандидатов тот же,
+        # и контрольная точка остается верной, пока корпус не изменился
+        corpus = WordlistKeyspace(options["corpus"])
+        words = (word for start, end in corpus.split(1 << 20) for word in corpus.words(start, end))
+        return MarkovKeyspace(MarkovModel.train(words, charset, max_length), max_length)
+    raise ValueError(f"Неизвестный режим атаки: {attack_mode}")
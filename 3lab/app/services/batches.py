@@ -0,0 +1,122 @@
+from typing import Iterator, List, Sequence, Tuple
+
+from app.services.kernels import np
+
+
+class CandidateBatch:
+    """
+    Пачка кандидатов в одном непрерывном буфере
+
+    Кандидат i - байты buffer[offsets[i]:offsets[i + 1]]. Пачка строится
+    без объекта Python на кандидата; ядра хешей берут из нее матрицы
+    кандидатов одной длины (by_length), bytes создаются только для найденных.
+    """
+
+    def __init__(self, buffer: "np.ndarray", offsets: "np.ndarray"):
+        self.buffer = buffer
+        self.offsets = offsets
+
+    @classmethod
+    def from_candidates(cls, candidates: Sequence[bytes]) -> "CandidateBatch":
+        """Пачка из готовых кандидатов (словарь, гибридная атака): один join на пачку"""
+        lengths = np.fromiter((len(candidate) for candidate in candidates), dtype=np.int64,
+                              count=len(candidates))
+        offsets = np.zeros(len(candidates) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(np.frombuffer(b"".join(candidates), dtype=np.uint8), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> bytes:
+        return self.buffer[self.offsets[index]:self.offsets[index + 1]].tobytes()
+
+    def to_list(self) -> List[bytes]:
+        """Кандидаты списком bytes (для форматов, которые проверяют по одному)"""
+        data = self.buffer.tobytes()
+        offsets = self.offsets.tolist()
+        return [data[low:high] for low, high in zip(offsets, offsets[1:])]
+
+    def by_length(self) -> Iterator[Tuple["np.ndarray", "np.ndarray"]]:
+        """
+        Группы кандидатов одной длины
+
+        Yields:
+            (номера кандидатов в пачке, матрица uint8 (кандидаты, длина))
+        """
+        count = len(self)
+        if not count:
+            return
+        lengths = np.diff(self.offsets)
+        first = int(lengths[0])
+        # Обычный случай - все кандидаты одной длины: матрица - тот же буфер
+        if (lengths == first).all():
+            yield np.arange(count), self.buffer[self.offsets[0]:self.offsets[-1]].reshape(count, first)
+            return
+        for length in np.unique(lengths):
+            rows = np.flatnonzero(lengths == length)
+            columns = self.offsets[rows][:, None] + np.arange(length)
+            yield rows, self.buffer[columns]
+
+
+def keyspace_batch(keyspace, start: int, end: int) -> CandidateBatch:
+    """
+    Кандидаты Keyspace с индексами [start, end) одной пачкой
+
+    Смещения внутри блока пространства переводятся в номера символов
+    векторным divmod по основаниям позиций (смешанная система счисления).
+    Если символы позиции одной длины в байтах, столбцы позиции берутся из
+    таблицы символов целиком; иначе байты раскладываются по смещениям строк.
+    """
+    buffers = []
+    offsets = [np.zeros(1, dtype=np.int64)]
+    total = 0
+
+    for positions, low, high in keyspace.blocks(start, end):
+        count = high - low
+        remainder = np.arange(low, high, dtype=np.uint64)
+        digits = []
+        for symbols in reversed(positions):
+            remainder, digit = np.divmod(remainder, np.uint64(len(symbols)))
+            digits.append(digit)
+        digits.reverse()
+
+        tables = []
+        widths = []
+        for symbols in positions:
+            width = max(len(symbol) for symbol in symbols)
+            table = np.zeros((len(symbols), width), dtype=np.uint8)
+            for number, symbol in enumerate(symbols):
+                table[number, :len(symbol)] = np.frombuffer(symbol, dtype=np.uint8)
+            tables.append(table)
+            widths.append(np.fromiter((len(symbol) for symbol in symbols), dtype=np.int64,
+                                      count=len(symbols)))
+
+        if all((width == width[0]).all() for width in widths):
+            # Все кандидаты блока одной длины: матрица из столбцов позиций
+            matrix = (np.hstack([table[digit] for table, digit in zip(tables, digits)])
+                      if positions else np.zeros((count, 0), dtype=np.uint8))
+            buffers.append(matrix.ravel())
+            row_length = matrix.shape[1]
+            offsets.append(total + row_length * np.arange(1, count + 1, dtype=np.int64))
+            total += row_length * count
+            continue
+
+        # Символы разной длины (например, латиница и кириллица в UTF-8)
+        row_widths = [width[digit] for width, digit in zip(widths, digits)]
+        lengths = np.sum(row_widths, axis=0)
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+        buffer = np.zeros(int(ends[-1]), dtype=np.uint8)
+        cursor = starts.copy()
+        for table, digit, row_width in zip(tables, digits, row_widths):
+            for byte in range(table.shape[1]):
+                rows = np.flatnonzero(row_width > byte)
+                buffer[cursor[rows] + byte] = table[digit[rows], byte]
+            cursor += row_width
+        buffers.append(buffer)
+        offsets.append(total + ends)
+        total += int(ends[-1])
+
+    buffer = np.concatenate(buffers) if buffers else np.zeros(0, dtype=np.uint8)
+    return CandidateBatch(buffer, np.concatenate(offsets))
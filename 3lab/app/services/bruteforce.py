@@ -1,27 +1,212 @@
-import hashlib
 import itertools
 import time
-from typing import Generator, Optional
+from typing import Dict, Generator, List, Optional, Tuple
+
+from app.services import kernels
+from app.services.batches import keyspace_batch
+from app.services.formats import get_format
+from app.services.keyspace import Keyspace
+from app.services.progress import (
+    PROGRESS_INTERVAL, OUTCOME_BUDGET_EXCEEDED, OUTCOME_EXHAUSTED, OUTCOME_FOUND,
+    Budget, ProgressClock, estimate_eta
+)
+from app.services.wordlist import WordlistKeyspace, decode_word
+
+
+# Режимы перебора: direct - каждый кандидат хешируется целиком,
+# incremental - состояние хеша общего префикса копируется и дополняется последним символом,
+# kernel - пачки кандидатов одной длины хешируются ядром NumPy (md5, sha1)
+ENUMERATION_MODES = ("direct", "incremental", "kernel")
 
 
 class BruteforceService:
-    def __init__(self, hash_type: str = "md5"):
-        self.hash_type = hash_type.lower()
-        self.hash_functions = {
-            "md5": hashlib.md5,
-            "sha1": hashlib.sha1,
-            "sha256": hashlib.sha256,
-            "sha512": hashlib.sha512
-        }
+    def __init__(self, hash_type: str = "md5", enumeration_mode: str = "direct"):
+        if enumeration_mode not in ENUMERATION_MODES:
+            raise ValueError(f"Неизвестный режим перебора: {enumeration_mode}")
+        # Неизвестный тип хеша - ошибка (ValueError), а не перебор по md5
+        self.format = get_format(hash_type)
+        self.hash_type = self.format.name
+        if enumeration_mode == "kernel" and not kernels.kernel_available(self.hash_type):
+            raise ValueError(f"Режим kernel недоступен для {self.hash_type} (нужен numpy, md5 или sha1)")
+        self.enumeration_mode = enumeration_mode
+        # Конструктор хеша выбирается один раз, а не при каждом вызове
+        # (у форматов без простого дайджеста, например md5crypt, его нет)
+        self.hash_func = self.format.hash_func
+        # Исход последнего прохода bruteforce_many (OUTCOME_*)
+        self.outcome = None
     
     def hash_string(self, text: str) -> str:
         """Хеширует строку выбранным алгоритмом"""
-        if self.hash_type in self.hash_functions:
-            hash_func = self.hash_functions[self.hash_type]
-            return hash_func(text.encode()).hexdigest()
+        return self.hash_func(text.encode()).hexdigest()
+    
+    def hash_bytes(self, data: bytes) -> bytes:
+        """Возвращает бинарный дайджест данных"""
+        return self.hash_func(data).digest()
+    
+    def prepare_targets(self, target_hashes: List[str]):
+        """
+        Разбирает цели один раз на задачу
+        
+        Returns:
+            Для простых дайджестов - множество хешей в бинарном виде,
+            для остальных форматов - цели, сгруппированные по соли и параметрам
+        """
+        if self.format.raw:
+            return frozenset(self.format.parse(target_hash)[1] for target_hash in target_hashes)
+        return self.format.prepare(target_hashes)
+    
+    def search_range(self, target_digest: bytes, keyspace: Keyspace,
+                     start: int, end: int) -> Tuple[Optional[str], int]:
+        """
+        Проверяет кандидатов с индексами [start, end) без перевода в hex (простые дайджесты)
+        
+        Args:
+            target_digest: Целевой хеш в бинарном виде (bytes.fromhex)
+            keyspace: Пространство перебора
+            start: Первый индекс диапазона
+            end: Индекс за последним кандидатом
+        
+        Returns:
+            (найденный пароль или None, количество выполненных попыток)
+        """
+        hits, attempts = self.scan_range({target_digest}, keyspace, start, end, first_only=True)
+        return (hits[0][1] if hits else None), attempts
+    
+    def scan_range(self, targets, keyspace: Keyspace, start: int, end: int,
+                   first_only: bool = False) -> Tuple[List[Tuple[str, str]], int]:
+        """
+        Проверяет кандидатов с индексами [start, end) против множества хешей
+        
+        Args:
+            targets: Цели из prepare_targets
+            keyspace: Пространство перебора
+            start: Первый индекс диапазона
+            end: Индекс за последним кандидатом
+            first_only: Остановиться на первом совпадении
+        
+        Returns:
+            (список пар (нормализованный хеш, пароль), количество выполненных попыток)
+        """
+        # Соленые и итерационные форматы проверяются пачками
+        if not self.format.raw:
+            return self._scan_batch(targets, keyspace, start, end, first_only)
+        # Словарь и гибридная атака сами выдают кандидатов в байтах
+        if hasattr(keyspace, "candidates"):
+            return self._scan_candidates(targets, keyspace, start, end, first_only)
+        if self.enumeration_mode == "incremental":
+            return self._scan_incremental(targets, keyspace, start, end, first_only)
+        # Ядру нужны индексируемые блоки пространства (у марковского перебора свой порядок)
+        if self.enumeration_mode == "kernel" and hasattr(keyspace, "blocks"):
+            return self._scan_kernel(targets, keyspace, start, end, first_only)
+        return self._scan_direct(targets, keyspace, start, end, first_only)
+    
+    def _scan_direct(self, targets, keyspace: Keyspace, start: int, end: int,
+                     first_only: bool) -> Tuple[List[Tuple[str, str]], int]:
+        """Хеширует каждого кандидата целиком"""
+        hash_func = self.hash_func
+        hits = []
+        attempts = 0
+        
+        for prefix, _, tail in keyspace.iter_runs(start, end, as_bytes=True):
+            head = b''.join(prefix)
+            # Позиция в хвосте - из цикла: при повторах символов в charset поиск по значению ошибается
+            for position, symbol in enumerate(tail):
+                digest = hash_func(head + symbol).digest()
+                if digest in targets:
+                    hits.append((digest.hex(), (head + symbol).decode()))
+                    if first_only:
+                        return hits, attempts + position + 1
+            attempts += len(tail)
+        
+        return hits, attempts
+    
+    def _scan_incremental(self, targets, keyspace: Keyspace, start: int, end: int,
+                          first_only: bool) -> Tuple[List[Tuple[str, str]], int]:
+        """Хранит объект хеша для каждой глубины префикса и дописывает только последний символ"""
+        hits = []
+        attempts = 0
+        # states[d] - состояние хеша после первых d символов префикса
+        states = [self.hash_func()]
+        
+        for prefix, changed, tail in keyspace.iter_runs(start, end, as_bytes=True):
+            # Пересчитываем состояния только начиная с измененной позиции
+            del states[changed + 1:]
+            for symbol in prefix[changed:]:
+                state = states[-1].copy()
+                state.update(symbol)
+                states.append(state)
+            
+            prefix_state = states[-1]
+            for position, symbol in enumerate(tail):
+                state = prefix_state.copy()
+                state.update(symbol)
+                digest = state.digest()
+                if digest in targets:
+                    hits.append((digest.hex(), (b''.join(prefix) + symbol).decode()))
+                    if first_only:
+                        return hits, attempts + position + 1
+            attempts += len(tail)
+        
+        return hits, attempts
+    
+    def _scan_kernel(self, targets, keyspace: Keyspace, start: int, end: int,
+                     first_only: bool) -> Tuple[List[Tuple[str, str]], int]:
+        """Строит пачку кандидатов из индексов и хеширует каждую группу одной длины одним вызовом ядра"""
+        kernel = kernels.DIGEST_KERNELS[self.hash_type]
+        batch = keyspace_batch(keyspace, start, end)
+        found = []
+        
+        for rows, matrix in batch.by_length():
+            digests = kernel(matrix)
+            found.extend((int(rows[row]), digests[row].tobytes().hex())
+                         for row in kernels.match_rows(digests, targets))
+        
+        # Группы длин идут не по порядку пачки: совпадения упорядочиваем по номеру кандидата
+        found.sort()
+        hits = [(digest, batch[number].decode()) for number, digest in found]
+        if first_only and hits:
+            return hits[:1], found[0][0] + 1
+        return hits, len(batch)
+    
+    def _scan_candidates(self, targets, keyspace: WordlistKeyspace, start: int, end: int,
+                         first_only: bool) -> Tuple[List[Tuple[str, str]], int]:
+        """Хеширует кандидатов прямо из байтов словаря, str создается только для найденных"""
+        hash_func = self.hash_func
+        hits = []
+        attempts = 0
+        
+        for attempts, candidate in enumerate(keyspace.candidates(start, end), 1):
+            digest = hash_func(candidate).digest()
+            if digest in targets:
+                hits.append((digest.hex(), decode_word(candidate)))
+                if first_only:
+                    return hits, attempts
+        
+        return hits, attempts
+    
+    def _scan_batch(self, targets, keyspace: Keyspace, start: int, end: int,
+                    first_only: bool) -> Tuple[List[Tuple[str, str]], int]:
+        """Собирает кандидатов диапазона в пачку и проверяет ее одним вызовом формата"""
+        # Форматы с пакетным ядром получают пачку из индексов без bytes на кандидата
+        if self.format.packed and hasattr(keyspace, "blocks"):
+            batch = keyspace_batch(keyspace, start, end)
+            hits = [(key, decode_word(candidate))
+                    for key, candidate in self.format.verify_packed(batch, targets)]
+            return (hits[:1] if first_only else hits), len(batch)
+        if hasattr(keyspace, "candidates"):
+            candidates = list(keyspace.candidates(start, end))
         else:
-            # Для RAR/ZIP можно добавить специальную логику
-            return hashlib.md5(text.encode()).hexdigest()
+            candidates = [
+                b''.join(prefix) + symbol
+                for prefix, _, tail in keyspace.iter_runs(start, end, as_bytes=True)
+                for symbol in tail
+            ]
+        
+        hits = [(key, decode_word(candidate))
+                for key, candidate in self.format.verify_batch(candidates, targets)]
+        if first_only:
+            hits = hits[:1]
+        return hits, len(candidates)
     
     def generate_combinations(self, charset: str, max_length: int) -> Generator[str, None, None]:
         """Генерирует все возможные комбинации символов"""
@@ -30,7 +215,8 @@ class BruteforceService:
                 yield ''.join(combination)
     
     def bruteforce(self, target_hash: str, charset: str, max_length: int, 
-                   progress_callback=None) -> Optional[str]:
+                   progress_callback=None, workers: int = 1,
+                   budget: Optional[Budget] = None) -> Optional[str]:
         """
         Выполняет брутфорс атаку
         
@@ -39,38 +225,112 @@ class BruteforceService:
             charset: Набор символов для перебора
             max_length: Максимальная длина пароля
             progress_callback: Функция для отчета о прогрессе
+            workers: Количество процессов (1 - в текущем процессе, 0 - по числу ядер)
+            budget: Ограничение по времени и числу кандидатов (исход - в self.outcome)
         
         Returns:
             Найденный пароль или None
         """
+        found = self.bruteforce_many([target_hash], charset, max_length,
+                                     progress_callback, workers=workers, budget=budget)
+        return found.get(self.format.normalize(target_hash))
+    
+    def bruteforce_many(self, target_hashes: List[str], charset: str, max_length: int,
+                        progress_callback=None, found_callback=None, workers: int = 1,
+                        start_index: int = 0, checkpoint_callback=None,
+                        checkpoint_interval: float = 30,
+                        progress_interval: float = PROGRESS_INTERVAL,
+                        budget: Optional[Budget] = None) -> Dict[str, str]:
+        """
+        Проверяет один проход по пространству против множества хешей
+        
+        Args:
+            target_hashes: Список целевых хешей одного алгоритма
+            charset: Набор символов для перебора
+            max_length: Максимальная длина пароля
+            progress_callback: Функция для отчета о прогрессе
+            found_callback: Вызывается для каждого найденного хеша (target_hash, password)
+            workers: Количество процессов (1 - в текущем процессе, 0 - по числу ядер)
+            start_index: Индекс, с которого продолжить перебор (контрольная точка)
+            checkpoint_callback: Вызывается раз в checkpoint_interval секунд (index, attempts, elapsed)
+            checkpoint_interval: Интервал сохранения контрольной точки в секундах
+            progress_interval: Интервал отчетов о прогрессе в секундах
+            budget: Ограничение по времени и числу кандидатов (None - до конца пространства)
+        
+        Returns:
+            Словарь {хеш: пароль} для найденных хешей; исход прохода - в self.outcome
+        """
+        keyspace = Keyspace(charset, max_length)
+        budget = budget or Budget()
+        
+        if workers != 1:
+            # Импорт здесь, чтобы избежать циклического импорта
+            from app.services.engine import ParallelBruteforceEngine
+            engine = ParallelBruteforceEngine(self.hash_type, workers=workers,
+                                              enumeration_mode=self.enumeration_mode)
+            found = engine.run_many(target_hashes, keyspace, progress_callback, found_callback,
+                                    start_index, checkpoint_callback, checkpoint_interval,
+                                    progress_interval, budget)
+            self.outcome = engine.outcome
+            return found
+        
         start_time = time.time()
+        last_checkpoint = start_time
         attempts = 0
-        total_combinations = sum(len(charset) ** i for i in range(1, max_length + 1))
+        total_combinations = keyspace.size
+        targets = self.prepare_targets(target_hashes)
+        target_count = len({self.format.normalize(target_hash) for target_hash in target_hashes})
+        found = {}
         
-        for combination in self.generate_combinations(charset, max_length):
-            attempts += 1
+        # Перебираем отрезками, длину которых подбирает ProgressClock по скорости:
+        # часы читаются между отрезками, а не на каждом кандидате (ядру - кратно пачке)
+        packed = self.enumeration_mode == "kernel" or self.format.packed
+        granularity = kernels.KERNEL_BATCH_SIZE if packed else self.format.batch_size
+        clock = ProgressClock(progress_interval, span=granularity, granularity=granularity)
+        self.outcome = OUTCOME_EXHAUSTED
+        end = start_index
+        while end < total_combinations:
+            # Бюджет проверяется между отрезками, как и часы отчетов
+            if budget.exceeded(time.time() - start_time, attempts):
+                self.outcome = OUTCOME_BUDGET_EXCEEDED
+                break
+            start = end
+            span = clock.span
+            if budget.max_candidates is not None:
+                # Кандидат пространства - одна попытка, последний отрезок не выходит за бюджет
+                span = min(span, budget.max_candidates - attempts)
+            end = min(start + span, total_combinations)
+            hits, chunk_attempts = self.scan_range(targets, keyspace, start, end)
+            attempts += chunk_attempts
             
-            # Вычисляем хеш текущей комбинации
-            current_hash = self.hash_string(combination)
+            # Проверяем совпадения
+            for target_hash, password in hits:
+                if target_hash in found:
+                    continue
+                found[target_hash] = password
+                if found_callback:
+                    found_callback(target_hash=target_hash, password=password)
+            if len(found) == target_count:
+                self.outcome = OUTCOME_FOUND
+                break
+            if not clock.due(chunk_attempts):
+                continue
             
-            # Отчет о прогрессе каждые 1000 попыток
-            if attempts % 1000 == 0 and progress_callback:
-                progress = int((attempts / total_combinations) * 100)
+            if progress_callback:
+                progress = int((end / total_combinations) * 100)
                 elapsed = time.time() - start_time
                 combinations_per_second = int(attempts / elapsed) if elapsed > 0 else 0
                 
                 progress_callback(
                     progress=min(progress, 99),  # Не показываем 100% до завершения
-                    current_combination=combination,
-                    combinations_per_second=combinations_per_second
+                    current_combination=keyspace.candidate_at(end - 1),
+                    combinations_per_second=combinations_per_second,
+                    eta_seconds=estimate_eta(elapsed, end - start_index,
+                                             total_combinations - end, budget, attempts)
                 )
             
-            # Проверяем совпадение
-            if current_hash.lower() == target_hash.lower():
-                return combination
-            
-            # Защита от бесконечного выполнения (максимум 10 минут)
-            if time.time() - start_time > 600:
-                break
+            if checkpoint_callback and time.time() - last_checkpoint >= checkpoint_interval:
+                checkpoint_callback(index=end, attempts=attempts, elapsed=time.time() - start_time)
+                last_checkpoint = time.time()
         
-        return None 
\ No newline at end of file
+        return found
@@ -0,0 +1,98 @@
+import struct
+from multiprocessing import shared_memory
+from typing import Tuple
+
+
+# Заголовок: флаг остановки (байт, выровнен до 8) и счетчик занятых слотов
+_HEADER = struct.Struct("<B7xQ")
+# Счетчик занятых слотов отдельно: занятие слота не переписывает флаг остановки
+_USED = struct.Struct("<Q")
+_USED_OFFSET = 8
+# Слот воркера: выполненные попытки, пройденная часть пространства (в единицах индекса)
+# и индекс последнего проверенного кандидата + 1 (0 - еще нет)
+_SLOT = struct.Struct("<QQQ")
+
+
+class ControlBlock:
+    """
+    Общий блок управления задачей в shared memory
+
+    Координатор создает блок на время прохода, процессы пула подключаются к
+    нему по имени. Воркер сам пишет в свой слот число попыток, пройденную
+    часть пространства и последний проверенный индекс после каждой пачки,
+    координатор читает слоты при опросе - прогресс не требует IPC на каждую
+    попытку. Флаг остановки ставит воркер, нашедший единственную цель, или
+    координатор при отмене; воркеры проверяют его между пачками. Значения
+    8-байтовые и пишутся целиком, для прогресса этого достаточно: точные
+    итоги приходят с результатами диапазонов.
+    """
+
+    def __init__(self, memory: shared_memory.SharedMemory, slots: int, owner: bool):
+        self.memory = memory
+        self.slots = slots
+        self.owner = owner
+        self.slot = None
+
+    @classmethod
+    def create(cls, slots: int) -> "ControlBlock":
+        """Создает обнуленный блок на slots воркеров (вызывает координатор)"""
+        memory = shared_memory.SharedMemory(create=True, size=_HEADER.size + _SLOT.size * slots)
+        memory.buf[:memory.size] = bytes(memory.size)
+        return cls(memory, slots, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, slots: int) -> "ControlBlock":
+        """Подключается к блоку координатора по имени (вызывает процесс пула)"""
+        return cls(shared_memory.SharedMemory(name=name), slots, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def claim_slot(self, lock) -> int:
+        """Занимает свободный слот для текущего процесса; lock - общий замок пула"""
+        with lock:
+            used, = _USED.unpack_from(self.memory.buf, _USED_OFFSET)
+            if used >= self.slots:
+                raise RuntimeError("Нет свободных слотов в блоке управления")
+            _USED.pack_into(self.memory.buf, _USED_OFFSET, used + 1)
+        self.slot = used
+        return used
+
+    def stop(self):
+        """Просит все процессы прекратить перебор"""
+        self.memory.buf[0] = 1
+
+    @property
+    def stopped(self) -> bool:
+        return self.memory.buf[0] != 0
+
+    def report(self, attempts: int, checked: int, last_index: int):
+        """Записывает в слот процесса его суммарные попытки, пройденную часть и последний индекс"""
+        _SLOT.pack_into(self.memory.buf, _HEADER.size + _SLOT.size * self.slot,
+                        attempts, checked, last_index + 1)
+
+    def totals(self) -> Tuple[int, int, int]:
+        """
+        Сводка по всем слотам
+
+        Returns:
+            (суммарные попытки, пройденная часть пространства, наибольший проверенный индекс или -1)
+        """
+        attempts = 0
+        checked = 0
+        last_index = -1
+        for slot in range(self.slots):
+            slot_attempts, slot_checked, slot_last = _SLOT.unpack_from(
+                self.memory.buf, _HEADER.size + _SLOT.size * slot
+            )
+            attempts += slot_attempts
+            checked += slot_checked
+            last_index = max(last_index, slot_last - 1)
+        return attempts, checked, last_index
+
+    def close(self):
+        """Отключается от блока; координатор также удаляет его"""
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
@@ -0,0 +1,337 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Optional, Tuple
+
+from app.services import kernels
+from app.services.bruteforce import BruteforceService
+from app.services.control import ControlBlock
+from app.services.formats import get_format
+from app.services.keyspace import Keyspace
+from app.services.progress import (
+    PROGRESS_INTERVAL, OUTCOME_BUDGET_EXCEEDED, OUTCOME_EXHAUSTED, OUTCOME_FOUND,
+    Budget, estimate_eta
+)
+from app.services.targets import TargetIndex, DEFAULT_FP_RATE
+from app.services.wordlist import WordlistKeyspace
+
+
+# Размер диапазона индексов, который получает воркер за один раз
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Как часто воркер проверяет флаг остановки и обновляет свой слот (в попытках)
+STOP_CHECK_INTERVAL = 2048
+
+# Для медленных форматов диапазон воркера - столько пачек verify_batch
+CHUNK_BATCHES = 32
+
+# Как часто координатор проверяет отмену и читает счетчики блока управления (секунды)
+CANCEL_POLL_INTERVAL = 0.2
+
+# Начиная с этого количества хешей цели хранятся в общем файле с фильтром Блума
+INDEX_THRESHOLD = 100_000
+
+# Блок управления задачей, счетчики процесса, целевые хеши и пространство (задаются в initializer)
+_control = None
+_worker_attempts = 0
+_worker_checked = 0
+_targets = None
+_keyspace = None
+
+
+def _init_worker(control_name: str, slots: int, lock, targets, keyspace: Keyspace):
+    """
+    Инициализация процесса пула: подключаемся к блоку управления, сохраняем цели и пространство
+
+    Пространство передается один раз на процесс, а не с каждым диапазоном: у
+    марковского и гибридного пространства восстановление из pickle строит таблицы заново.
+    """
+    global _control, _worker_attempts, _worker_checked, _targets, _keyspace
+    _control = ControlBlock.attach(control_name, slots)
+    _control.claim_slot(lock)
+    _worker_attempts = _worker_checked = 0
+    _targets = targets
+    _keyspace = keyspace
+
+
+def _search_range(hash_type: str, enumeration_mode: str,
+                  start: int, end: int, first_only: bool) -> Tuple[List[Tuple[str, str]], int]:
+    """
+    Проверяет диапазон индексов в процессе пула
+
+    Returns:
+        (список пар (нормализованный хеш, пароль), количество выполненных попыток)
+    """
+    global _worker_attempts, _worker_checked
+    service = BruteforceService(hash_type, enumeration_mode)
+    hits = []
+    attempts = 0
+    # Медленные форматы проверяют пачки меньше интервала остановки,
+    # ядра NumPy - пачками, на которых окупаются их накладные расходы
+    if enumeration_mode == "kernel" or service.format.packed:
+        step = kernels.KERNEL_BATCH_SIZE
+    else:
+        step = min(STOP_CHECK_INTERVAL, service.format.batch_size)
+
+    for part_start in range(start, end, step):
+        # Цель найдена другим процессом или задача остановлена - диапазон не нужен
+        if _control.stopped:
+            break
+        part_end = min(part_start + step, end)
+        part_hits, part_attempts = service.scan_range(
+            _targets, _keyspace, part_start, part_end, first_only
+        )
+        hits.extend(part_hits)
+        attempts += part_attempts
+        _worker_attempts += part_attempts
+        _worker_checked += part_end - part_start
+        _control.report(_worker_attempts, _worker_checked, part_end - 1)
+        if part_hits and first_only:
+            _control.stop()
+            break
+
+    return hits, attempts
+
+
+class ParallelBruteforceEngine:
+    """Многопроцессный брутфорс с разбиением пространства на диапазоны индексов"""
+
+    def __init__(self, hash_type: str = "md5", workers: int = 0,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, enumeration_mode: str = "direct",
+                 index_threshold: int = INDEX_THRESHOLD, fp_rate: float = DEFAULT_FP_RATE,
+                 start_method: Optional[str] = None):
+        self.format = get_format(hash_type)
+        self.hash_type = self.format.name
+        self.enumeration_mode = enumeration_mode
+        self.workers = workers or os.cpu_count() or 1
+        # Диапазон медленного формата (md5crypt, PBKDF2) проверяется секундами, а не минутами
+        self.chunk_size = min(chunk_size, self.format.batch_size * CHUNK_BATCHES)
+        self.index_threshold = index_threshold
+        self.fp_rate = fp_rate
+        # Способ запуска процессов пула (fork, spawn, forkserver), None - по умолчанию для ОС
+        self.start_method = start_method
+        self._cancelled = threading.Event()
+        # Исход последнего прохода run_many (OUTCOME_*), None - проход отменен
+        self.outcome = None
+
+    def cancel(self):
+        """Останавливает выполнение из другого потока"""
+        self._cancelled.set()
+
+    def run(self, target_hash: str, keyspace: Keyspace,
+            progress_callback=None, budget: Optional[Budget] = None) -> Optional[str]:
+        """
+        Выполняет брутфорс в пуле процессов
+
+        Args:
+            target_hash: Целевой хеш для взлома
+            keyspace: Пространство перебора
+            progress_callback: Функция для отчета о суммарном прогрессе
+            budget: Ограничение по времени и числу кандидатов (исход - в self.outcome)
+
+        Returns:
+            Найденный пароль или None
+        """
+        found = self.run_many([target_hash], keyspace, progress_callback, budget=budget)
+        return found.get(self.format.normalize(target_hash))
+
+    def run_many(self, target_hashes: List[str], keyspace: Keyspace,
+                 progress_callback=None, found_callback=None, start_index: int = 0,
+                 checkpoint_callback=None, checkpoint_interval: float = 30,
+                 progress_interval: float = PROGRESS_INTERVAL,
+                 budget: Optional[Budget] = None) -> Dict[str, str]:
+        """
+        Выполняет один проход по пространству против множества хешей
+
+        Args:
+            target_hashes: Список целевых хешей одного алгоритма
+            keyspace: Пространство перебора
+            progress_callback: Функция для отчета о суммарном прогрессе
+            found_callback: Вызывается для каждого найденного хеша (target_hash, password)
+            start_index: Индекс, с которого продолжить перебор (контрольная точка)
+            checkpoint_callback: Вызывается раз в checkpoint_interval секунд (index, attempts, elapsed)
+            checkpoint_interval: Интервал сохранения контрольной точки в секундах
+            progress_interval: Интервал отчетов о прогрессе в секундах
+            budget: Ограничение по времени и числу кандидатов (None - до конца пространства)
+
+        Returns:
+            Словарь {хеш: пароль} для найденных хешей; исход прохода - в self.outcome
+        """
+        start_time = time.time()
+        self.outcome = None
+        targets = BruteforceService(self.hash_type).prepare_targets(target_hashes)
+        target_count = len({self.format.normalize(target_hash) for target_hash in target_hashes})
+        # Для одного хеша воркеры останавливаются сами на первом совпадении
+        first_only = target_count == 1
+
+        # Большие списки не копируем в каждый процесс: воркеры открывают общий файл
+        index = None
+        if self.format.raw and target_count >= self.index_threshold:
+            descriptor, index_path = tempfile.mkstemp(suffix=".tidx")
+            os.close(descriptor)
+            index = TargetIndex.build(index_path, targets, self.fp_rate)
+            targets = index
+
+        try:
+            return self._run_pool(targets, target_count, keyspace, first_only, progress_callback,
+                                  found_callback, start_time, start_index,
+                                  checkpoint_callback, checkpoint_interval, progress_interval,
+                                  budget or Budget())
+        finally:
+            if index:
+                index.close()
+                os.remove(index.path)
+
+    def _run_pool(self, targets, target_count: int, keyspace: Keyspace, first_only: bool,
+                  progress_callback, found_callback, start_time: float, start_index: int,
+                  checkpoint_callback, checkpoint_interval: float,
+                  progress_interval: float, budget: Budget) -> Dict[str, str]:
+        """Раздает диапазоны пространства пулу процессов и собирает результаты"""
+        ranges = keyspace.split(self.chunk_size, start_index)
+        found = {}
+
+        context = multiprocessing.get_context(self.start_method)
+        control = ControlBlock.create(self.workers)
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                     initializer=_init_worker,
+                                     initargs=(control.name, self.workers, context.Lock(),
+                                               targets, keyspace)) as pool:
+                self._dispatch(pool, control, ranges, keyspace, first_only, target_count,
+                               found, found_callback, progress_callback, start_time,
+                               start_index, checkpoint_callback, checkpoint_interval,
+                               progress_interval, budget)
+        finally:
+            control.close()
+
+        return found
+
+    def _dispatch(self, pool, control: ControlBlock, ranges, keyspace: Keyspace,
+                  first_only: bool, target_count: int, found: Dict[str, str],
+                  found_callback, progress_callback, start_time: float, start_index: int,
+                  checkpoint_callback, checkpoint_interval: float, progress_interval: float,
+                  budget: Budget):
+        """
+        Цикл координатора: держит очередь диапазонов и собирает найденные хеши
+
+        Прогресс берется из блока управления раз в progress_interval секунд,
+        а не по завершении диапазонов: процессы сами обновляют свои счетчики.
+        По тем же счетчикам при каждом опросе проверяется бюджет задачи.
+        """
+        total_combinations = keyspace.size
+        attempts = 0
+        self.outcome = OUTCOME_EXHAUSTED
+        # Бюджет по кандидатам ограничивает и сами диапазоны, если индекс - номер кандидата:
+        # в очередь не попадает больше, чем осталось. У словаря индекс - смещение в байтах,
+        # там бюджет проверяется только по счетчикам попыток
+        search_end = total_combinations
+        if budget.max_candidates is not None and not isinstance(keyspace, WordlistKeyspace):
+            search_end = min(total_combinations, start_index + budget.max_candidates)
+
+        # Диапазоны завершаются не по порядку: контрольная точка - граница,
+        # до которой все диапазоны уже проверены
+        frontier = start_index
+        completed = {}
+        last_checkpoint = start_time
+        last_report = start_time
+
+        def submit_next() -> bool:
+            next_range = next(ranges, None)
+            if next_range is None or next_range[0] >= search_end:
+                return False
+            next_range = (next_range[0], min(next_range[1], search_end))
+            future = pool.submit(_search_range, self.hash_type, self.enumeration_mode,
+                                 *next_range, first_only)
+            pending[future] = next_range
+            return True
+
+        def collect(future) -> int:
+            """Забирает найденные хеши завершенного диапазона, возвращает его попытки"""
+            hits, range_attempts = future.result()
+            for target_hash, password in hits:
+                if target_hash in found:
+                    continue
+                found[target_hash] = password
+                if found_callback:
+                    found_callback(target_hash=target_hash, password=password)
+            return range_attempts
+
+        # Держим в очереди не больше двух диапазонов на воркер
+        pending = {}
+        for _ in range(self.workers * 2):
+            if not submit_next():
+                break
+
+        while pending:
+            done, _ = wait(pending, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                range_start, range_end = pending.pop(future)
+                attempts += collect(future)
+                completed[range_start] = range_end
+
+            # Счетчики процессов читаются из общей памяти, даже если диапазон еще не завершен
+            live_attempts, live_checked, last_index = control.totals()
+            elapsed = time.time() - start_time
+
+            while frontier in completed:
+                frontier = completed.pop(frontier)
+
+            # Все хеши найдены, задача отменена или исчерпан бюджет, а пространство до
+            # границы еще не пройдено - останавливаем процессы
+            if len(found) == target_count:
+                self.outcome = OUTCOME_FOUND
+            elif self._cancelled.is_set():
+                self.outcome = None
+            elif frontier < search_end and budget.exceeded(elapsed, live_attempts):
+                self.outcome = OUTCOME_BUDGET_EXCEEDED
+            if self.outcome != OUTCOME_EXHAUSTED:
+                control.stop()
+                for future in pending:
+                    future.cancel()
+                if self.outcome == OUTCOME_BUDGET_EXCEEDED:
+                    # Счетчики в общей памяти опережают результаты диапазонов: найденное
+                    # в уже проверенных пачках еще в пути, поэтому дожидаемся процессов
+                    wait(pending)
+                    for future in pending:
+                        if not future.cancelled():
+                            attempts += collect(future)
+                    if len(found) == target_count:
+                        self.outcome = OUTCOME_FOUND
+                    elif control.totals()[1] >= search_end - start_index:
+                        # Бюджет исчерпан ровно на последнем кандидате до границы
+                        self.outcome = OUTCOME_EXHAUSTED
+                        frontier = search_end
+                break
+
+            if checkpoint_callback and time.time() - last_checkpoint >= checkpoint_interval:
+                checkpoint_callback(index=frontier, attempts=attempts,
+                                    elapsed=time.time() - start_time)
+                last_checkpoint = time.time()
+
+            if (progress_callback and last_index >= 0
+                    and time.time() - last_report >= progress_interval):
+                last_report = time.time()
+                checked = start_index + live_checked
+                progress = int((checked / total_combinations) * 100)
+                combinations_per_second = int(live_attempts / elapsed) if elapsed > 0 else 0
+
+                progress_callback(
+                    progress=min(progress, 99),  # Не показываем 100% до завершения
+                    current_combination=keyspace.candidate_at(last_index),
+                    combinations_per_second=combinations_per_second,
+                    # Пройденное и оставшееся - в единицах индекса (у словаря байты),
+                    # бюджет по кандидатам учитывается по числу попыток
+                    eta_seconds=estimate_eta(elapsed, live_checked, search_end - checked,
+                                             budget, live_attempts)
+                )
+
+            for _ in done:
+                submit_next()
+
+        # Пройдены все диапазоны до границы бюджета, но не все пространство
+        if (self.outcome == OUTCOME_EXHAUSTED and frontier < total_combinations
+                and budget.exceeded(time.time() - start_time, attempts)):
+            self.outcome = OUTCOME_BUDGET_EXCEEDED
@@ -0,0 +1,383 @@
+import base64
+import binascii
+import hashlib
+import os
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.services import kernels
+from app.services.batches import CandidateBatch
+
+
+# Сколько кандидатов проверяется за один вызов verify_batch по умолчанию
+DEFAULT_BATCH_SIZE = 2048
+
+_HEX_PREFIX = "$HEX["
+
+# Алфавит crypt: md5crypt кодирует хеш и соль им, а не стандартным base64
+_CRYPT_ALPHABET = b"./0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+
+
+def decode_salt(value: str) -> bytes:
+    """Соль из строки хеша: как есть (UTF-8) или $HEX[...] для произвольных байтов"""
+    if value.startswith(_HEX_PREFIX) and value.endswith("]"):
+        return bytes.fromhex(value[len(_HEX_PREFIX):-1])
+    return value.encode()
+
+
+def encode_salt(salt: bytes) -> str:
+    """Записывает соль так, чтобы decode_salt вернул те же байты"""
+    try:
+        text = salt.decode()
+    except UnicodeDecodeError:
+        text = None
+    if text is not None and text.isprintable() and ":" not in text and not text.startswith(_HEX_PREFIX):
+        return text
+    return f"{_HEX_PREFIX}{salt.hex()}]"
+
+
+class HashFormat:
+    """
+    Формат хеша: разбор строки цели и пакетная проверка кандидатов
+
+    prepare разбирает все цели задачи один раз и группирует их по параметрам
+    (соль, число итераций), verify_batch проверяет пачку кандидатов против
+    всех групп - в процессе пула за один вызов, а не по кандидату.
+    Ключ найденной цели - нормализованная строка хеша (normalize).
+    """
+
+    name = ""
+    # Простой дайджест без соли: перебор идет быстрыми циклами BruteforceService
+    raw = False
+    # Кандидатов на один вызов verify_batch: меньше для медленных форматов,
+    # чтобы воркеры чаще проверяли флаг остановки
+    batch_size = DEFAULT_BATCH_SIZE
+    # Сколько полей через двоеточие занимает хеш (hash:salt - два)
+    fields = 1
+    # Формат проверяет пачку CandidateBatch целиком (verify_packed), без bytes на кандидата
+    packed = False
+    hash_func: Optional[Callable] = None
+
+    def parse(self, target: str):
+        """Разбирает строку хеша, ValueError - если она не в этом формате"""
+        raise NotImplementedError
+
+    def normalize(self, target: str) -> str:
+        """Каноническая запись хеша: ключ в результатах, potfile и БД"""
+        return target.strip()
+
+    def prepare(self, target_hashes: Sequence[str]) -> Dict:
+        """Группирует цели: {параметры группы: {проверочное значение: ключ цели}}"""
+        groups: Dict = {}
+        for target_hash in target_hashes:
+            params, expected = self.parse(target_hash)
+            groups.setdefault(params, {})[expected] = self.normalize(target_hash)
+        return groups
+
+    def compute(self, password: bytes, params) -> bytes:
+        """Проверочное значение пароля для группы целей"""
+        raise NotImplementedError
+
+    def verify_batch(self, candidates: Sequence[bytes], targets: Dict) -> List[Tuple[str, bytes]]:
+        """Проверяет пачку кандидатов против всех целей, возвращает [(ключ цели, кандидат)]"""
+        hits = []
+        for params, expected in targets.items():
+            compute = self.compute
+            for candidate in candidates:
+                key = expected.get(compute(candidate, params))
+                if key is not None:
+                    hits.append((key, candidate))
+        return hits
+
+    def verify_packed(self, batch, targets: Dict) -> List[Tuple[str, bytes]]:
+        """Как verify_batch, но для пачки CandidateBatch (app/services/batches.py)"""
+        return self.verify_batch(batch.to_list(), targets)
+
+    def encode(self, password: bytes, salt: Optional[bytes] = None) -> str:
+        """Строка хеша пароля в этом формате (для демо-хешей)"""
+        raise NotImplementedError
+
+
+class RawFormat(HashFormat):
+    """Несоленый дайджест в hex: md5, sha1, sha256, sha512"""
+
+    raw = True
+
+    def __init__(self, name: str, hash_func: Callable):
+        self.name = name
+        self.hash_func = hash_func
+        self.digest_size = hash_func().digest_size
+
+    def normalize(self, target: str) -> str:
+        return target.strip().lower()
+
+    def parse(self, target: str):
+        try:
+            digest = bytes.fromhex(target.strip())
+        except ValueError:
+            raise ValueError(f"Хеш {self.name} должен быть в hex")
+        if len(digest) != self.digest_size:
+            raise ValueError(f"Хеш {self.name} должен быть длиной {self.digest_size * 2} символов")
+        return None, digest
+
+    def compute(self, password: bytes, params) -> bytes:
+        return self.hash_func(password).digest()
+
+    def encode(self, password: bytes, salt: Optional[bytes] = None) -> str:
+        return self.hash_func(password).hexdigest()
+
+
+class SaltedFormat(RawFormat):
+    """
+    Дайджест с солью в формате hash:salt
+
+    salt_first=False - hash(пароль + соль) (md5_salt), True - hash(соль + пароль) (salt_md5).
+    Соль с двоеточием или непечатаемыми байтами записывается как $HEX[...].
+    """
+
+    raw = False
+    fields = 2
+
+    def __init__(self, name: str, hash_func: Callable, salt_first: bool):
+        super().__init__(name, hash_func)
+        self.salt_first = salt_first
+
+    def normalize(self, target: str) -> str:
+        digest, salt = self._split(target)
+        return f"{digest.lower()}:{encode_salt(salt)}"
+
+    def _split(self, target: str) -> Tuple[str, bytes]:
+        digest, separator, salt = target.strip().partition(":")
+        if not separator:
+            raise ValueError(f"Хеш {self.name} записывается как hash:salt")
+        return digest, decode_salt(salt)
+
+    def parse(self, target: str):
+        digest, salt = self._split(target)
+        return salt, super().parse(digest)[1]
+
+    def compute(self, password: bytes, salt: bytes) -> bytes:
+        if self.salt_first:
+            return self.hash_func(salt + password).digest()
+        return self.hash_func(password + salt).digest()
+
+    def verify_batch(self, candidates: Sequence[bytes], targets: Dict) -> List[Tuple[str, bytes]]:
+        hits = []
+        hash_func = self.hash_func
+        for salt, expected in targets.items():
+            if self.salt_first:
+                # Состояние хеша соли считается один раз на пачку
+                salted = hash_func(salt)
+                for candidate in candidates:
+                    state = salted.copy()
+                    state.update(candidate)
+                    key = expected.get(state.digest())
+                    if key is not None:
+                        hits.append((key, candidate))
+            else:
+                for candidate in candidates:
+                    key = expected.get(hash_func(candidate + salt).digest())
+                    if key is not None:
+                        hits.append((key, candidate))
+        return hits
+
+    def encode(self, password: bytes, salt: Optional[bytes] = None) -> str:
+        salt = salt if salt is not None else os.urandom(4).hex().encode()
+        return f"{self.compute(password, salt).hex()}:{encode_salt(salt)}"
+
+
+class NtlmFormat(HashFormat):
+    """
+    NTLM: MD4 от пароля в UTF-16LE, 32 hex-символа
+
+    MD4 нет в hashlib многих сборок OpenSSL, поэтому хеш считается в
+    app/services/kernels.py: пачкой на NumPy (строки одной длины - столбцы uint32),
+    без NumPy - по одному кандидату на чистом Python.
+    """
+
+    name = "ntlm"
+    packed = kernels.KERNELS_AVAILABLE
+
+    def normalize(self, target: str) -> str:
+        return target.strip().lower()
+
+    def parse(self, target: str):
+        try:
+            digest = bytes.fromhex(target.strip())
+        except ValueError:
+            raise ValueError("Хеш ntlm должен быть в hex")
+        if len(digest) != 16:
+            raise ValueError("Хеш ntlm должен быть длиной 32 символа")
+        return None, digest
+
+    def compute(self, password: bytes, params) -> bytes:
+        return kernels.ntlm(password)
+
+    def verify_batch(self, candidates: Sequence[bytes], targets: Dict) -> List[Tuple[str, bytes]]:
+        if not kernels.KERNELS_AVAILABLE:
+            return super().verify_batch(candidates, targets)
+        return self.verify_packed(CandidateBatch.from_candidates(candidates), targets)
+
+    def verify_packed(self, batch, targets: Dict) -> List[Tuple[str, bytes]]:
+        hits = []
+        for expected in targets.values():
+            hits.extend(kernels.ntlm_batch(batch, expected))
+        return hits
+
+    def encode(self, password: bytes, salt: Optional[bytes] = None) -> str:
+        return kernels.ntlm(password).hex()
+
+
+def md5crypt(password: bytes, salt: bytes, magic: bytes = b"$1$") -> bytes:
+    """Хеш md5crypt (FreeBSD/Linux $1$): 22 символа алфавита crypt"""
+    salt = salt[:8]
+    final = hashlib.md5(password + salt + password).digest()
+    state = hashlib.md5(password + magic + salt)
+    for length in range(len(password), 0, -16):
+        state.update(final[:min(16, length)])
+    length = len(password)
+    while length:
+        state.update(b"\0" if length & 1 else password[:1])
+        length >>= 1
+    final = state.digest()
+
+    for round_number in range(1000):
+        data = password if round_number & 1 else final
+        if round_number % 3:
+            data += salt
+        if round_number % 7:
+            data += password
+        data += final if round_number & 1 else password
+        final = hashlib.md5(data).digest()
+
+    result = bytearray()
+    for first, second, third in ((0, 6, 12), (1, 7, 13), (2, 8, 14), (3, 9, 15), (4, 10, 5)):
+        value = (final[first] << 16) | (final[second] << 8) | final[third]
+        for _ in range(4):
+            result.append(_CRYPT_ALPHABET[value & 0x3f])
+            value >>= 6
+    value = final[11]
+    for _ in range(2):
+        result.append(_CRYPT_ALPHABET[value & 0x3f])
+        value >>= 6
+    return bytes(result)
+
+
+class Md5CryptFormat(HashFormat):
+    """md5crypt: $1$соль$хеш, 1000 раундов md5"""
+
+    name = "md5crypt"
+    batch_size = 64
+
+    def parse(self, target: str):
+        parts = target.strip().split("$")
+        if len(parts) != 4 or parts[0] or parts[1] != "1" or len(parts[3]) != 22:
+            raise ValueError("Хеш md5crypt записывается как $1$salt$hash")
+        return parts[2].encode()[:8], parts[3].encode()
+
+    def compute(self, password: bytes, salt: bytes) -> bytes:
+        return md5crypt(password, salt)
+
+    def encode(self, password: bytes, salt: Optional[bytes] = None) -> str:
+        if salt is None:
+            salt = bytes(_CRYPT_ALPHABET[byte & 0x3f] for byte in os.urandom(8))
+        return f"$1${salt.decode()}${md5crypt(password, salt).decode()}"
+
+
+def _ab64_decode(value: str) -> bytes:
+    """Base64 passlib: '.' вместо '+', без выравнивания '='"""
+    value = value.replace(".", "+")
+    return base64.b64decode(value + "=" * (-len(value) % 4))
+
+
+def _ab64_encode(data: bytes) -> str:
+    return base64.b64encode(data).decode().rstrip("=").replace("+", ".")
+
+
+class Pbkdf2Format(HashFormat):
+    """
+    PBKDF2-HMAC в двух распространенных записях:
+
+        $pbkdf2-sha256$итерации$соль$хеш      (passlib, base64 с '.' и без '=')
+        pbkdf2_sha256$итерации$соль$хеш       (Django, соль - текст, хеш - base64)
+
+    Для sha1 passlib пишет $pbkdf2$...
+    """
+
+    batch_size = 16
+
+    def __init__(self, digest: str, default_iterations: int):
+        self.digest = digest
+        self.name = f"pbkdf2-{digest}"
+        self.default_iterations = default_iterations
+        self._passlib_prefix = "pbkdf2" if digest == "sha1" else f"pbkdf2-{digest}"
+        self._django_prefix = f"pbkdf2_{digest}"
+
+    def parse(self, target: str):
+        target = target.strip()
+        try:
+            if target.startswith("$"):
+                _, prefix, iterations, salt, checksum = target.split("$")
+                if prefix != self._passlib_prefix:
+                    raise ValueError
+                salt, checksum = _ab64_decode(salt), _ab64_decode(checksum)
+            else:
+                prefix, iterations, salt, checksum = target.split("$")
+                if prefix != self._django_prefix:
+                    raise ValueError
+                salt, checksum = salt.encode(), base64.b64decode(checksum)
+            iterations = int(iterations)
+        except (ValueError, binascii.Error):
+            raise ValueError(f"Хеш {self.name} записывается как "
+                             f"${self._passlib_prefix}$iterations$salt$hash "
+                             f"или {self._django_prefix}$iterations$salt$hash")
+        if iterations < 1 or not checksum:
+            raise ValueError(f"Некорректные параметры хеша {self.name}")
+        return (salt, iterations, len(checksum)), checksum
+
+    def compute(self, password: bytes, params) -> bytes:
+        salt, iterations, length = params
+        return hashlib.pbkdf2_hmac(self.digest, password, salt, iterations, length)
+
+    def encode(self, password: bytes, salt: Optional[bytes] = None) -> str:
+        salt = salt if salt is not None else os.urandom(16)
+        checksum = hashlib.pbkdf2_hmac(self.digest, password, salt, self.default_iterations)
+        return (f"${self._passlib_prefix}${self.default_iterations}$"
+                f"{_ab64_encode(salt)}${_ab64_encode(checksum)}")
+
+
+# Реестр форматов по имени hash_type
+HASH_FORMATS: Dict[str, HashFormat] = {}
+
+
+def register_format(hash_format: HashFormat):
+    """Добавляет формат в реестр (новые форматы подключаются так же)"""
+    HASH_FORMATS[hash_format.name] = hash_format
+
+
+def get_format(hash_type: str) -> HashFormat:
+    """Формат по имени; неизвестный тип - ошибка, а не молчаливый md5"""
+    hash_format = HASH_FORMATS.get(hash_type.lower())
+    if hash_format is None:
+        raise ValueError(f"Неподдерживаемый тип хеша: {hash_type}")
+    return hash_format
+
+
+def normalize_hash(hash_type: str, target: str) -> str:
+    """Каноническая запись хеша для сравнения и хранения"""
+    return get_format(hash_type).normalize(target)
+
+
+for _name, _hash_func in (("md5", hashlib.md5), ("sha1", hashlib.sha1),
+                          ("sha256", hashlib.sha256), ("sha512", hashlib.sha512)):
+    register_format(RawFormat(_name, _hash_func))
+    register_format(SaltedFormat(f"{_name}_salt", _hash_func, salt_first=False))
+    register_format(SaltedFormat(f"salt_{_name}", _hash_func, salt_first=True))
+register_format(NtlmFormat())
+register_format(Md5CryptFormat())
+# Итерации по умолчанию - только для демо-хешей, у целей число итераций берется из хеша
+register_format(Pbkdf2Format("sha1", 131000))
+register_format(Pbkdf2Format("sha256", 29000))
+register_format(Pbkdf2Format("sha512", 25000))
+
+# Форматы архивов живут в своем модуле и регистрируются при его импорте
+from app.services import archives  # noqa: E402,F401
@@ -0,0 +1,77 @@
+from typing import Dict, Iterator, Optional, Tuple
+
+from app.services.mask import MaskKeyspace
+from app.services.wordlist import LineIndex, WordlistKeyspace, decode_word
+
+
+# С какой стороны слова добавляется маска
+HYBRID_SIDES = ("right", "left")
+
+
+class HybridKeyspace:
+    """
+    Гибридная атака: слово словаря, к которому справа (или слева) дописывается маска
+
+    Номер кандидата = номер слова * размер маски + номер кандидата маски, поэтому
+    пространство делится на диапазоны между процессами и продолжается с контрольной
+    точки так же, как перебор по маске. Слово по номеру находится через LineIndex.
+    """
+
+    def __init__(self, path: str, mask: str, custom_charsets: Optional[Dict[str, str]] = None,
+                 increment: bool = False, min_length: int = 1, side: str = "right"):
+        if side not in HYBRID_SIDES:
+            raise ValueError(f"Неизвестная сторона маски: {side}")
+
+        self.path = path
+        self.side = side
+        self.wordlist = WordlistKeyspace(path)
+        self.mask = MaskKeyspace(mask, custom_charsets, increment, min_length)
+        self.lines = LineIndex(self.wordlist)
+        self.size = len(self.lines) * self.mask.size
+
+    def __reduce__(self):
+        # Индекс строк уже лежит во временном каталоге: процессы только открывают его
+        mask = self.mask
+        return self.__class__, (self.path, mask.mask, mask.custom_charsets,
+                                mask.increment, mask.min_length, self.side)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def split(self, chunk_size: int, start: int = 0) -> Iterator[Tuple[int, int]]:
+        """Разбивает [start, size) на непрерывные диапазоны по chunk_size"""
+        for range_start in range(start, self.size, chunk_size):
+            yield range_start, min(range_start + chunk_size, self.size)
+
+    def candidates(self, start: int, end: int) -> Iterator[bytes]:
+        """Кандидаты с номерами [start, end) в байтах"""
+        end = min(end, self.size)
+        mask_size = self.mask.size
+        number, mask_start = divmod(start, mask_size)
+        right = self.side == "right"
+
+        while start < end:
+            word = self.wordlist.line_at(self.lines[number])
+            mask_end = min(mask_size, mask_start + end - start)
+            for prefix, _, tail in self.mask.iter_runs(mask_start, mask_end, as_bytes=True):
+                head = b"".join(prefix)
+                if right:
+                    base = word + head
+                    for symbol in tail:
+                        yield base + symbol
+                else:
+                    for symbol in tail:
+                        yield head + symbol + word
+
+            start += mask_end - mask_start
+            number += 1
+            mask_start = 0
+
+    def candidate_at(self, index: int) -> str:
+        """Возвращает кандидата с номером index"""
+        if not 0 <= index < self.size:
+            raise IndexError("Индекс за пределами пространства перебора")
+        number, mask_index = divmod(index, self.mask.size)
+        word = decode_word(self.wordlist.line_at(self.lines[number]))
+        suffix = self.mask.candidate_at(mask_index)
+        return word + suffix if self.side == "right" else suffix + word
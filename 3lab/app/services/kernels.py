@@ -0,0 +1,275 @@
+import functools
+import math
+import struct
+from typing import Dict, List, Tuple
+
+# NumPy - необязательная зависимость: без нее форматы считают хеши по одному кандидату
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - зависит от окружения
+    np = None
+
+
+# Доступны ли пакетные ядра на NumPy
+KERNELS_AVAILABLE = np is not None
+
+# Кандидатов на один вызов ядра в режиме перебора kernel: накладные расходы
+# NumPy на операцию окупаются только на тысячах строк
+KERNEL_BATCH_SIZE = 16384
+
+_MD4_INIT = (0x67452301, 0xEFCDAB89, 0x98BADCFE, 0x10325476)
+_MASK = 0xFFFFFFFF
+
+# Порядок слов и сдвиги второго и третьего раундов MD4 (RFC 1320)
+_MD4_ROUND2 = (0, 4, 8, 12, 1, 5, 9, 13, 2, 6, 10, 14, 3, 7, 11, 15)
+_MD4_ROUND3 = (0, 8, 4, 12, 2, 10, 6, 14, 1, 9, 5, 13, 3, 11, 7, 15)
+_MD4_SHIFTS = ((3, 7, 11, 19), (3, 5, 9, 13), (3, 9, 11, 15))
+
+
+def _md4_padding(length: int) -> bytes:
+    """Дополнение MD4 сообщения длины length: 0x80, нули и длина в битах (little-endian)"""
+    return b"\x80" + b"\0" * ((55 - length) % 64) + struct.pack("<Q", length * 8)
+
+
+def md4(data: bytes) -> bytes:
+    """MD4 на чистом Python (hashlib в сборках OpenSSL 3 его часто не дает)"""
+    state = list(_MD4_INIT)
+    message = data + _md4_padding(len(data))
+
+    for offset in range(0, len(message), 64):
+        words = struct.unpack_from("<16I", message, offset)
+        a, b, c, d = state
+        for round_number, (order, constant) in enumerate(((range(16), 0),
+                                                          (_MD4_ROUND2, 0x5A827999),
+                                                          (_MD4_ROUND3, 0x6ED9EBA1))):
+            shifts = _MD4_SHIFTS[round_number]
+            for step, index in enumerate(order):
+                if round_number == 0:
+                    mixed = (b & c) | (~b & d)
+                elif round_number == 1:
+                    mixed = (b & c) | (b & d) | (c & d)
+                else:
+                    mixed = b ^ c ^ d
+                value = (a + mixed + words[index] + constant) & _MASK
+                shift = shifts[step % 4]
+                # Регистры сдвигаются по кругу: следующий шаг изменяет d, затем c и b
+                a, b, c, d = d, ((value << shift) | (value >> (32 - shift))) & _MASK, b, c
+        state = [(x + y) & _MASK for x, y in zip(state, (a, b, c, d))]
+
+    return struct.pack("<4I", *state)
+
+
+def ntlm(password: bytes) -> bytes:
+    """NTLM: MD4 от пароля в UTF-16LE"""
+    return md4(utf16(password))
+
+
+def utf16(candidate: bytes) -> bytes:
+    """Кандидат в UTF-16LE; байты не в UTF-8 расширяются как Latin-1 (как в hashcat)"""
+    try:
+        text = candidate.decode("utf-8")
+    except UnicodeDecodeError:
+        text = candidate.decode("latin-1")
+    return text.encode("utf-16-le")
+
+
+def _rotl(value, shift: int):
+    return (value << shift) | (value >> (32 - shift))
+
+
+def _wrapping(kernel):
+    """Сложение в ядрах - по модулю 2^32: переполнение скаляров uint32 ожидаемо, без предупреждений"""
+    @functools.wraps(kernel)
+    def wrapper(messages):
+        with np.errstate(over="ignore"):
+            return kernel(messages)
+    return wrapper
+
+
+def _message_words(messages: "np.ndarray", big_endian: bool = False) -> list:
+    """
+    Дополняет строки матрицы сообщений одной длины по схеме MD4/MD5/SHA1
+
+    Returns:
+        Слова всех блоков: столбец uint32 для слов с байтами сообщения и скаляр
+        np.uint32 для слов дополнения - у всех строк они одинаковые, и операции
+        со скаляром дешевле операций со столбцом
+    """
+    rows, length = messages.shape
+    total = length + 1 + (55 - length) % 64 + 8
+    padding = bytearray(total)
+    padding[length] = 0x80
+    padding[total - 8:] = (length * 8).to_bytes(8, "big" if big_endian else "little")
+    dtype = ">u4" if big_endian else "<u4"
+
+    message_words = (length + 3) // 4
+    buffer = np.zeros((rows, message_words * 4), dtype=np.uint8)
+    buffer[:, :length] = messages
+    buffer[:, length:] = np.frombuffer(bytes(padding[length:message_words * 4]), dtype=np.uint8)
+    columns = buffer.view(dtype).astype(np.uint32)
+
+    constants = np.frombuffer(bytes(padding), dtype=dtype).astype(np.uint32)
+    return ([columns[:, index] for index in range(message_words)]
+            + [constants[index] for index in range(message_words, total // 4)])
+
+
+@_wrapping
+def md4_batch(messages: "np.ndarray") -> "np.ndarray":
+    """
+    MD4 всех строк матрицы uint8 (строки, длина) за один проход
+
+    Каждая строка - отдельное сообщение, слова строк обрабатываются
+    как столбцы uint32, поэтому шаг раунда - одна операция NumPy на все строки.
+
+    Returns:
+        Матрица uint8 (строки, 16) - дайджесты
+    """
+    words = _message_words(messages)
+    state = [np.full(len(messages), value, dtype=np.uint32) for value in _MD4_INIT]
+
+    for offset in range(0, len(words), 16):
+        block = words[offset:offset + 16]
+        a, b, c, d = state
+        for round_number, (order, constant) in enumerate(((range(16), 0),
+                                                          (_MD4_ROUND2, 0x5A827999),
+                                                          (_MD4_ROUND3, 0x6ED9EBA1))):
+            shifts = _MD4_SHIFTS[round_number]
+            constant = np.uint32(constant)
+            for step, index in enumerate(order):
+                # Те же функции раундов, что в md4, но с меньшим числом операций
+                if round_number == 0:
+                    mixed = d ^ (b & (c ^ d))
+                elif round_number == 1:
+                    mixed = (b & c) | (d & (b | c))
+                else:
+                    mixed = b ^ c ^ d
+                a, b, c, d = d, _rotl(a + mixed + block[index] + constant, shifts[step % 4]), b, c
+        state = [x + y for x, y in zip(state, (a, b, c, d))]
+
+    return np.stack(state, axis=1).astype("<u4").view(np.uint8)
+
+
+# Константы и сдвиги MD5 (RFC 1321)
+_MD5_INIT = (0x67452301, 0xEFCDAB89, 0x98BADCFE, 0x10325476)
+_MD5_K = tuple(int(abs(math.sin(step + 1)) * 2 ** 32) & _MASK for step in range(64))
+_MD5_SHIFTS = (7, 12, 17, 22) * 4 + (5, 9, 14, 20) * 4 + (4, 11, 16, 23) * 4 + (6, 10, 15, 21) * 4
+
+_SHA1_INIT = (0x67452301, 0xEFCDAB89, 0x98BADCFE, 0x10325476, 0xC3D2E1F0)
+
+
+@_wrapping
+def md5_batch(messages: "np.ndarray") -> "np.ndarray":
+    """MD5 всех строк матрицы uint8 (строки, длина), как md4_batch; результат (строки, 16)"""
+    words = _message_words(messages)
+    state = [np.full(len(messages), value, dtype=np.uint32) for value in _MD5_INIT]
+
+    for offset in range(0, len(words), 16):
+        block = words[offset:offset + 16]
+        a, b, c, d = state
+        for step in range(64):
+            if step < 16:
+                mixed, index = d ^ (b & (c ^ d)), step
+            elif step < 32:
+                mixed, index = c ^ (d & (b ^ c)), (5 * step + 1) % 16
+            elif step < 48:
+                mixed, index = b ^ c ^ d, (3 * step + 5) % 16
+            else:
+                mixed, index = c ^ (b | ~d), (7 * step) % 16
+            value = a + mixed + (block[index] + np.uint32(_MD5_K[step]))
+            a, b, c, d = d, b + _rotl(value, _MD5_SHIFTS[step]), b, c
+        state = [x + y for x, y in zip(state, (a, b, c, d))]
+
+    return np.stack(state, axis=1).astype("<u4").view(np.uint8)
+
+
+@_wrapping
+def sha1_batch(messages: "np.ndarray") -> "np.ndarray":
+    """SHA1 всех строк матрицы uint8 (строки, длина); слова big-endian, результат (строки, 20)"""
+    words = _message_words(messages, big_endian=True)
+    state = [np.full(len(messages), value, dtype=np.uint32) for value in _SHA1_INIT]
+
+    for offset in range(0, len(words), 16):
+        schedule = words[offset:offset + 16]
+        for step in range(16, 80):
+            schedule.append(_rotl(schedule[step - 3] ^ schedule[step - 8]
+                                  ^ schedule[step - 14] ^ schedule[step - 16], 1))
+        a, b, c, d, e = state
+        for step in range(80):
+            if step < 20:
+                mixed, constant = d ^ (b & (c ^ d)), 0x5A827999
+            elif step < 40:
+                mixed, constant = b ^ c ^ d, 0x6ED9EBA1
+            elif step < 60:
+                mixed, constant = (b & c) | (d & (b | c)), 0x8F1BBCDC
+            else:
+                mixed, constant = b ^ c ^ d, 0xCA62C1D6
+            value = _rotl(a, 5) + mixed + e + (schedule[step] + np.uint32(constant))
+            a, b, c, d, e = value, a, _rotl(b, 30), c, d
+        state = [x + y for x, y in zip(state, (a, b, c, d, e))]
+
+    return np.stack(state, axis=1).astype(">u4").view(np.uint8)
+
+
+# Пакетные ядра простых дайджестов для режима перебора kernel
+DIGEST_KERNELS = {"md5": md5_batch, "sha1": sha1_batch}
+
+
+def kernel_available(hash_type: str) -> bool:
+    """Есть ли пакетное ядро для типа хеша (и установлен ли NumPy)"""
+    return KERNELS_AVAILABLE and hash_type.lower() in DIGEST_KERNELS
+
+
+def match_rows(digests: "np.ndarray", targets) -> "np.ndarray":
+    """
+    Номера строк матрицы дайджестов (строки, байты), которые есть среди целей
+
+    Для множества или словаря целей первые 8 байт сравниваются векторно через
+    np.isin, полное сравнение - только для совпавших строк. Остальные
+    контейнеры (TargetIndex) проверяются по строке через in.
+    """
+    if isinstance(targets, (set, frozenset, dict)):
+        if not targets:
+            return np.zeros(0, dtype=np.intp)
+        prefixes = np.frombuffer(b"".join(digest[:8] for digest in targets), dtype="<u8")
+        rows = np.flatnonzero(np.isin(np.ascontiguousarray(digests[:, :8]).view("<u8").ravel(),
+                                      prefixes))
+    else:
+        rows = range(len(digests))
+    return np.array([row for row in rows if digests[row].tobytes() in targets], dtype=np.intp)
+
+
+def match_digests(digests: "np.ndarray", targets: Dict[bytes, str]) -> List[Tuple[int, str]]:
+    """Сверяет матрицу дайджестов со словарем целей: [(номер строки, ключ цели)]"""
+    return [(int(row), targets[digests[row].tobytes()]) for row in match_rows(digests, targets)]
+
+
+def ntlm_batch(batch, targets: Dict[bytes, str]) -> List[Tuple[str, bytes]]:
+    """
+    Проверяет пачку кандидатов NTLM ядром md4_batch
+
+    batch - CandidateBatch (app/services/batches.py): кандидаты берутся
+    матрицами одной длины, ASCII-строки переводятся в UTF-16LE векторно
+    (байт и нулевой байт), остальные - по одному кандидату.
+
+    Returns:
+        [(ключ цели, кандидат)]
+    """
+    hits = []
+    wide_groups: Dict[int, List[Tuple[bytes, bytes]]] = {}
+    for rows, matrix in batch.by_length():
+        ascii_rows = (matrix < 0x80).all(axis=1)
+        if not ascii_rows.all():
+            for row in rows[~ascii_rows]:
+                candidate = batch[row]
+                encoded = utf16(candidate)
+                wide_groups.setdefault(len(encoded), []).append((candidate, encoded))
+            rows, matrix = rows[ascii_rows], matrix[ascii_rows]
+        wide = np.zeros((len(matrix), matrix.shape[1] * 2), dtype=np.uint8)
+        wide[:, ::2] = matrix
+        hits.extend((key, batch[rows[row]]) for row, key in match_digests(md4_batch(wide), targets))
+
+    for length, pairs in wide_groups.items():
+        matrix = np.frombuffer(b"".join(encoded for _, encoded in pairs),
+                               dtype=np.uint8).reshape(len(pairs), length)
+        hits.extend((key, pairs[row][0]) for row, key in match_digests(md4_batch(matrix), targets))
+    return hits
@@ -0,0 +1,180 @@
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+
+class Keyspace:
+    """
+    Индексируемое пространство кандидатов над (charset, max_length)
+
+    Порядок кандидатов совпадает с BruteforceService.generate_combinations:
+    сначала все комбинации длины min_length, затем следующей длины и т.д.,
+    внутри длины - как у itertools.product (последняя позиция меняется быстрее).
+    Пространство хранится как набор блоков, где для каждой позиции блока
+    задан свой набор символов, поэтому номер кандидата переводится в символы
+    смешанной системой счисления за O(длины).
+    """
+
+    def __init__(self, charset: str, max_length: int, min_length: int = 1):
+        if not charset:
+            raise ValueError("Набор символов не может быть пустым")
+        if min_length < 1 or max_length < min_length:
+            raise ValueError("Некорректный диапазон длин")
+
+        self.charset = charset
+        self.min_length = min_length
+        self.max_length = max_length
+        self._build([[charset] * length for length in range(min_length, max_length + 1)])
+
+    def __reduce__(self):
+        # Передаем в другие процессы только параметры, таблицы строятся заново
+        return self.__class__, (self.charset, self.max_length, self.min_length)
+
+    def _build(self, blocks: Sequence[Sequence[str]]):
+        """Строит таблицы блоков: для каждой позиции - строка допустимых символов"""
+        self._symbols: List[Tuple[Tuple[str, ...], ...]] = []
+        self._byte_symbols: List[Tuple[Tuple[bytes, ...], ...]] = []
+        self._lookup: List[Tuple[Dict[str, int], ...]] = []
+        self._offsets: List[int] = []
+        self._sizes: List[int] = []
+        self._block_by_length: Dict[int, int] = {}
+
+        total = 0
+        for number, positions in enumerate(blocks):
+            self._symbols.append(tuple(tuple(symbols) for symbols in positions))
+            self._byte_symbols.append(tuple(
+                tuple(symbol.encode() for symbol in symbols) for symbols in positions
+            ))
+            self._lookup.append(tuple(
+                {symbol: digit for digit, symbol in enumerate(symbols)} for symbols in positions
+            ))
+
+            block_size = 1
+            for symbols in positions:
+                block_size *= len(symbols)
+
+            self._offsets.append(total)
+            self._sizes.append(block_size)
+            self._block_by_length.setdefault(len(positions), number)
+            total += block_size
+
+        self.size = total
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """Возвращает (номер блока, смещение внутри блока) для индекса"""
+        if not 0 <= index < self.size:
+            raise IndexError("Индекс за пределами пространства перебора")
+        block = bisect_right(self._offsets, index) - 1
+        return block, index - self._offsets[block]
+
+    def _digits(self, block: int, offset: int) -> List[int]:
+        """Переводит смещение внутри блока в номера символов по позициям"""
+        positions = self._symbols[block]
+        digits = [0] * len(positions)
+        for position in range(len(positions) - 1, -1, -1):
+            offset, digits[position] = divmod(offset, len(positions[position]))
+        return digits
+
+    def candidate_at(self, index: int) -> str:
+        """Возвращает кандидата с номером index"""
+        block, offset = self._locate(index)
+        positions = self._symbols[block]
+        return ''.join(positions[i][d] for i, d in enumerate(self._digits(block, offset)))
+
+    def index_of(self, candidate: str) -> int:
+        """Возвращает номер кандидата (обратно к candidate_at)"""
+        block = self._block_by_length.get(len(candidate))
+        if block is None:
+            raise ValueError("Кандидат не принадлежит пространству перебора")
+
+        offset = 0
+        for position, symbol in enumerate(candidate):
+            lookup = self._lookup[block][position]
+            if symbol not in lookup:
+                raise ValueError("Кандидат не принадлежит пространству перебора")
+            offset = offset * len(lookup) + lookup[symbol]
+        return self._offsets[block] + offset
+
+    def split(self, chunk_size: int, start: int = 0) -> Iterator[Tuple[int, int]]:
+        """Разбивает [start, size) на непрерывные диапазоны по chunk_size"""
+        for range_start in range(start, self.size, chunk_size):
+            yield range_start, min(range_start + chunk_size, self.size)
+
+    def blocks(self, start: int, end: int) -> Iterator[Tuple[Tuple[Tuple[bytes, ...], ...], int, int]]:
+        """
+        Разбивает диапазон [start, end) по блокам пространства
+
+        Yields:
+            (символы позиций блока в байтах, начало и конец смещений внутри блока)
+        """
+        end = min(end, self.size)
+        if start >= end:
+            return
+        block, offset = self._locate(start)
+        while start < end:
+            count = min(self._sizes[block] - offset, end - start)
+            yield self._byte_symbols[block], offset, offset + count
+            start += count
+            block += 1
+            offset = 0
+
+    def iter_runs(self, start: int, end: int, as_bytes: bool = False):
+        """
+        Перебирает диапазон [start, end) сериями с общим префиксом
+
+        Yields:
+            (символы префикса, первая измененная позиция префикса, символы последней позиции)
+
+        Список символов префикса переиспользуется между итерациями.
+        """
+        end = min(end, self.size)
+        if start >= end:
+            return
+
+        table = self._byte_symbols if as_bytes else self._symbols
+        block, offset = self._locate(start)
+        remaining = end - start
+
+        while remaining > 0:
+            positions = table[block]
+            last = positions[-1]
+            base = len(last)
+            digits = self._digits(block, offset)
+            prefix = [positions[i][d] for i, d in enumerate(digits[:-1])]
+            changed = 0
+            low = digits[-1]
+            block_size = self._sizes[block]
+
+            while remaining > 0 and offset < block_size:
+                high = min(base, low + remaining)
+                yield prefix, changed, last[low:high]
+                remaining -= high - low
+                offset += high - low
+                low = 0
+
+                # Увеличиваем "одометр" префикса
+                position = len(prefix) - 1
+                while position >= 0:
+                    digits[position] += 1
+                    if digits[position] < len(positions[position]):
+                        prefix[position] = positions[position][digits[position]]
+                        break
+                    digits[position] = 0
+                    prefix[position] = positions[position][0]
+                    position -= 1
+                changed = max(position, 0)
+
+            block += 1
+            offset = 0
+
+    def iter_range(self, start: int, end: int) -> Iterator[str]:
+        """Лениво перебирает кандидатов с индексами [start, end)"""
+        for prefix, _, tail in self.iter_runs(start, end):
+            head = ''.join(prefix)
+            for symbol in tail:
+                yield head + symbol
+
+    def __iter__(self) -> Iterator[str]:
+        return self.iter_range(0, self.size)
@@ -0,0 +1,268 @@
+import heapq
+import mmap
+import os
+import struct
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.bruteforce import BruteforceService
+from app.services.keyspace import Keyspace
+
+
+# Заголовок таблицы: сигнатура, версия, байт префикса хеша, байт номера кандидата,
+# минимальная и максимальная длина, число записей, тип хеша, длина charset в байтах.
+# За заголовком - charset в UTF-8, затем отсортированные записи фиксированной ширины:
+# префикс хеша (big-endian байты дайджеста) + номер кандидата в Keyspace (big-endian)
+_HEADER = struct.Struct(">4sBBBBBxQ16sH")
+_MAGIC = b"LTBL"
+_VERSION = 1
+
+# Префикс хеша по умолчанию: 5 байт, совпадения префиксов проверяются пересчетом хеша
+DEFAULT_PREFIX_BYTES = 5
+
+# Сколько записей сортируется в памяти за раз при построении
+RUN_SIZE = 1_000_000
+
+TABLE_SUFFIX = ".ltbl"
+
+
+def index_bytes(size: int) -> int:
+    """Сколько байт нужно для номера кандидата в пространстве размера size"""
+    return max(1, (max(size - 1, 1).bit_length() + 7) // 8)
+
+
+def _build_run(hash_type: str, charset: str, max_length: int, min_length: int,
+               prefix_bytes: int, start: int, end: int, path: str) -> str:
+    """Хеширует кандидатов [start, end), сортирует записи и пишет их в файл серии"""
+    keyspace = Keyspace(charset, max_length, min_length)
+    hash_func = BruteforceService(hash_type).hash_func
+    width = index_bytes(keyspace.size)
+    records = []
+    index = start
+    for prefix, _, tail in keyspace.iter_runs(start, end, as_bytes=True):
+        head = b"".join(prefix)
+        for symbol in tail:
+            records.append(hash_func(head + symbol).digest()[:prefix_bytes]
+                           + index.to_bytes(width, "big"))
+            index += 1
+    records.sort()
+    with open(path, "wb") as file:
+        file.write(b"".join(records))
+    return path
+
+
+def read_records(path: str, record_size: int) -> Iterator[bytes]:
+    """Читает записи серии блоками"""
+    block = record_size * 65536
+    with open(path, "rb") as file:
+        while True:
+            data = file.read(block)
+            if not data:
+                return
+            for offset in range(0, len(data), record_size):
+                yield data[offset:offset + record_size]
+
+
+def build_table(path: str, hash_type: str, charset: str, max_length: int, min_length: int = 1,
+                prefix_bytes: int = DEFAULT_PREFIX_BYTES, workers: int = 1,
+                progress_callback=None) -> "LookupTable":
+    """
+    Строит таблицу хеш -> номер кандидата для всего пространства (charset, длины)
+
+    Пространство режется на серии по RUN_SIZE записей, серии хешируются и
+    сортируются в пуле процессов и сливаются в итоговый файл, поэтому память
+    ограничена размером серии, а не таблицы.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    service = BruteforceService(hash_type)
+    if not service.format.raw:
+        raise ValueError(f"Таблицы поиска строятся только для хешей без соли: {hash_type}")
+    keyspace = Keyspace(charset, max_length, min_length)
+    record_size = prefix_bytes + index_bytes(keyspace.size)
+
+    runs = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+            futures = [
+                pool.submit(_build_run, service.hash_type, charset, max_length, min_length,
+                            prefix_bytes, start, end, f"{path}.run{number}")
+                for number, (start, end) in enumerate(keyspace.split(RUN_SIZE))
+            ]
+            for done, future in enumerate(futures, 1):
+                runs.append(future.result())
+                if progress_callback:
+                    progress_callback(done=done, total=len(futures))
+
+        encoded_charset = charset.encode()
+        with open(path, "wb") as file:
+            file.write(_HEADER.pack(_MAGIC, _VERSION, prefix_bytes, index_bytes(keyspace.size),
+                                    min_length, max_length, keyspace.size,
+                                    service.hash_type.encode(), len(encoded_charset)))
+            file.write(encoded_charset)
+            for record in heapq.merge(*(read_records(run, record_size) for run in runs)):
+                file.write(record)
+    finally:
+        for run in runs:
+            os.remove(run)
+
+    return LookupTable(path)
+
+
+class LookupTable:
+    """
+    Таблица хеш -> номер кандидата, отображенная в память
+
+    Поиск - двоичный поиск по префиксу хеша в mmap; у каждой записи с
+    совпавшим префиксом кандидат восстанавливается по номеру и хеш
+    пересчитывается, поэтому урезанный префикс не дает ложных ответов.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, self.prefix_bytes, self.index_bytes, self.min_length, self.max_length,
+         self.count, hash_type, charset_size) = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"Файл {path} не является таблицей поиска")
+
+        self.hash_type = hash_type.rstrip(b"\0").decode()
+        charset_start = _HEADER.size
+        self.charset = self._mmap[charset_start:charset_start + charset_size].decode()
+        self._records_start = charset_start + charset_size
+        self._record_size = self.prefix_bytes + self.index_bytes
+        self.keyspace = Keyspace(self.charset, self.max_length, self.min_length)
+        self._hash_func = BruteforceService(self.hash_type).hash_func
+
+    def covers(self, hash_type: str, charset: str, max_length: int) -> bool:
+        """Покрывает ли таблица все пространство перебора задачи"""
+        return (hash_type.lower() == self.hash_type and self.min_length == 1
+                and max_length <= self.max_length and set(charset) <= set(self.charset))
+
+    def _first(self, prefix: bytes) -> int:
+        """Номер первой записи с префиксом не меньше prefix"""
+        low, high = 0, self.count
+        size = self._record_size
+        start = self._records_start
+        length = self.prefix_bytes
+        while low < high:
+            middle = (low + high) // 2
+            offset = start + middle * size
+            if self._mmap[offset:offset + length] < prefix:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def lookup(self, digest: bytes) -> Optional[str]:
+        """Возвращает пароль для бинарного хеша или None"""
+        prefix = digest[:self.prefix_bytes]
+        number = self._first(prefix)
+        while number < self.count:
+            offset = self._records_start + number * self._record_size
+            record = self._mmap[offset:offset + self._record_size]
+            if record[:self.prefix_bytes] != prefix:
+                break
+            candidate = self.keyspace.candidate_at(int.from_bytes(record[self.prefix_bytes:], "big"))
+            if self._hash_func(candidate.encode()).digest() == digest:
+                return candidate
+            number += 1
+        return None
+
+    def info(self) -> dict:
+        """Описание таблицы для API"""
+        return {
+            "name": os.path.basename(self.path),
+            "hash_type": self.hash_type,
+            "charset": self.charset,
+            "min_length": self.min_length,
+            "max_length": self.max_length,
+            "entries": self.count,
+            "size": len(self._mmap),
+        }
+
+    def close(self):
+        self._mmap.close()
+
+
+class TableRegistry:
+    """
+    Таблицы одного класса из каталога; открытые таблицы кэшируются до изменения файла
+
+    Класс таблицы должен иметь атрибут hash_type и методы lookup и covers.
+    """
+
+    def __init__(self, directory: str, table_class=LookupTable, suffix: str = TABLE_SUFFIX):
+        self.directory = directory
+        self.table_class = table_class
+        self.suffix = suffix
+        self._tables: Dict[str, Tuple[float, LookupTable]] = {}
+
+    def tables(self, hash_type: Optional[str] = None) -> List[LookupTable]:
+        """Таблицы каталога, при необходимости только для одного типа хеша"""
+        if not os.path.isdir(self.directory):
+            return []
+
+        result = []
+        for entry in sorted(os.scandir(self.directory), key=lambda entry: entry.name):
+            if not entry.is_file() or not entry.name.endswith(self.suffix):
+                continue
+            mtime = entry.stat().st_mtime
+            cached = self._tables.get(entry.path)
+            if cached is None or cached[0] != mtime:
+                try:
+                    cached = (mtime, self.table_class(entry.path))
+                except (ValueError, struct.error):
+                    continue  # Недописанный или чужой файл
+                self._tables[entry.path] = cached
+            table = cached[1]
+            if hash_type is None or table.hash_type == hash_type.lower():
+                result.append(table)
+        return result
+
+    def lookup(self, hash_type: str, digest: bytes) -> Optional[str]:
+        """Ищет хеш во всех таблицах этого типа"""
+        for table in self.tables(hash_type):
+            plaintext = table.lookup(digest)
+            if plaintext is not None:
+                return plaintext
+        return None
+
+    def find_covering(self, hash_type: str, charset: str, max_length: int) -> Optional[LookupTable]:
+        """Таблица, покрывающая все пространство задачи, если она есть"""
+        for table in self.tables(hash_type):
+            if table.covers(hash_type, charset, max_length):
+                return table
+        return None
+
+    def resolve(self, hash_type: str, target_hashes: List[str], charset: str,
+                max_length: int) -> Optional[Dict[str, str]]:
+        """
+        Отвечает на задачу перебора по таблице поиска, покрывающей ее пространство
+
+        Returns:
+            None, если такой таблицы нет, иначе {хеш: пароль} для найденных хешей;
+            хеши, которых нет в ответе, гарантированно не лежат в пространстве задачи
+        """
+        table = self.find_covering(hash_type, charset, max_length)
+        if table is None:
+            return None
+
+        allowed = set(charset)
+        found = {}
+        for target_hash in target_hashes:
+            try:
+                digest = bytes.fromhex(target_hash)
+            except ValueError:
+                continue
+            plaintext = table.lookup(digest)
+            # Таблица может быть шире задачи: ответ вне пространства задачи не считается
+            if plaintext is not None and len(plaintext) <= max_length and set(plaintext) <= allowed:
+                found[target_hash.lower()] = plaintext
+        return found
+
+
+# Глобальный реестр таблиц поиска
+lookup_tables = TableRegistry(settings.tables_dir)
@@ -0,0 +1,316 @@
+import math
+from bisect import bisect_right
+from typing import Iterable, Iterator, List, Tuple, Union
+
+
+# Вероятность перехода переводится в целый уровень: floor(-log2 p), не больше MAX_LEVEL.
+# Уровень кандидата - сумма уровней переходов, меньший уровень - более вероятный кандидат
+MAX_LEVEL = 15
+
+# Сглаживание: непоявлявшиеся в корпусе переходы получают малую, но ненулевую вероятность
+SMOOTHING = 0.01
+
+
+class MarkovModel:
+    """
+    Модель переходов символов, своя для каждой позиции: P(символ | предыдущий, позиция)
+
+    levels[позиция][предыдущий][символ] - уровень перехода, где предыдущий символ
+    с номером len(charset) означает начало строки.
+    """
+
+    def __init__(self, charset: str, levels: List[List[List[int]]]):
+        self.charset = charset
+        self.levels = levels
+
+    @classmethod
+    def train(cls, words: Iterable[Union[str, bytes]], charset: str, max_length: int) -> "MarkovModel":
+        """Обучает модель на корпусе; слова с символами вне charset пропускаются"""
+        if not charset:
+            raise ValueError("Набор символов не может быть пустым")
+        charset = "".join(dict.fromkeys(charset))
+        lookup = {symbol: number for number, symbol in enumerate(charset)}
+        start = len(charset)
+        counts = [[[0] * len(charset) for _ in range(len(charset) + 1)] for _ in range(max_length)]
+
+        for word in words:
+            if isinstance(word, bytes):
+                word = word.decode(errors="replace")
+            numbers = [lookup.get(symbol) for symbol in word[:max_length]]
+            if None in numbers:
+                continue
+            previous = start
+            for position, number in enumerate(numbers):
+                counts[position][previous][number] += 1
+                previous = number
+
+        levels = []
+        for position_counts in counts:
+            position_levels = []
+            for row in position_counts:
+                total = sum(row) + SMOOTHING * len(row)
+                position_levels.append([
+                    min(MAX_LEVEL, int(-math.log2((count + SMOOTHING) / total))) for count in row
+                ])
+            levels.append(position_levels)
+        return cls(charset, levels)
+
+
+class MarkovKeyspace:
+    """
+    Пространство кандидатов над (charset, длины) в порядке убывания вероятности по модели
+
+    Внутри каждой длины кандидаты идут "оболочками" по возрастанию суммарного
+    уровня, внутри оболочки - в фиксированном порядке (более вероятные переходы
+    раньше). Каждая строка над charset попадает ровно в одну оболочку, поэтому
+    перебор полный и детерминированный. Число продолжений с заданным остатком
+    уровня считается динамикой, и номер кандидата переводится в строку без
+    перебора - пространство делится на диапазоны и продолжается с контрольной точки.
+    """
+
+    def __init__(self, model: MarkovModel, max_length: int, min_length: int = 1):
+        if min_length < 1 or max_length < min_length:
+            raise ValueError("Некорректный диапазон длин")
+        if max_length > len(model.levels):
+            raise ValueError("Модель обучена на меньшую длину")
+
+        self.model = model
+        self.charset = model.charset
+        self.min_length = min_length
+        self.max_length = max_length
+        self._byte_symbols = tuple(symbol.encode() for symbol in self.charset)
+
+        # Для каждой позиции и предыдущего символа - варианты (символ, уровень) в порядке перебора
+        self._options = [
+            [sorted(range(len(self.charset)), key=lambda number: (row[number], number))
+             for row in position_levels]
+            for position_levels in model.levels
+        ]
+        # Те же варианты, сгруппированные по уровню: серии последней позиции
+        self._groups = []
+        for position_levels, position_options in zip(model.levels, self._options):
+            position_groups = []
+            for row, options in zip(position_levels, position_options):
+                groups = {}
+                for number in options:
+                    groups.setdefault(row[number], []).append(number)
+                position_groups.append(groups)
+            self._groups.append(position_groups)
+
+        self._lengths = []  # (длина, смещения оболочек, уровни оболочек, таблица продолжений)
+        self._offsets = []
+        total = 0
+        for length in range(min_length, max_length + 1):
+            counts = self._count(length)
+            shell_counts = counts[0][len(self.charset)]
+            shells = [level for level, count in enumerate(shell_counts) if count]
+            shell_offsets = []
+            length_total = 0
+            for level in shells:
+                shell_offsets.append(length_total)
+                length_total += shell_counts[level]
+            self._lengths.append((length, shell_offsets, shells, counts))
+            self._offsets.append(total)
+            total += length_total
+        self.size = total
+
+    def __reduce__(self):
+        # Модель - списки чисел, таблицы динамики строятся заново в каждом процессе
+        return self.__class__, (self.model, self.max_length, self.min_length)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _count(self, length: int) -> List[List[List[int]]]:
+        """
+        counts[позиция][предыдущий][остаток] - число продолжений строки длины length
+        с позиции до конца, суммарный уровень которых равен остатку
+        """
+        levels = self.model.levels
+        symbols = len(self.charset)
+        # После последней позиции остается одно (пустое) продолжение с остатком 0
+        following = [[1] for _ in range(symbols + 1)]
+        counts = [None] * length
+        for position in range(length - 1, -1, -1):
+            current = []
+            for previous in range(symbols + 1):
+                row = levels[position][previous]
+                result = [0] * ((length - position) * MAX_LEVEL + 1)
+                for number in range(symbols):
+                    level = row[number]
+                    tail = following[number]
+                    result[level:level + len(tail)] = [
+                        a + b for a, b in zip(result[level:level + len(tail)], tail)
+                    ]
+                current.append(result)
+            counts[position] = current
+            following = current
+        return counts
+
+    def _ways(self, counts, position: int, number: int, remaining: int) -> int:
+        """Число продолжений после выбора символа number на позиции position"""
+        if position + 1 == len(counts):
+            return 1 if remaining == 0 else 0
+        row = counts[position + 1][number]
+        return row[remaining] if 0 <= remaining < len(row) else 0
+
+    def _locate(self, index: int) -> Tuple[int, int, int]:
+        """Возвращает (номер длины, номер оболочки, номер внутри оболочки)"""
+        if not 0 <= index < self.size:
+            raise IndexError("Индекс за пределами пространства перебора")
+        bucket = bisect_right(self._offsets, index) - 1
+        index -= self._offsets[bucket]
+        shell_offsets = self._lengths[bucket][1]
+        shell = bisect_right(shell_offsets, index) - 1
+        return bucket, shell, index - shell_offsets[shell]
+
+    def _descend(self, counts, length: int, rank: int,
+                 numbers: List[int], choices: List[int], remaining: List[int], position: int) -> int:
+        """
+        Выбирает символы позиций [position, length - 1) для кандидата номер rank
+        в оболочке, возвращает номер внутри серии последней позиции
+        """
+        model_levels = self.model.levels
+        start = len(self.charset)
+        for current in range(position, length - 1):
+            previous = numbers[current - 1] if current else start
+            options = self._options[current][previous]
+            for choice, number in enumerate(options):
+                rest = remaining[current] - model_levels[current][previous][number]
+                ways = self._ways(counts, current, number, rest)
+                if rank < ways:
+                    numbers[current] = number
+                    choices[current] = choice
+                    remaining[current + 1] = rest
+                    break
+                rank -= ways
+        return rank
+
+    def _tail(self, length: int, numbers: List[int], remaining: int) -> List[int]:
+        """Символы последней позиции с уровнем, равным остатку, в порядке перебора"""
+        position = length - 1
+        previous = numbers[position - 1] if position else len(self.charset)
+        return self._groups[position][previous].get(remaining, [])
+
+    def index_of(self, candidate: str) -> int:
+        """Возвращает номер кандидата (обратно к candidate_at)"""
+        if not self.min_length <= len(candidate) <= self.max_length:
+            raise ValueError("Кандидат не принадлежит пространству перебора")
+        lookup = {symbol: number for number, symbol in enumerate(self.charset)}
+        if any(symbol not in lookup for symbol in candidate):
+            raise ValueError("Кандидат не принадлежит пространству перебора")
+
+        bucket = len(candidate) - self.min_length
+        length, shell_offsets, shells, counts = self._lengths[bucket]
+        numbers = [lookup[symbol] for symbol in candidate]
+        model_levels = self.model.levels
+
+        previous = len(self.charset)
+        level = 0
+        for position, number in enumerate(numbers):
+            level += model_levels[position][previous][number]
+            previous = number
+
+        # Номер внутри оболочки: сколько продолжений у вариантов, идущих раньше выбранных
+        rank = 0
+        remaining = level
+        previous = len(self.charset)
+        for position, number in enumerate(numbers):
+            row = model_levels[position][previous]
+            for option in self._options[position][previous]:
+                if option == number:
+                    break
+                rank += self._ways(counts, position, option, remaining - row[option])
+            remaining -= row[number]
+            previous = number
+
+        return self._offsets[bucket] + shell_offsets[shells.index(level)] + rank
+
+    def candidate_at(self, index: int) -> str:
+        """Возвращает кандидата с номером index"""
+        for prefix, _, tail in self.iter_runs(index, index + 1):
+            return "".join(prefix) + tail[0]
+
+    def split(self, chunk_size: int, start: int = 0) -> Iterator[Tuple[int, int]]:
+        """Разбивает [start, size) на непрерывные диапазоны по chunk_size"""
+        for range_start in range(start, self.size, chunk_size):
+            yield range_start, min(range_start + chunk_size, self.size)
+
+    def iter_runs(self, start: int, end: int, as_bytes: bool = False):
+        """
+        Перебирает диапазон [start, end) сериями с общим префиксом (как Keyspace.iter_runs)
+
+        Yields:
+            (символы префикса, первая измененная позиция префикса, символы последней позиции)
+        """
+        end = min(end, self.size)
+        if start >= end:
+            return
+
+        symbols = self._byte_symbols if as_bytes else self.charset
+        model_levels = self.model.levels
+        bucket, shell, rank = self._locate(start)
+        left = end - start
+
+        while left > 0:
+            length, _, shells, counts = self._lengths[bucket]
+            level = shells[shell]
+            numbers = [0] * length
+            choices = [0] * length
+            remaining = [0] * length
+            remaining[0] = level
+            rank = self._descend(counts, length, rank, numbers, choices, remaining, 0)
+            prefix = [symbols[number] for number in numbers[:-1]]
+            changed = 0
+
+            while left > 0:
+                tail = self._tail(length, numbers, remaining[length - 1])
+                run = tail[rank:rank + left]
+                yield prefix, changed, tuple(symbols[number] for number in run)
+                left -= len(run)
+                rank = 0
+
+                # Следующий префикс оболочки: ищем самую правую позицию со следующим вариантом
+                position = length - 2
+                while position >= 0:
+                    previous = numbers[position - 1] if position else len(self.charset)
+                    options = self._options[position][previous]
+                    advanced = False
+                    for choice in range(choices[position] + 1, len(options)):
+                        number = options[choice]
+                        rest = remaining[position] - model_levels[position][previous][number]
+                        if self._ways(counts, position, number, rest):
+                            numbers[position] = number
+                            choices[position] = choice
+                            remaining[position + 1] = rest
+                            advanced = True
+                            break
+                    if advanced:
+                        break
+                    position -= 1
+
+                if position < 0:
+                    break  # Оболочка закончилась
+                self._descend(counts, length, 0, numbers, choices, remaining, position + 1)
+                for current in range(position, length - 1):
+                    prefix[current] = symbols[numbers[current]]
+                changed = position
+
+            # Следующая оболочка или следующая длина
+            shell += 1
+            rank = 0
+            if shell == len(shells):
+                bucket += 1
+                shell = 0
+                if bucket == len(self._lengths):
+                    break
+
+    def iter_range(self, start: int, end: int) -> Iterator[str]:
+        """Лениво перебирает кандидатов с индексами [start, end)"""
+        for prefix, _, tail in self.iter_runs(start, end):
+            head = "".join(prefix)
+            for symbol in tail:
+                yield head + symbol
+
+    def __iter__(self) -> Iterator[str]:
+        return self.iter_range(0, self.size)
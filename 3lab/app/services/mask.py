@@ -0,0 +1,110 @@
+import string
+from typing import Dict, List, Optional
+
+from app.services.keyspace import Keyspace
+
+
+# Встроенные классы символов маски (как в hashcat)
+MASK_CLASSES = {
+    "l": string.ascii_lowercase,
+    "u": string.ascii_uppercase,
+    "d": string.digits,
+    "h": "0123456789abcdef",
+    "H": "0123456789ABCDEF",
+    "s": " " + string.punctuation,
+}
+MASK_CLASSES["a"] = MASK_CLASSES["l"] + MASK_CLASSES["u"] + MASK_CLASSES["d"] + MASK_CLASSES["s"]
+
+# Имена пользовательских наборов: ?1 .. ?4
+CUSTOM_CHARSET_NAMES = "1234"
+
+
+def _expand_charset(definition: str) -> str:
+    """Раскрывает классы ?x внутри определения пользовательского набора"""
+    symbols = []
+    position = 0
+    while position < len(definition):
+        symbol = definition[position]
+        if symbol == "?" and position + 1 < len(definition):
+            name = definition[position + 1]
+            if name in MASK_CLASSES:
+                symbols.append(MASK_CLASSES[name])
+            elif name == "?":
+                symbols.append("?")
+            else:
+                raise ValueError(f"Неизвестный класс символов ?{name} в наборе {definition}")
+            position += 2
+        else:
+            symbols.append(symbol)
+            position += 1
+    # Повторы символов дали бы одинаковых кандидатов
+    return "".join(dict.fromkeys("".join(symbols)))
+
+
+def parse_mask(mask: str, custom_charsets: Optional[Dict[str, str]] = None) -> List[str]:
+    """
+    Разбирает маску в список наборов символов по позициям
+
+    ?l ?u ?d ?h ?H ?s ?a - встроенные классы, ?1..?4 - пользовательские наборы,
+    ?? - знак вопроса, любой другой символ - литерал на своей позиции.
+    """
+    custom = {}
+    for name, definition in (custom_charsets or {}).items():
+        if name not in CUSTOM_CHARSET_NAMES:
+            raise ValueError(f"Пользовательский набор должен называться 1-4, получено: {name}")
+        custom[name] = _expand_charset(definition)
+        if not custom[name]:
+            raise ValueError(f"Пользовательский набор ?{name} пуст")
+
+    positions = []
+    index = 0
+    while index < len(mask):
+        symbol = mask[index]
+        if symbol != "?":
+            positions.append(symbol)
+            index += 1
+            continue
+
+        if index + 1 >= len(mask):
+            raise ValueError("Маска не может заканчиваться на ?")
+        name = mask[index + 1]
+        if name in MASK_CLASSES:
+            positions.append(MASK_CLASSES[name])
+        elif name == "?":
+            positions.append("?")
+        elif name in custom:
+            positions.append(custom[name])
+        else:
+            raise ValueError(f"Неизвестный класс символов ?{name}")
+        index += 2
+
+    if not positions:
+        raise ValueError("Маска пуста")
+    return positions
+
+
+class MaskKeyspace(Keyspace):
+    """
+    Пространство кандидатов по маске: на каждой позиции свой набор символов
+
+    При increment=True перебираются и все префиксы маски длиной от
+    min_length, сначала короткие - как при обычном переборе по длинам.
+    """
+
+    def __init__(self, mask: str, custom_charsets: Optional[Dict[str, str]] = None,
+                 increment: bool = False, min_length: int = 1):
+        positions = parse_mask(mask, custom_charsets)
+        if increment and not 1 <= min_length <= len(positions):
+            raise ValueError("Некорректный диапазон длин")
+
+        self.mask = mask
+        self.custom_charsets = dict(custom_charsets or {})
+        self.increment = increment
+        self.min_length = min_length if increment else len(positions)
+        self.max_length = len(positions)
+        self.charset = "".join(dict.fromkeys("".join(positions)))
+        self._build([positions[:length]
+                     for length in range(self.min_length, self.max_length + 1)])
+
+    def __reduce__(self):
+        return self.__class__, (self.mask, self.custom_charsets, self.increment, self.min_length)
@@ -0,0 +1,57 @@
+from typing import Iterable, Iterator, Optional, Tuple
+
+from app.services.formats import get_format
+
+# Формат строки potfile для обмена между установками:
+#     <hash_type>:<хеш>:<пароль>
+# Хеш записывается в каноническом виде формата; у соленых форматов это hash:salt,
+# поэтому число двоеточий в хеше определяется типом хеша.
+# Пароль с переводами строк, непечатаемыми символами или начинающийся
+# с "$HEX[" записывается как $HEX[<hex байтов UTF-8>], как в hashcat.
+
+_HEX_PREFIX = "$HEX["
+
+
+def encode_plaintext(plaintext: str) -> str:
+    """Кодирует пароль для записи в potfile"""
+    if plaintext.isprintable() and not plaintext.startswith(_HEX_PREFIX):
+        return plaintext
+    return f"{_HEX_PREFIX}{plaintext.encode().hex()}]"
+
+
+def decode_plaintext(value: str) -> str:
+    """Декодирует пароль из potfile"""
+    if value.startswith(_HEX_PREFIX) and value.endswith("]"):
+        return bytes.fromhex(value[len(_HEX_PREFIX):-1]).decode()
+    return value
+
+
+def format_entry(hash_type: str, digest: str, plaintext: str) -> str:
+    """Возвращает строку potfile для одного взломанного хеша"""
+    return f"{hash_type}:{get_format(hash_type).normalize(digest)}:{encode_plaintext(plaintext)}"
+
+
+def parse_line(line: str) -> Optional[Tuple[str, str, str]]:
+    """Разбирает строку potfile, возвращает (hash_type, digest, пароль) или None"""
+    line = line.rstrip("\r\n")
+    if not line or line.startswith("#"):
+        return None
+
+    hash_type, _, rest = line.partition(":")
+    hash_format = get_format(hash_type)
+    # Пароль начинается после всех полей хеша и сам может содержать двоеточия
+    parts = rest.split(":", hash_format.fields)
+    if len(parts) != hash_format.fields + 1:
+        raise ValueError(f"Некорректная строка potfile: {line}")
+
+    digest = ":".join(parts[:-1])
+    hash_format.parse(digest)  # Проверяем запись хеша
+    return hash_format.name, hash_format.normalize(digest), decode_plaintext(parts[-1])
+
+
+def parse_lines(lines: Iterable[str]) -> Iterator[Tuple[str, str, str]]:
+    """Разбирает содержимое potfile, пропуская пустые строки и комментарии"""
+    for line in lines:
+        entry = parse_line(line)
+        if entry is not None:
+            yield entry
@@ -0,0 +1,118 @@
+import time
+from typing import Optional
+
+
+# Интервал отчетов о прогрессе по умолчанию (секунды)
+PROGRESS_INTERVAL = 1.0
+
+# Сколько раз за интервал отчета проверяются часы
+CHECKS_PER_INTERVAL = 8
+
+# Во сколько раз отрезок может вырасти за одну проверку (защита от выбросов)
+MAX_GROWTH = 4
+
+# Исходы прохода: найдены все цели, пространство пройдено целиком, исчерпан бюджет задачи
+OUTCOME_FOUND = "FOUND"
+OUTCOME_EXHAUSTED = "EXHAUSTED"
+OUTCOME_BUDGET_EXCEEDED = "BUDGET_EXCEEDED"
+
+
+class ProgressClock:
+    """
+    Отчеты о прогрессе по времени, а не по числу попыток
+
+    Перебор идет отрезками по span кандидатов, часы читаются только между
+    отрезками. После каждого отрезка span пересчитывается по измеренной
+    скорости так, чтобы отрезок занимал interval / CHECKS_PER_INTERVAL секунд:
+    быстрые хеши получают отрезки в сотни тысяч кандидатов, медленные - в
+    единицы пачек. Отчет разрешается раз в interval секунд, поэтому частота
+    записей в БД и WebSocket не зависит от скорости хеша.
+    """
+
+    def __init__(self, interval: float = PROGRESS_INTERVAL, span: int = 1000,
+                 granularity: int = 1, max_span: int = 1 << 22):
+        self.interval = interval
+        # Отрезок кратен granularity (пачке ядра или формата)
+        self.granularity = max(1, granularity)
+        self.max_span = max(max_span, self.granularity)
+        self.span = self._round(span)
+        self.last_check = self.last_report = time.monotonic()
+
+    def _round(self, span: int) -> int:
+        span = min(max(span, self.granularity), self.max_span)
+        return span - span % self.granularity
+
+    def due(self, attempts: int) -> bool:
+        """
+        Отмечает выполненный отрезок и калибрует следующий
+
+        Args:
+            attempts: Сколько кандидатов проверено с прошлого вызова
+
+        Returns:
+            True, если прошло interval секунд с прошлого отчета
+        """
+        now = time.monotonic()
+        spent = now - self.last_check
+        self.last_check = now
+        if attempts > 0:
+            wanted = self.interval / CHECKS_PER_INTERVAL
+            span = int(attempts * wanted / spent) if spent > 0 else self.span * MAX_GROWTH
+            self.span = self._round(min(span, self.span * MAX_GROWTH))
+
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            return True
+        return False
+
+
+class Budget:
+    """
+    Бюджет задачи: время работы и/или число кандидатов (None - без ограничения)
+
+    Ограничения относятся к текущему проходу; при продолжении задачи с
+    контрольной точки передается остаток (remaining).
+    """
+
+    def __init__(self, max_seconds: Optional[float] = None, max_candidates: Optional[int] = None):
+        self.max_seconds = max_seconds
+        self.max_candidates = max_candidates
+
+    def exceeded(self, elapsed: float, attempts: int) -> bool:
+        """Исчерпан ли бюджет после elapsed секунд и attempts проверенных кандидатов"""
+        return ((self.max_seconds is not None and elapsed >= self.max_seconds)
+                or (self.max_candidates is not None and attempts >= self.max_candidates))
+
+    def remaining(self, elapsed: float, attempts: int) -> "Budget":
+        """Бюджет, оставшийся после elapsed секунд и attempts кандидатов"""
+        return Budget(
+            None if self.max_seconds is None else max(self.max_seconds - elapsed, 0.0),
+            None if self.max_candidates is None else max(self.max_candidates - attempts, 0)
+        )
+
+
+def estimate_eta(elapsed: float, done: int, remaining: int, budget: Optional[Budget] = None,
+                 attempts: int = 0) -> Optional[int]:
+    """
+    Оценка оставшегося времени прохода в секундах по измеренной скорости
+
+    Args:
+        elapsed: Секунды, уже потраченные в этом проходе
+        done: Сколько пространства пройдено в этом проходе (в единицах индекса)
+        remaining: Сколько пространства осталось до конца (в тех же единицах)
+        budget: Бюджет задачи - проход закончится не позже его исчерпания
+        attempts: Кандидатов проверено в этом проходе (для бюджета по кандидатам)
+
+    Returns:
+        Секунды до окончания или None, если скорость еще не измерена
+    """
+    if done <= 0 or elapsed <= 0:
+        return None
+    # Единицы индекса у словаря - байты, поэтому оценка идет по доле пространства
+    eta = remaining * elapsed / done
+    if budget is not None:
+        if budget.max_candidates is not None and attempts > 0:
+            eta = min(eta, max(budget.max_candidates - attempts, 0) * elapsed / attempts)
+        if budget.max_seconds is not None:
+            eta = min(eta, max(budget.max_seconds - elapsed, 0.0))
+    return int(eta)
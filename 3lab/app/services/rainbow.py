@@ -0,0 +1,239 @@
+import heapq
+import mmap
+import os
+import struct
+from bisect import bisect_right
+from typing import Callable, Iterator, Optional
+
+from app.core.config import settings
+from app.services.bruteforce import BruteforceService
+from app.services.keyspace import Keyspace
+from app.services.lookup import TableRegistry, read_records
+
+
+# Радужные таблицы строятся только для несоленых быстрых хешей
+RAINBOW_HASH_TYPES = ("md5", "sha1")
+
+# Заголовок: сигнатура, версия, минимальная и максимальная длина, номер таблицы,
+# длина цепочки, число цепочек, тип хеша, длина charset в байтах.
+# За заголовком - charset в UTF-8, затем записи (конец цепочки, начало цепочки),
+# оба - номера кандидатов uint64 big-endian, отсортированные по концу цепочки
+_HEADER = struct.Struct(">4sBBBBIQ16sH")
+_RECORD = struct.Struct(">QQ")
+_MAGIC = b"RTBL"
+_VERSION = 1
+
+DEFAULT_CHAIN_LENGTH = 1000
+
+# Сколько цепочек строит один процесс за раз
+RUN_SIZE = 200_000
+
+RAINBOW_SUFFIX = ".rt"
+
+
+class Reducer:
+    """
+    Функции редукции над индексируемым пространством Keyspace(charset, длины)
+
+    R_i(хеш) = (первые 8 байт хеша + i + номер таблицы * длина цепочки) mod размер,
+    номер переводится в кандидата в том же порядке, что и Keyspace.candidate_at.
+    Разные номера таблиц дают непересекающиеся наборы функций редукции.
+    """
+
+    def __init__(self, hash_type: str, charset: str, max_length: int, min_length: int = 1,
+                 chain_length: int = DEFAULT_CHAIN_LENGTH, table_index: int = 0):
+        if hash_type.lower() not in RAINBOW_HASH_TYPES:
+            raise ValueError(f"Радужные таблицы поддерживают только {', '.join(RAINBOW_HASH_TYPES)}")
+        if chain_length < 1:
+            raise ValueError("Длина цепочки должна быть положительной")
+
+        self.keyspace = Keyspace(charset, max_length, min_length)
+        self.size = self.keyspace.size
+        self.chain_length = chain_length
+        self.base = table_index * chain_length
+        self.hash_func = BruteforceService(hash_type).hash_func
+        self._symbols = tuple(symbol.encode() for symbol in charset)
+        self._radix = len(charset)
+        self._lengths = list(range(min_length, max_length + 1))
+        self._offsets = []
+        total = 0
+        for length in self._lengths:
+            self._offsets.append(total)
+            total += self._radix ** length
+
+    def candidate(self, index: int) -> bytes:
+        """Кандидат с номером index в байтах (как Keyspace.candidate_at)"""
+        block = bisect_right(self._offsets, index) - 1
+        offset = index - self._offsets[block]
+        symbols = self._symbols
+        radix = self._radix
+        result = []
+        for _ in range(self._lengths[block]):
+            offset, digit = divmod(offset, radix)
+            result.append(symbols[digit])
+        return b"".join(reversed(result))
+
+    def reduce(self, digest: bytes, position: int) -> int:
+        """Функция редукции позиции position: хеш -> номер кандидата"""
+        return (int.from_bytes(digest[:8], "big") + position + self.base) % self.size
+
+    def walk(self, index: int, start: int, end: int) -> int:
+        """Проходит цепочку от номера index с позиции start до позиции end"""
+        hash_func = self.hash_func
+        candidate = self.candidate
+        size = self.size
+        base = self.base
+        for position in range(start, end):
+            digest = hash_func(candidate(index)).digest()
+            index = (int.from_bytes(digest[:8], "big") + position + base) % size
+        return index
+
+
+def _build_run(hash_type: str, charset: str, max_length: int, min_length: int,
+               chain_length: int, table_index: int, starts: range, path: str) -> str:
+    """Строит цепочки с заданными началами и пишет отсортированные записи в файл серии"""
+    reducer = Reducer(hash_type, charset, max_length, min_length, chain_length, table_index)
+    records = sorted(
+        _RECORD.pack(reducer.walk(start, 0, chain_length), start) for start in starts
+    )
+    with open(path, "wb") as file:
+        file.write(b"".join(records))
+    return path
+
+
+def build_rainbow_table(path: str, hash_type: str, charset: str, max_length: int,
+                        chains: int, chain_length: int = DEFAULT_CHAIN_LENGTH,
+                        table_index: int = 0, min_length: int = 1, workers: int = 1,
+                        progress_callback: Optional[Callable] = None) -> "RainbowTable":
+    """
+    Строит радужную таблицу из chains цепочек длины chain_length
+
+    Начала цепочек равномерно распределены по пространству. Цепочки строятся
+    сериями в пуле процессов, серии сливаются по концам цепочек. Слившиеся
+    цепочки (с одинаковым концом) сохраняются: до точки слияния они покрывают
+    разных кандидатов. Память таблицы - 16 байт на цепочку, время поиска
+    растет как chain_length².
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    reducer = Reducer(hash_type, charset, max_length, min_length, chain_length, table_index)
+    chains = min(chains, reducer.size)
+    step = reducer.size / chains
+    starts = [int(number * step) for number in range(chains)]
+
+    runs = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+            futures = [
+                pool.submit(_build_run, hash_type.lower(), charset, max_length, min_length,
+                            chain_length, table_index, starts[offset:offset + RUN_SIZE],
+                            f"{path}.run{number}")
+                for number, offset in enumerate(range(0, chains, RUN_SIZE))
+            ]
+            for done, future in enumerate(futures, 1):
+                runs.append(future.result())
+                if progress_callback:
+                    progress_callback(done=done, total=len(futures))
+
+        encoded_charset = charset.encode()
+        with open(path, "wb") as file:
+            file.write(_HEADER.pack(_MAGIC, _VERSION, min_length, max_length, table_index,
+                                    chain_length, chains, hash_type.lower().encode(),
+                                    len(encoded_charset)))
+            file.write(encoded_charset)
+            for record in heapq.merge(*(read_records(run, _RECORD.size) for run in runs)):
+                file.write(record)
+    finally:
+        for run in runs:
+            os.remove(run)
+
+    return RainbowTable(path)
+
+
+class RainbowTable:
+    """
+    Радужная таблица, отображенная в память
+
+    Для каждой позиции цепочки с конца хеш доводится редукциями до конца
+    цепочки, конец ищется двоичным поиском, найденные цепочки проходятся
+    от начала до этой позиции. Ответ проверяется хешем, поэтому ложных
+    срабатываний нет, но таблица покрывает пространство лишь частично.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, self.min_length, self.max_length, self.table_index, self.chain_length,
+         self.count, hash_type, charset_size) = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"Файл {path} не является радужной таблицей")
+
+        self.hash_type = hash_type.rstrip(b"\0").decode()
+        charset_start = _HEADER.size
+        self.charset = self._mmap[charset_start:charset_start + charset_size].decode()
+        self._records_start = charset_start + charset_size
+        self.reducer = Reducer(self.hash_type, self.charset, self.max_length, self.min_length,
+                               self.chain_length, self.table_index)
+
+    def _starts(self, endpoint: int) -> Iterator[int]:
+        """Начала цепочек с концом endpoint"""
+        key = endpoint.to_bytes(8, "big")
+        low, high = 0, self.count
+        start = self._records_start
+        while low < high:
+            middle = (low + high) // 2
+            offset = start + middle * _RECORD.size
+            if self._mmap[offset:offset + 8] < key:
+                low = middle + 1
+            else:
+                high = middle
+        while low < self.count:
+            found_endpoint, chain_start = _RECORD.unpack_from(
+                self._mmap, start + low * _RECORD.size
+            )
+            if found_endpoint != endpoint:
+                break
+            yield chain_start
+            low += 1
+
+    def lookup(self, digest: bytes) -> Optional[str]:
+        """Возвращает пароль для бинарного хеша или None, если его нет в цепочках"""
+        reducer = self.reducer
+        last = self.chain_length
+        for position in range(last - 1, -1, -1):
+            endpoint = reducer.walk(reducer.reduce(digest, position), position + 1, last)
+            for chain_start in self._starts(endpoint):
+                # Проходим цепочку до позиции: совпадение конца может быть ложным
+                index = reducer.walk(chain_start, 0, position)
+                candidate = reducer.candidate(index)
+                if reducer.hash_func(candidate).digest() == digest:
+                    return candidate.decode()
+        return None
+
+    def covers(self, hash_type: str, charset: str, max_length: int) -> bool:
+        """Лежит ли пространство задачи внутри пространства таблицы"""
+        return (hash_type.lower() == self.hash_type and self.min_length == 1
+                and max_length <= self.max_length and set(charset) <= set(self.charset))
+
+    def info(self) -> dict:
+        """Описание таблицы для API"""
+        return {
+            "name": os.path.basename(self.path),
+            "hash_type": self.hash_type,
+            "charset": self.charset,
+            "min_length": self.min_length,
+            "max_length": self.max_length,
+            "table_index": self.table_index,
+            "chain_length": self.chain_length,
+            "chains": self.count,
+            "size": len(self._mmap),
+        }
+
+    def close(self):
+        self._mmap.close()
+
+
+# Глобальный реестр радужных таблиц (тот же каталог, что и у таблиц поиска)
+rainbow_tables = TableRegistry(settings.tables_dir, RainbowTable, RAINBOW_SUFFIX)
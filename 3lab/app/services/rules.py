@@ -0,0 +1,191 @@
+import itertools
+from typing import Callable, Iterable, List, Sequence
+
+from app.services.mask import MASK_CLASSES
+
+
+# Формат правил совместим с hashcat: одно правило на строку, правило - цепочка
+# функций из одного символа с аргументами, пробелы между функциями игнорируются,
+# строки с # - комментарии. Поддерживаемые функции:
+#     :      без изменений          l / u  нижний / верхний регистр
+#     c / C  Заглавная первая / зАГЛАВНЫЕ кроме первой
+#     t      инвертировать регистр   TN     инвертировать регистр символа N
+#     r      развернуть             d      удвоить (слово + слово)
+#     f      отразить (слово + развернутое)
+#     [ / ]  удалить первый / последний символ
+#     $X     дописать X в конец     ^X     дописать X в начало
+#     sXY    заменить все X на Y    @X     удалить все X
+# Позиция N записывается как 0-9, A-Z (10-35).
+# Расширение формата: аргумент $ и ^ вида ?d ?l ?u ?s ... - класс символов маски,
+# правило раскрывается во все варианты ($?d$?d - 100 правил). Литерал ? - это ??.
+
+# Функции без аргументов и с одним/двумя аргументами
+_ARITY = {
+    ":": 0, "l": 0, "u": 0, "c": 0, "C": 0, "t": 0, "r": 0, "d": 0, "f": 0, "[": 0, "]": 0,
+    "T": 1, "$": 1, "^": 1, "@": 1, "s": 2,
+}
+
+
+def _position(symbol: str) -> int:
+    """Позиция символа в правиле: 0-9, затем A-Z"""
+    if symbol.isdigit():
+        return int(symbol)
+    if "A" <= symbol <= "Z":
+        return ord(symbol) - ord("A") + 10
+    raise ValueError(f"Некорректная позиция в правиле: {symbol}")
+
+
+def _toggle_at(position: int) -> Callable[[bytes], bytes]:
+    def toggle(word: bytes) -> bytes:
+        if position >= len(word):
+            return word
+        return word[:position] + word[position:position + 1].swapcase() + word[position + 1:]
+    return toggle
+
+
+def _function(name: str, args: Sequence[str]) -> Callable[[bytes], bytes]:
+    """Возвращает функцию преобразования слова (bytes -> bytes)"""
+    if name == ":":
+        return lambda word: word
+    if name == "l":
+        return bytes.lower
+    if name == "u":
+        return bytes.upper
+    if name == "c":
+        return bytes.capitalize
+    if name == "C":
+        return lambda word: word[:1].lower() + word[1:].upper()
+    if name == "t":
+        return bytes.swapcase
+    if name == "r":
+        return lambda word: word[::-1]
+    if name == "d":
+        return lambda word: word + word
+    if name == "f":
+        return lambda word: word + word[::-1]
+    if name == "[":
+        return lambda word: word[1:]
+    if name == "]":
+        return lambda word: word[:-1]
+
+    encoded = [arg.encode() for arg in args]
+    if name == "T":
+        return _toggle_at(_position(args[0]))
+    if name == "$":
+        return lambda word, suffix=encoded[0]: word + suffix
+    if name == "^":
+        return lambda word, prefix=encoded[0]: prefix + word
+    if name == "@":
+        return lambda word, symbol=encoded[0]: word.replace(symbol, b"")
+    if name == "s":
+        return lambda word, old=encoded[0], new=encoded[1]: word.replace(old, new)
+    raise ValueError(f"Неизвестная функция правила: {name}")
+
+
+def _tokenize(rule: str) -> List[tuple]:
+    """Разбирает правило на функции: [(имя, [варианты аргумента, ...]), ...]"""
+    tokens = []
+    index = 0
+    while index < len(rule):
+        name = rule[index]
+        index += 1
+        if name == " ":
+            continue
+        if name not in _ARITY:
+            raise ValueError(f"Неизвестная функция правила: {name}")
+
+        args = []
+        for _ in range(_ARITY[name]):
+            if index >= len(rule):
+                raise ValueError(f"Не хватает аргумента у функции {name} в правиле {rule}")
+            symbol = rule[index]
+            index += 1
+            # Классы символов раскрываем только у $ и ^
+            if symbol == "?" and name in "$^" and index < len(rule):
+                class_name = rule[index]
+                if class_name in MASK_CLASSES or class_name == "?":
+                    index += 1
+                    args.append("?" if class_name == "?" else MASK_CLASSES[class_name])
+                    continue
+            args.append(symbol)
+        tokens.append((name, args))
+    return tokens
+
+
+def expand_rule(rule: str) -> List[str]:
+    """Раскрывает классы символов в аргументах: '$?d' -> ['$0', ..., '$9']"""
+    variants = []
+    for name, args in _tokenize(rule):
+        # Литерал ? у $ и ^ снова записываем как ??, чтобы он не стал классом
+        escape = name in "$^"
+        variants.append([
+            name + "".join("??" if escape and symbol == "?" else symbol for symbol in combination)
+            for combination in itertools.product(*args)
+        ] if args else [name])
+    return ["".join(parts) for parts in itertools.product(*variants)]
+
+
+def compile_rule(rule: str) -> Callable[[bytes], bytes]:
+    """Собирает правило без классов символов в одну функцию bytes -> bytes"""
+    functions = []
+    for name, args in _tokenize(rule):
+        if any(len(arg) != 1 for arg in args):
+            raise ValueError(f"Правило {rule} содержит класс символов: сначала expand_rule")
+        if name != ":":
+            functions.append(_function(name, args))
+
+    if not functions:
+        return lambda word: word
+    if len(functions) == 1:
+        return functions[0]
+
+    def apply(word: bytes) -> bytes:
+        for function in functions:
+            word = function(word)
+        return word
+    return apply
+
+
+def _normalize_rule(rule: str) -> tuple:
+    """Запись правила без пробелов и пустых функций ':' (':' и 'l :' - это '' и 'l')"""
+    return tuple((name, tuple(args)) for name, args in _tokenize(rule) if name != ":")
+
+
+def dedupe_rules(rules: Iterable[str]) -> List[str]:
+    """
+    Убирает правила, совпадающие с более ранним после нормализации записи
+
+    Сравнивается только текст правила: правила, которые на части слов дают
+    одинаковый результат (например, 's-_' и ':'), на других словах различаются,
+    поэтому остаются. Одинаковые кандидаты одного слова отсеиваются при переборе.
+    Порядок оставшихся правил сохраняется.
+    """
+    unique = []
+    seen = set()
+    for rule in rules:
+        # Компиляция проверяет правило при загрузке, а не в процессах пула
+        compile_rule(rule)
+        key = _normalize_rule(rule)
+        if key not in seen:
+            seen.add(key)
+            unique.append(rule)
+    return unique
+
+
+def parse_rules(lines: Iterable[str]) -> List[str]:
+    """Читает правила: пропускает комментарии, раскрывает классы, убирает дубликаты"""
+    rules = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not line.strip() or line.startswith("#"):
+            continue
+        rules.extend(expand_rule(line))
+    if not rules:
+        raise ValueError("Файл правил не содержит правил")
+    return dedupe_rules(rules)
+
+
+def load_rules(path: str) -> List[str]:
+    """Загружает файл правил"""
+    with open(path, encoding="utf-8") as file:
+        return parse_rules(file)
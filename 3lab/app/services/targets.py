@@ -0,0 +1,126 @@
+import math
+import mmap
+import struct
+from typing import Iterable
+
+
+# Доля ложноположительных срабатываний фильтра Блума по умолчанию
+DEFAULT_FP_RATE = 0.001
+
+# Заголовок файла индекса: сигнатура, размер хеша, число функций фильтра,
+# log2 числа бит фильтра, количество хешей
+_HEADER = struct.Struct("<4sBBBxQ")
+_MAGIC = b"TIDX"
+
+
+def bloom_parameters(count: int, fp_rate: float):
+    """Возвращает (log2 числа бит, число хеш-функций) для заданной доли ложных срабатываний"""
+    count = max(count, 1)
+    bits = -count * math.log(fp_rate) / (math.log(2) ** 2)
+    # Округляем до степени двойки, чтобы вместо деления брать маску
+    bits_log2 = max(math.ceil(math.log2(bits)), 6)
+    hashes = max(1, round((2 ** bits_log2) / count * math.log(2)))
+    return bits_log2, min(hashes, 16)
+
+
+class TargetIndex:
+    """
+    Компактное множество целевых хешей в файле, общем для всех процессов
+
+    Файл содержит битовый массив фильтра Блума и отсортированный список
+    хешей фиксированной ширины. Проверка сначала идет по фильтру, и только
+    при срабатывании - точный двоичный поиск. Файл открывается через mmap
+    только на чтение, поэтому страницы разделяются процессами через кэш ОС,
+    а при передаче в пул процессов сериализуется только путь.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.digest_size, self.hashes, bits_log2, self.count = \
+            _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"Файл {path} не является индексом хешей")
+
+        self._mask = (1 << bits_log2) - 1
+        bloom_start = _HEADER.size
+        self._digests_start = bloom_start + (1 << bits_log2) // 8
+        self._bloom = memoryview(self._mmap)[bloom_start:self._digests_start]
+
+    def __reduce__(self):
+        # В другие процессы передаем только путь к файлу
+        return self.__class__, (self.path,)
+
+    @classmethod
+    def build(cls, path: str, digests: Iterable[bytes],
+              fp_rate: float = DEFAULT_FP_RATE) -> "TargetIndex":
+        """Записывает индекс для набора хешей одного размера и открывает его"""
+        digests = sorted(set(digests))
+        if not digests:
+            raise ValueError("Список хешей пуст")
+        digest_size = len(digests[0])
+        if any(len(digest) != digest_size for digest in digests):
+            raise ValueError("Хеши должны быть одного размера")
+
+        bits_log2, hashes = bloom_parameters(len(digests), fp_rate)
+        mask = (1 << bits_log2) - 1
+        bloom = bytearray((1 << bits_log2) // 8)
+        for digest in digests:
+            for position in cls._positions(digest, hashes, mask):
+                bloom[position >> 3] |= 1 << (position & 7)
+
+        with open(path, "wb") as file:
+            file.write(_HEADER.pack(_MAGIC, digest_size, hashes, bits_log2, len(digests)))
+            file.write(bloom)
+            for digest in digests:
+                file.write(digest)
+
+        return cls(path)
+
+    @staticmethod
+    def _positions(digest: bytes, hashes: int, mask: int):
+        """Позиции бит фильтра: двойное хеширование по частям самого хеша"""
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:16], "little") | 1
+        return ((first + i * second) & mask for i in range(hashes))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, digest: bytes) -> bool:
+        bloom = self._bloom
+        mask = self._mask
+        # Первый бит проверяем отдельно: большинство кандидатов отсеивается на нем
+        first = int.from_bytes(digest[:8], "little")
+        position = first & mask
+        if not bloom[position >> 3] & (1 << (position & 7)):
+            return False
+
+        second = int.from_bytes(digest[8:16], "little") | 1
+        for i in range(1, self.hashes):
+            position = (first + i * second) & mask
+            if not bloom[position >> 3] & (1 << (position & 7)):
+                return False
+        return self._search(digest)
+
+    def _search(self, digest: bytes) -> bool:
+        """Точная проверка двоичным поиском по отсортированным хешам"""
+        size = self.digest_size
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = self._digests_start + middle * size
+            current = self._mmap[offset:offset + size]
+            if current < digest:
+                low = middle + 1
+            elif current > digest:
+                high = middle
+            else:
+                return True
+        return False
+
+    def close(self):
+        self._bloom.release()
+        self._mmap.close()
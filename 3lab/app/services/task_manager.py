@@ -1,12 +1,21 @@
 import asyncio
+import functools
+import json
 import time
 import uuid
-from typing import Dict, Optional, Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Callable, Tuple
 from datetime import datetime
-from app.services.bruteforce import BruteforceService
+from app.services.engine import ParallelBruteforceEngine
+from app.services.attacks import build_keyspace
+from app.services.keyspace import Keyspace
+from app.services.formats import normalize_hash
+from app.services.progress import OUTCOME_BUDGET_EXCEEDED, OUTCOME_EXHAUSTED, OUTCOME_FOUND, Budget
+from app.services.lookup import lookup_tables
 from app.db.database import SessionLocal
 from app.cruds import bruteforce as bruteforce_crud
 from app.schemas.bruteforce import WebSocketMessage
+from app.core.config import settings
 
 
 class TaskManager:
@@ -16,6 +25,10 @@ class TaskManager:
         self.active_tasks: Dict[str, asyncio.Task] = {}
         self.websocket_callbacks: Dict[str, Callable] = {}
         self.pending_messages: Dict[str, list] = {}  # Сообщения для задач без callback
+        # Потоки-координаторы движка: ограничивают число одновременно выполняемых задач
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.max_concurrent_tasks, thread_name_prefix="bruteforce"
+        )
     
     def register_websocket_callback(self, task_id: str, callback: Callable):
         """Регистрирует callback для отправки WebSocket сообщений"""
@@ -52,7 +65,10 @@ class TaskManager:
             print(f"📧 Сообщение сохранено для task {task_id}: {message['status']}")
     
     async def start_bruteforce_task(self, task_id: str, hash_type: str, target_hash: str,
-                                  charset: str, max_length: int, user_id: str = None) -> str:
+                                  charset: str, max_length: int, user_id: str = None,
+                                  enumeration_mode: str = "direct", attack_mode: str = "bruteforce",
+                                  attack_options: dict = None, max_seconds: Optional[float] = None,
+                                  max_candidates: Optional[int] = None) -> str:
         """Запускает задачу брутфорса"""
         
         # Создаем запись в базе данных
@@ -63,27 +79,167 @@ class TaskManager:
                 hash_type=hash_type,
                 target_hash=target_hash,
                 charset=charset,
-                max_length=max_length
+                max_length=max_length,
+                enumeration_mode=enumeration_mode,
+                max_seconds=max_seconds,
+                max_candidates=max_candidates
             )
-            bruteforce_crud.create_task(db, task_id, request, user_id)
+            bruteforce_crud.create_task(db, task_id, request, user_id, attack_mode, attack_options)
+            
+            # Хеш уже взломан ранее - отвечаем сразу из potfile
+            cracked = bruteforce_crud.get_cracked(db, hash_type, target_hash)
+            plaintext = cracked.plaintext if cracked else None
+            outcome = OUTCOME_FOUND
+            if cracked:
+                bruteforce_crud.complete_task(db, task_id, plaintext, "00:00:00", outcome=outcome)
+            else:
+                # Пространство покрыто таблицей поиска - ответ без перебора
+                table_found = self._lookup_tables(hash_type, [target_hash], charset,
+                                                  max_length, attack_mode)
+                if table_found is not None:
+                    plaintext = table_found.get(normalize_hash(hash_type, target_hash),
+                                                "Пароль не найден")
+                    outcome = OUTCOME_FOUND if table_found else OUTCOME_EXHAUSTED
+                    bruteforce_crud.complete_task(db, task_id, plaintext, "00:00:00",
+                                                  found=bool(table_found), outcome=outcome)
         finally:
             db.close()
         
+        if plaintext is not None:
+            completion_message = {
+                "status": "COMPLETED",
+                "task_id": task_id,
+                "result": plaintext,
+                "outcome": outcome,
+                "elapsed_time": "00:00:00"
+            }
+            await self.send_websocket_message(task_id, completion_message)
+            return task_id
+        
         # Запускаем асинхронную задачу
         task = asyncio.create_task(
-            self._bruteforce_worker(task_id, hash_type, target_hash, charset, max_length)
+            self._bruteforce_worker(task_id, hash_type, [target_hash], charset, max_length,
+                                    enumeration_mode, attack_mode=attack_mode,
+                                    attack_options=attack_options)
+        )
+        self.active_tasks[task_id] = task
+        
+        return task_id
+    
+    async def start_batch_task(self, task_id: str, hash_type: str, target_hashes: List[str],
+                               charset: str, max_length: int, user_id: str = None,
+                               enumeration_mode: str = "direct", attack_mode: str = "bruteforce",
+                               attack_options: dict = None, max_seconds: Optional[float] = None,
+                               max_candidates: Optional[int] = None) -> str:
+        """Запускает пакетную задачу: один проход по пространству против списка хешей"""
+        
+        # Создаем запись в базе данных
+        db = SessionLocal()
+        try:
+            from app.schemas.bruteforce import BruteforceBatchRequest
+            request = BruteforceBatchRequest(
+                hash_type=hash_type,
+                target_hashes=target_hashes,
+                charset=charset,
+                max_length=max_length,
+                enumeration_mode=enumeration_mode,
+                max_seconds=max_seconds,
+                max_candidates=max_candidates
+            )
+            bruteforce_crud.create_batch_task(db, task_id, request, user_id,
+                                              attack_mode, attack_options)
+            
+            # Уже взломанные хеши берем из potfile и сразу записываем как найденные
+            known = bruteforce_crud.get_cracked_many(db, hash_type, target_hashes)
+            for target_hash, plaintext in known.items():
+                bruteforce_crud.add_hit(db, task_id, target_hash, plaintext)
+            remaining = [h for h in target_hashes if normalize_hash(hash_type, h) not in known]
+            
+            # Пространство покрыто таблицей поиска - оставшиеся хеши решаются без перебора
+            table_found = self._lookup_tables(hash_type, remaining, charset,
+                                              max_length, attack_mode) if remaining else None
+            if table_found is not None:
+                for target_hash, plaintext in table_found.items():
+                    bruteforce_crud.add_hit(db, task_id, target_hash, plaintext)
+                known.update(table_found)
+                remaining = []
+            
+            result = f"Найдено {len(known)} из {len(target_hashes)}"
+            outcome = OUTCOME_FOUND if len(known) == len(target_hashes) else OUTCOME_EXHAUSTED
+            if not remaining:
+                bruteforce_crud.complete_task(db, task_id, result, "00:00:00", outcome=outcome)
+        finally:
+            db.close()
+        
+        for target_hash, plaintext in known.items():
+            found_message = {
+                "status": "FOUND",
+                "task_id": task_id,
+                "target_hash": target_hash,
+                "result": plaintext
+            }
+            await self.send_websocket_message(task_id, found_message)
+        
+        if not remaining:
+            completion_message = {
+                "status": "COMPLETED",
+                "task_id": task_id,
+                "result": result,
+                "outcome": outcome,
+                "elapsed_time": "00:00:00"
+            }
+            await self.send_websocket_message(task_id, completion_message)
+            return task_id
+        
+        # Запускаем асинхронную задачу только для оставшихся хешей
+        task = asyncio.create_task(
+            self._bruteforce_worker(task_id, hash_type, remaining, charset, max_length,
+                                    enumeration_mode, task_type="batch", attack_mode=attack_mode,
+                                    attack_options=attack_options)
         )
         self.active_tasks[task_id] = task
         
         return task_id
     
-    async def _bruteforce_worker(self, task_id: str, hash_type: str, target_hash: str,
-                               charset: str, max_length: int):
+    def _lookup_tables(self, hash_type: str, target_hashes: List[str], charset: str,
+                       max_length: int, attack_mode: str) -> Optional[Dict[str, str]]:
+        """
+        Ищет хеши в таблице поиска, если она покрывает пространство задачи
+        
+        Двоичный поиск в отображенном в память файле занимает микросекунды,
+        поэтому выполняется прямо в цикле событий.
+        """
+        if attack_mode != "bruteforce":
+            return None
+        try:
+            return lookup_tables.resolve(hash_type, target_hashes, charset, max_length)
+        except (OSError, ValueError) as e:
+            print(f"Ошибка таблицы поиска: {e}")
+            return None
+    
+    async def _bruteforce_worker(self, task_id: str, hash_type: str, target_hashes: List[str],
+                               charset: str, max_length: int, enumeration_mode: str = "direct",
+                               task_type: str = "single", attack_mode: str = "bruteforce",
+                               attack_options: dict = None):
         """Воркер для выполнения брутфорса"""
-        start_time = time.time()
         db = SessionLocal()
         
         try:
+            # Индекс строк словаря для гибридной атаки строится долго - не в цикле событий
+            keyspace = await asyncio.to_thread(
+                build_keyspace, attack_mode, charset, max_length, attack_options
+            )
+            
+            # Продолжаем с контрольной точки (у новой задачи она нулевая)
+            db_task = bruteforce_crud.get_task(db, task_id)
+            start_index = db_task.checkpoint_index or 0
+            start_attempts = db_task.checkpoint_attempts or 0
+            start_time = time.time() - (db_task.checkpoint_elapsed or 0.0)
+            # Бюджет считается за всю задачу: после перезапуска остается его остаток
+            budget = Budget(db_task.max_seconds, db_task.max_candidates).remaining(
+                db_task.checkpoint_elapsed or 0.0, start_attempts
+            )
+            
             # Обновляем статус на STARTED
             bruteforce_crud.start_task(db, task_id)
             
@@ -97,14 +253,12 @@ class TaskManager:
             }
             await self.send_websocket_message(task_id, start_message)
             
-            # Создаем сервис брутфорса
-            bruteforce_service = BruteforceService(hash_type)
-            
-            async def progress_callback(progress: int, current_combination: str, combinations_per_second: int):
+            async def progress_callback(progress: int, current_combination: str, combinations_per_second: int,
+                                        eta_seconds: Optional[int] = None):
                 """Callback для отправки прогресса"""
                 # Обновляем в базе данных
                 bruteforce_crud.update_task_progress(
-                    db, task_id, progress, current_combination, combinations_per_second
+                    db, task_id, progress, current_combination, combinations_per_second, eta_seconds
                 )
                 
                 # Отправляем WebSocket уведомление о прогрессе
@@ -113,13 +267,33 @@ class TaskManager:
                     "task_id": task_id,
                     "progress": progress,
                     "current_combination": current_combination,
-                    "combinations_per_second": combinations_per_second
+                    "combinations_per_second": combinations_per_second,
+                    "eta_seconds": eta_seconds
                 }
                 await self.send_websocket_message(task_id, progress_message)
             
-            # Выполняем брутфорс (адаптируем синхронный метод для async)
-            result = await self._run_bruteforce_async(
-                bruteforce_service, target_hash, charset, max_length, progress_callback
+            async def found_callback(target_hash: str, password: str):
+                """Callback для отчета о каждом найденном хеше"""
+                bruteforce_crud.add_hit(db, task_id, target_hash, password)
+                
+                found_message = {
+                    "status": "FOUND",
+                    "task_id": task_id,
+                    "target_hash": target_hash,
+                    "result": password
+                }
+                await self.send_websocket_message(task_id, found_message)
+            
+            async def checkpoint_callback(index: int, attempts: int, elapsed: float):
+                """Callback для сохранения контрольной точки"""
+                bruteforce_crud.save_checkpoint(db, task_id, index, attempts, elapsed)
+            
+            # Выполняем брутфорс в пуле процессов
+            found, outcome = await self._run_bruteforce_async(
+                hash_type, enumeration_mode, target_hashes, keyspace, progress_callback,
+                found_callback if task_type == "batch" else None,
+                start_index=start_index, start_attempts=start_attempts, start_time=start_time,
+                checkpoint_callback=checkpoint_callback, budget=budget
             )
             
             # Вычисляем время выполнения
@@ -130,18 +304,35 @@ class TaskManager:
             elapsed_time = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
             
             # Обновляем задачу как завершенную
-            found_password = result if result else "Пароль не найден"
-            bruteforce_crud.complete_task(db, task_id, found_password, elapsed_time)
+            if task_type == "batch":
+                # Учитываем и хеши, взятые из potfile при запуске
+                total = len(bruteforce_crud.get_task(db, task_id).target_hash.splitlines())
+                hits = len(bruteforce_crud.get_hits(db, task_id))
+                found_password = f"Найдено {hits} из {total}"
+            elif found:
+                found_password = found[normalize_hash(hash_type, target_hashes[0])]
+            elif outcome == OUTCOME_BUDGET_EXCEEDED:
+                found_password = "Пароль не найден: бюджет задачи исчерпан"
+            else:
+                found_password = "Пароль не найден"
+            bruteforce_crud.complete_task(db, task_id, found_password, elapsed_time,
+                                          found=bool(found), outcome=outcome)
             
             # Отправляем WebSocket уведомление о завершении
             completion_message = {
                 "status": "COMPLETED",
                 "task_id": task_id,
                 "result": found_password,
+                "outcome": outcome,
                 "elapsed_time": elapsed_time
             }
             await self.send_websocket_message(task_id, completion_message)
             
+        except asyncio.CancelledError:
+            # Задача отменена через API: процессы уже остановлены движком
+            bruteforce_crud.cancel_task(db, task_id)
+            raise
+        
         except Exception as e:
             # В случае ошибки
             error_message = {
@@ -158,44 +349,122 @@ class TaskManager:
             if task_id in self.active_tasks:
                 del self.active_tasks[task_id]
     
-    async def _run_bruteforce_async(self, bruteforce_service, target_hash: str, charset: str, 
-                                  max_length: int, progress_callback):
-        """Асинхронная обертка для брутфорса"""
-        start_time = time.time()
-        attempts = 0
-        total_combinations = sum(len(charset) ** i for i in range(1, max_length + 1))
-        
-        for combination in bruteforce_service.generate_combinations(charset, max_length):
-            attempts += 1
-            
-            # Вычисляем хеш текущей комбинации
-            current_hash = bruteforce_service.hash_string(combination)
-            
-            # Отчет о прогрессе чаще для коротких паролей
-            if attempts % 100 == 0:  # Уменьшил с 1000 до 100
-                progress = int((attempts / total_combinations) * 100)
-                elapsed = time.time() - start_time
-                combinations_per_second = int(attempts / elapsed) if elapsed > 0 else 0
+    async def _run_bruteforce_async(self, hash_type: str, enumeration_mode: str,
+                                  target_hashes: List[str], keyspace: Keyspace,
+                                  progress_callback, found_callback=None, start_index: int = 0,
+                                  start_attempts: int = 0, start_time: float = None,
+                                  checkpoint_callback=None,
+                                  budget: Optional[Budget] = None) -> Tuple[Dict[str, str], str]:
+        """
+        Запускает движок брутфорса вне цикла событий, возвращает ({хеш: пароль}, исход)
+        
+        Хеширование выполняется в пуле процессов движка, координатор движка -
+        в отдельном потоке. События прогресса из потока попадают в цикл событий
+        через потокобезопасную очередь, поэтому HTTP и WebSocket запросы не ждут перебора.
+        """
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+        previous_elapsed = time.time() - start_time if start_time else 0.0
+        
+        def emit(kind: str):
+            def callback(**kwargs):
+                loop.call_soon_threadsafe(events.put_nowait, (kind, kwargs))
+            return callback
+        
+        async def on_checkpoint(index: int, attempts: int, elapsed: float):
+            # Учитываем попытки и время до перезапуска
+            await checkpoint_callback(index=index, attempts=start_attempts + attempts,
+                                      elapsed=previous_elapsed + elapsed)
+        
+        engine = ParallelBruteforceEngine(
+            hash_type,
+            workers=settings.bruteforce_workers,
+            enumeration_mode=enumeration_mode,
+            start_method=settings.worker_start_method
+        )
+        run = functools.partial(
+            engine.run_many, target_hashes, keyspace,
+            progress_callback=emit("progress"),
+            found_callback=emit("found") if found_callback else None,
+            start_index=start_index,
+            checkpoint_callback=emit("checkpoint") if checkpoint_callback else None,
+            checkpoint_interval=settings.checkpoint_interval,
+            progress_interval=settings.progress_interval,
+            budget=budget
+        )
+        handlers = {"progress": progress_callback, "found": found_callback, "checkpoint": on_checkpoint}
+        
+        future = loop.run_in_executor(self.executor, run)
+        future.add_done_callback(lambda _: events.put_nowait(("done", None)))
+        
+        try:
+            finished = False
+            while not finished:
+                batch = [await events.get()]
+                while not events.empty():
+                    batch.append(events.get_nowait())
                 
-                await progress_callback(
-                    progress=min(progress, 99),
-                    current_combination=combination,
-                    combinations_per_second=combinations_per_second
+                # Движок сам отчитывается не чаще progress_interval; из накопившихся отчетов
+                # записываем только последний: каждая запись - синхронный коммит в БД
+                last_progress = max(
+                    (i for i, (kind, _) in enumerate(batch) if kind == "progress"), default=None
                 )
-            
-            # Проверяем совпадение
-            if current_hash.lower() == target_hash.lower():
-                return combination
-            
-            # Защита от бесконечного выполнения (максимум 10 минут)
-            if time.time() - start_time > 600:
-                break
-            
-            # Небольшая задержка для имитации работы и возможности переключения задач
-            if attempts % 10 == 0:  # Уменьшил частоту задержек
-                await asyncio.sleep(0.001)
-        
-        return None
+                for i, (kind, kwargs) in enumerate(batch):
+                    if kind == "done":
+                        finished = True
+                    elif kind != "progress" or i == last_progress:
+                        await handlers[kind](**kwargs)
+                
+                # Отдаем управление запросам API между пачками событий
+                await asyncio.sleep(0)
+            return future.result(), engine.outcome
+        except asyncio.CancelledError:
+            # Задача отменена - останавливаем процессы движка
+            engine.cancel()
+            raise
+    
+    async def resume_unfinished_tasks(self) -> List[str]:
+        """Продолжает задачи, прерванные перезапуском, с их контрольных точек"""
+        db = SessionLocal()
+        try:
+            unfinished = bruteforce_crud.get_unfinished_tasks(db)
+            resumed = []
+            for db_task in unfinished:
+                if db_task.task_id in self.active_tasks:
+                    continue
+                
+                # Без контрольной точки и бюджета задача начнется заново и может идти
+                # бесконечно долго - такие задачи не продолжаем автоматически
+                if (db_task.checkpoint_at is None and db_task.max_seconds is None
+                        and db_task.max_candidates is None):
+                    bruteforce_crud.fail_task(
+                        db, db_task.task_id,
+                        "Прервана перезапуском сервера до первой контрольной точки"
+                    )
+                    print(f"⏹️ Задача {db_task.task_id} не продолжена: нет контрольной точки и бюджета")
+                    continue
+                
+                target_hashes = db_task.target_hash.splitlines()
+                task_type = db_task.task_type or "single"
+                if task_type == "batch":
+                    # Уже найденные хеши повторно не ищем
+                    known = {hit.target_hash for hit in bruteforce_crud.get_hits(db, db_task.task_id)}
+                    target_hashes = [h for h in target_hashes if h not in known]
+                
+                task = asyncio.create_task(
+                    self._bruteforce_worker(
+                        db_task.task_id, db_task.hash_type, target_hashes, db_task.charset,
+                        db_task.max_length, db_task.enumeration_mode or "direct",
+                        task_type=task_type, attack_mode=db_task.attack_mode or "bruteforce",
+                        attack_options=json.loads(db_task.attack_options or "{}")
+                    )
+                )
+                self.active_tasks[db_task.task_id] = task
+                resumed.append(db_task.task_id)
+                print(f"♻️ Задача {db_task.task_id} продолжена с индекса {db_task.checkpoint_index or 0}")
+            return resumed
+        finally:
+            db.close()
     
     def get_active_tasks(self) -> Dict[str, asyncio.Task]:
         """Возвращает активные задачи"""
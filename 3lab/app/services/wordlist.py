@@ -0,0 +1,173 @@
+import hashlib
+import mmap
+import os
+import tempfile
+from array import array
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from app.services.rules import compile_rule
+
+
+# Размер блока файла при построении индекса строк
+_INDEX_BLOCK = 16 * 1024 * 1024
+
+
+def decode_word(word: bytes) -> str:
+    """Переводит строку словаря в str: UTF-8, а для других кодировок - latin-1 без потерь"""
+    try:
+        return word.decode()
+    except UnicodeDecodeError:
+        return word.decode("latin-1")
+
+
+class WordlistKeyspace:
+    """
+    Словарь (файл паролей по одному на строку), отображенный в память через mmap
+
+    Индекс пространства - смещение в байтах, поэтому размер равен размеру файла,
+    а прогресс считается по прочитанным байтам точно даже для словарей в гигабайты.
+    Строка принадлежит диапазону, в котором лежит ее первый байт: любое разбиение
+    [0, size) на диапазоны проверяет каждую строку ровно один раз. Пустые строки
+    пропускаются, окончания строк \\r\\n поддерживаются.
+
+    С правилами каждое слово лениво превращается в кандидатов прямо в процессе
+    пула: в другие процессы передаются только путь и текст правил.
+    """
+
+    def __init__(self, path: str, rules: Optional[List[str]] = None):
+        self.path = path
+        self.rules = list(rules) if rules else None
+        self._functions = [compile_rule(rule) for rule in self.rules] if self.rules else None
+        self.size = os.path.getsize(path)
+        if self.size == 0:
+            raise ValueError(f"Словарь {path} пуст")
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __reduce__(self):
+        # В другие процессы передаем только путь: каждый отображает файл сам
+        return self.__class__, (self.path, self.rules)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _line_start(self, offset: int) -> int:
+        """Начало первой строки, начинающейся не раньше offset"""
+        if offset <= 0:
+            return 0
+        if offset >= self.size or self._mmap[offset - 1] == 0x0A:
+            return min(offset, self.size)
+        newline = self._mmap.find(b"\n", offset)
+        return self.size if newline == -1 else newline + 1
+
+    def split(self, chunk_size: int, start: int = 0) -> Iterator[Tuple[int, int]]:
+        """Разбивает [start, size) на диапазоны около chunk_size байт, выровненные по строкам"""
+        range_start = self._line_start(start)
+        while range_start < self.size:
+            range_end = self._line_start(range_start + chunk_size)
+            yield range_start, range_end
+            range_start = range_end
+
+    def words(self, start: int, end: int) -> List[bytes]:
+        """Возвращает строки, начинающиеся в [start, end), без перевода в str"""
+        start = self._line_start(start)
+        end = self._line_start(end)
+        if start >= end:
+            return []
+
+        data = self._mmap[start:end]
+        if b"\r" in data:
+            data = data.replace(b"\r\n", b"\n")
+        # Пустые строки (в том числе после последнего перевода строки) отбрасываем
+        return [word for word in data.split(b"\n") if word]
+
+    def candidates(self, start: int, end: int) -> Iterable[bytes]:
+        """Кандидаты строк, начинающихся в [start, end): слова или результаты правил"""
+        words = self.words(start, end)
+        if self._functions is None:
+            return words
+        return self._expand(words)
+
+    def _expand(self, words: List[bytes]) -> Iterator[bytes]:
+        """Применяет правила к каждому слову, пропуская повторы внутри слова"""
+        functions = self._functions
+        for word in words:
+            seen = set()
+            for function in functions:
+                candidate = function(word)
+                if candidate and candidate not in seen:
+                    seen.add(candidate)
+                    yield candidate
+
+    def line_at(self, offset: int) -> bytes:
+        """Строка, начинающаяся со смещения offset, без перевода строки"""
+        end = self._mmap.find(b"\n", offset)
+        line = self._mmap[offset:self.size if end == -1 else end]
+        return line[:-1] if line.endswith(b"\r") else line
+
+    def candidate_at(self, index: int) -> str:
+        """Возвращает строку словаря, содержащую байт index"""
+        if not 0 <= index < self.size:
+            raise IndexError("Индекс за пределами словаря")
+        return decode_word(self.line_at(self._mmap.rfind(b"\n", 0, index) + 1))
+
+    def close(self):
+        self._mmap.close()
+
+
+class LineIndex:
+    """
+    Смещения непустых строк словаря: слово с номером i читается за O(1)
+
+    Индекс - массив uint64 во временном каталоге, общий для процессов через mmap.
+    Имя файла зависит от пути, размера и времени изменения словаря, поэтому
+    индекс строится один раз и перестраивается после изменения словаря.
+    """
+
+    def __init__(self, wordlist: WordlistKeyspace):
+        self.path = self._index_path(wordlist.path)
+        if not os.path.exists(self.path):
+            self._build(wordlist, self.path)
+        if os.path.getsize(self.path) == 0:
+            raise ValueError(f"Словарь {wordlist.path} не содержит слов")
+
+        with open(self.path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offsets = memoryview(self._mmap).cast("Q")
+        self.count = len(self._offsets)
+
+    @staticmethod
+    def _index_path(path: str) -> str:
+        stat = os.stat(path)
+        key = f"{os.path.realpath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        name = hashlib.sha1(key.encode()).hexdigest()[:16]
+        return os.path.join(tempfile.gettempdir(), f"wordlist-{name}.lines")
+
+    @staticmethod
+    def _build(wordlist: WordlistKeyspace, path: str):
+        """Записывает смещения строк блоками, выровненными по строкам"""
+        offsets = array("Q")
+        position = 0
+        while position < wordlist.size:
+            block_end = wordlist._line_start(position + _INDEX_BLOCK)
+            for line in wordlist._mmap[position:block_end].split(b"\n"):
+                if line and line != b"\r":
+                    offsets.append(position)
+                position += len(line) + 1
+            position = block_end
+
+        # Пишем во временный файл и переименовываем: процессы не увидят недописанный индекс
+        temporary = f"{path}.{os.getpid()}"
+        with open(temporary, "wb") as file:
+            offsets.tofile(file)
+        os.replace(temporary, path)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, number: int) -> int:
+        return self._offsets[number]
+
+    def close(self):
+        self._offsets.release()
+        self._mmap.close()
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Микро-бенчмарки движка брутфорса
+
+Запуск:
+    python benchmark.py hashing
+    python benchmark.py incremental --length 6
+    python benchmark.py markov --corpus wordlists/common.txt --length 6
+    python benchmark.py rainbow --length 4
+    python benchmark.py zip --length 4
+    python benchmark.py ntlm --length 4
+    python benchmark.py kernel --length 5 --limit 1000000
+    python benchmark.py batch --length 6 --limit 1000000
+"""
+
+import argparse
+import hashlib
+import hmac
+import os
+import random
+import statistics
+import tempfile
+import time
+import zlib
+
+from app.services import archives, kernels
+from app.services.batches import keyspace_batch
+from app.services.bruteforce import BruteforceService
+from app.services.keyspace import Keyspace
+from app.services.markov import MarkovKeyspace, MarkovModel
+from app.services.rainbow import build_rainbow_table
+
+ALGORITHMS = ["md5", "sha1", "sha256", "sha512"]
+# Алгоритмы с пакетным ядром NumPy
+DIGEST_ALGORITHMS = ["md5", "sha1"]
+CHARSET = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+
+def legacy_scan(service: BruteforceService, target_hash: str, keyspace: Keyspace) -> int:
+    """Прежний цикл: str -> encode -> hexdigest -> lower() на каждой попытке"""
+    attempts = 0
+    for combination in keyspace:
+        attempts += 1
+        current_hash = service.hash_string(combination)
+        if current_hash.lower() == target_hash.lower():
+            break
+    return attempts
+
+
+def measure(func, *args) -> float:
+    """Возвращает кандидатов в секунду для функции, возвращающей число попыток"""
+    start = time.perf_counter()
+    attempts = func(*args)
+    return attempts / (time.perf_counter() - start)
+
+
+def bench_hashing(args):
+    """Сравнение строкового и байтового горячего цикла"""
+    keyspace = Keyspace(CHARSET, args.length)
+    print(f"🔐 Пространство: {len(CHARSET)} символов, длина до {args.length} "
+          f"({keyspace.size} кандидатов)")
+    print(f"{'Алгоритм':<10}{'до, канд/с':>16}{'после, канд/с':>16}{'ускорение':>12}")
+
+    for algorithm in ALGORITHMS:
+        service = BruteforceService(algorithm)
+        # Недостижимая цель: проходим все пространство
+        target_hash = "00" * len(service.hash_bytes(b""))
+        target_digest = bytes.fromhex(target_hash)
+
+        before = measure(legacy_scan, service, target_hash, keyspace)
+        after = measure(
+            lambda: service.search_range(target_digest, keyspace, 0, keyspace.size)[1]
+        )
+        print(f"{algorithm:<10}{before:>16,.0f}{after:>16,.0f}{after / before:>11.2f}x")
+
+
+def bench_incremental(args):
+    """Сравнение режимов direct и incremental по алгоритмам и длинам"""
+    print(f"🧮 Первые {args.limit} кандидатов каждой длины, {len(CHARSET)} символов")
+    print(f"{'Алгоритм':<10}{'Длина':>6}{'direct, канд/с':>18}{'incremental, канд/с':>22}{'выигрыш':>10}")
+
+    for algorithm in ALGORITHMS:
+        for length in range(1, args.length + 1):
+            keyspace = Keyspace(CHARSET, length, min_length=length)
+            end = min(keyspace.size, args.limit)
+            results = {}
+            for mode in ("direct", "incremental"):
+                service = BruteforceService(algorithm, mode)
+                target_digest = bytes(len(service.hash_bytes(b"")))
+                results[mode] = measure(
+                    lambda: service.search_range(target_digest, keyspace, 0, end)[1]
+                )
+            gain = results["incremental"] / results["direct"]
+            print(f"{algorithm:<10}{length:>6}{results['direct']:>18,.0f}"
+                  f"{results['incremental']:>22,.0f}{gain:>9.2f}x")
+
+
+def bench_markov(args):
+    """Номера паролей отложенной части корпуса: обычный порядок против марковского"""
+    with open(args.corpus, encoding="utf-8", errors="replace") as file:
+        words = [line.strip() for line in file if line.strip()]
+    # Четные строки - обучение, нечетные - проверка
+    train, test = words[::2], words[1::2]
+    test = [word for word in test
+            if len(word) <= args.length and all(symbol in CHARSET for symbol in word)]
+    if not test:
+        print("В проверочной части корпуса нет подходящих паролей")
+        return
+
+    plain = Keyspace(CHARSET, args.length)
+    start = time.perf_counter()
+    markov = MarkovKeyspace(MarkovModel.train(train, CHARSET, args.length), args.length)
+    print(f"🧠 Модель: {len(train)} слов, пространство {markov.size} "
+          f"(построение {time.perf_counter() - start:.2f} c), проверка: {len(test)} паролей")
+
+    print(f"{'Порядок':<10}{'медиана номера':>18}{'найдено в первых 1%':>22}{'10%':>8}")
+    for name, keyspace in (("обычный", plain), ("марковский", markov)):
+        ranks = [keyspace.index_of(word) for word in test]
+        shares = [sum(rank < keyspace.size * part for rank in ranks) / len(ranks)
+                  for part in (0.01, 0.1)]
+        print(f"{name:<10}{statistics.median(ranks):>18,.0f}{shares[0]:>21.0%}{shares[1]:>8.0%}")
+
+
+def bench_rainbow(args):
+    """Покрытие и время поиска радужных таблиц при разной длине цепочки и числе цепочек"""
+    charset = "abcdefghijklmnopqrstuvwxyz"
+    keyspace = Keyspace(charset, args.length)
+    rng = random.Random(0)
+    samples = [keyspace.candidate_at(rng.randrange(keyspace.size)) for _ in range(100)]
+    digests = [BruteforceService("md5").hash_bytes(word.encode()) for word in samples]
+    print(f"🌈 md5, {len(charset)} символов, длина до {args.length} ({keyspace.size} кандидатов), "
+          f"{len(samples)} случайных паролей")
+    print(f"{'Цепочка':>8}{'Цепочек':>10}{'Память, КБ':>12}{'Покрытие':>10}"
+          f"{'поиск, мс':>11}{'построение, с':>15}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for chain_length in (25, 100, 400):
+            for factor in (1, 2, 4):
+                chains = max(1, keyspace.size * factor // chain_length)
+                path = os.path.join(directory, f"{chain_length}-{factor}.rt")
+                start = time.perf_counter()
+                table = build_rainbow_table(path, "md5", charset, args.length, chains,
+                                            chain_length=chain_length, workers=os.cpu_count())
+                built = time.perf_counter() - start
+
+                start = time.perf_counter()
+                found = sum(table.lookup(digest) == word for word, digest in zip(samples, digests))
+                latency = (time.perf_counter() - start) / len(samples) * 1e3
+                print(f"{chain_length:>8}{chains:>10}{chains * 16 / 1024:>12.1f}"
+                      f"{found / len(samples):>10.0%}{latency:>11.2f}{built:>15.2f}")
+                table.close()
+
+
+def naive_zip_check(candidates, params) -> list:
+    """Проверка ZIP без раннего отсева: каждый кандидат расшифровывается целиком"""
+    found = []
+    for candidate in candidates:
+        if params[0] == "zipcrypto":
+            _, _, method, crc, data = params
+            plain = archives._zipcrypto_decrypt(data, archives._zipcrypto_keys(candidate))[12:]
+            content = archives._decompress(plain, method)
+            if content is not None and zlib.crc32(content) == crc:
+                found.append(candidate)
+        else:
+            _, strength, salt, _, encrypted, auth = params
+            key_size = archives._AES_STRENGTHS[strength][0]
+            keys = hashlib.pbkdf2_hmac("sha1", candidate, salt, archives._AES_ITERATIONS,
+                                       key_size * 2 + 2)
+            mac = hmac.new(keys[key_size:key_size * 2], encrypted, hashlib.sha1).digest()
+            if mac[:archives._AES_AUTH_SIZE] == auth:
+                found.append(candidate)
+    return found
+
+
+def bench_zip(args):
+    """Скорость проверки паролей ZIP (ZipCrypto, WinZip AES) с ранним отсевом и без него"""
+    charset = "abcdefghijklmnopqrstuvwxyz"
+    keyspace = Keyspace(charset, args.length)
+    password = keyspace.candidate_at(keyspace.size - 1).encode()
+    files = {f"file{number}.txt": os.urandom(512) * 8 for number in range(3)}
+    service = BruteforceService("zip")
+    zip_format = service.format
+    print(f"🗜  Пароль {password.decode()}, {len(files)} файла по 4 КБ")
+    print(f"{'Шифрование':<12}{'Проверка':<16}{'кандидатов/с':>14}{'Найден':>8}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for encryption, limit in (("zipcrypto", args.limit), ("aes", args.limit // 100)):
+            path = os.path.join(directory, f"{encryption}.zip")
+            archives.write_encrypted_zip(path, files, password, encryption)
+            target = archives.zip_target(path)
+            targets = service.prepare_targets([target])
+            params = next(iter(targets.values()))
+
+            # Диапазон в конце пространства, чтобы пароль был среди кандидатов
+            start = max(0, keyspace.size - limit)
+            candidates = [keyspace.candidate_at(index).encode() for index in range(start, keyspace.size)]
+            checks = (
+                ("ранний отсев", lambda: [hit for _, hit in zip_format.verify_batch(candidates, targets)]),
+                ("полная", lambda: naive_zip_check(candidates, params)),
+            )
+            for title, check in checks:
+                started = time.perf_counter()
+                found = password in check()
+                rate = len(candidates) / (time.perf_counter() - started)
+                print(f"{encryption:<12}{title:<16}{rate:>14,.0f}{'да' if found else 'нет':>8}")
+
+
+# Известные векторы MD4 (RFC 1320) и NTLM
+MD4_VECTORS = {
+    b"": "31d6cfe0d16ae931b73c59d7e0c089c0",
+    b"abc": "a448017aaf21d8525fc10ae87aa6729d",
+    b"message digest": "d9130a8164549fe818874806e1c7014b",
+    b"1234567890" * 8: "e33b4ddc9c38f2199c3e7b164fcc0536",
+}
+NTLM_VECTORS = {
+    b"password": "8846f7eaee8fb117ad06bdd830b7586c",
+    b"hashcat": "b4b9b02e6f09a9bd760f388b67351e2b",
+}
+
+
+def bench_kernel(args):
+    """Ядро NumPy (режим kernel) против цикла hashlib (direct) на кандидатах одной длины"""
+    if not kernels.KERNELS_AVAILABLE:
+        print("⚠️ NumPy не установлен, режим kernel недоступен")
+        return
+    keyspace = Keyspace(CHARSET, args.length, args.length)
+    start = keyspace.size - min(args.limit, keyspace.size)
+    password = keyspace.candidate_at(keyspace.size - 1)
+    print(f"⚙️  {keyspace.size - start} кандидатов длины {args.length}")
+    print(f"{'Алгоритм':<10}{'direct, H/s':>14}{'kernel, H/s':>14}{'Ускорение':>11}")
+
+    for algorithm in DIGEST_ALGORITHMS:
+        rates = []
+        for mode in ("direct", "kernel"):
+            service = BruteforceService(algorithm, mode)
+            targets = service.prepare_targets([service.hash_string(password)])
+            started = time.perf_counter()
+            hits = []
+            for range_start, range_end in keyspace.split(kernels.KERNEL_BATCH_SIZE, start):
+                hits += service.scan_range(targets, keyspace, range_start, range_end)[0]
+            rates.append((keyspace.size - start) / (time.perf_counter() - started))
+            assert [hit for _, hit in hits] == [password], f"{algorithm} {mode}: пароль не найден"
+        print(f"{algorithm:<10}{rates[0]:>14,.0f}{rates[1]:>14,.0f}{rates[1] / rates[0]:>10.1f}x")
+
+
+def bench_batch(args):
+    """Генерация кандидатов: bytes на кандидата (iter_runs) против пачки из индексов"""
+    if not kernels.KERNELS_AVAILABLE:
+        print("⚠️ NumPy не установлен, пачки из индексов недоступны")
+        return
+    print(f"{'Набор символов':<22}{'iter_runs, 1/с':>16}{'пачка, 1/с':>16}")
+    for title, charset in (("ASCII", CHARSET), ("ASCII + кириллица", CHARSET + "абвгдежзий")):
+        keyspace = Keyspace(charset, args.length, args.length)
+        ranges = list(keyspace.split(16384))[:max(1, args.limit // 16384)]
+        count = sum(end - start for start, end in ranges)
+
+        started = time.perf_counter()
+        for start, end in ranges:
+            [b''.join(prefix) + symbol
+             for prefix, _, tail in keyspace.iter_runs(start, end, as_bytes=True) for symbol in tail]
+        objects_rate = count / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for start, end in ranges:
+            keyspace_batch(keyspace, start, end)
+        batch_rate = count / (time.perf_counter() - started)
+        print(f"{title:<22}{objects_rate:>16,.0f}{batch_rate:>16,.0f}")
+
+
+def bench_ntlm(args):
+    """Проверка MD4/NTLM на известных векторах и скорость ядра NumPy против чистого Python"""
+    for message, digest in MD4_VECTORS.items():
+        assert kernels.md4(message).hex() == digest, f"MD4 {message!r}"
+    for password, digest in NTLM_VECTORS.items():
+        assert kernels.ntlm(password).hex() == digest, f"NTLM {password!r}"
+    print(f"✅ MD4/NTLM: {len(MD4_VECTORS) + len(NTLM_VECTORS)} известных векторов")
+
+    keyspace = Keyspace(CHARSET, args.length)
+    start = keyspace.size - min(args.limit, keyspace.size)
+    candidates = [keyspace.candidate_at(index).encode() for index in range(start, keyspace.size)]
+    password = candidates[-1]
+    targets = {kernels.ntlm(password): "target"}
+
+    started = time.perf_counter()
+    sample = candidates[-min(len(candidates), 20_000):]
+    found = [candidate for candidate in sample if kernels.ntlm(candidate) in targets]
+    rate = len(sample) / (time.perf_counter() - started)
+    print(f"{'Python, по одному':<24}{rate:>14,.0f} H/s  найден: {found == [password]}")
+
+    if not kernels.KERNELS_AVAILABLE:
+        print("⚠️ NumPy не установлен, пакетное ядро пропущено")
+        return
+    for batch_size in (256, 2048, 16384):
+        started = time.perf_counter()
+        hits = []
+        # Пачки строятся прямо из индексов, как в переборе
+        for range_start, range_end in keyspace.split(batch_size, start):
+            hits += kernels.ntlm_batch(keyspace_batch(keyspace, range_start, range_end), targets)
+        rate = len(candidates) / (time.perf_counter() - started)
+        print(f"{f'NumPy, пачка {batch_size}':<24}{rate:>14,.0f} H/s  "
+              f"найден: {[hit for _, hit in hits] == [password]}")
+
+
+BENCHMARKS = {
+    "hashing": bench_hashing,
+    "incremental": bench_incremental,
+    "markov": bench_markov,
+    "rainbow": bench_rainbow,
+    "zip": bench_zip,
+    "ntlm": bench_ntlm,
+    "kernel": bench_kernel,
+    "batch": bench_batch,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки брутфорса")
+    parser.add_argument("name", choices=sorted(BENCHMARKS), help="Название бенчмарка")
+    parser.add_argument("--length", type=int, default=3, help="Максимальная длина кандидата")
+    parser.add_argument("--limit", type=int, default=200_000,
+                        help="Сколько кандидатов проверять на каждую длину")
+    parser.add_argument("--corpus", default="wordlists/common.txt",
+                        help="Корпус паролей для обучения марковской модели")
+    args = parser.parse_args()
+
+    BENCHMARKS[args.name](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Офлайн-построение таблиц поиска для небольших пространств перебора
+
+Таблица хранит отсортированные записи (префикс хеша, номер кандидата), поэтому
+задачи с покрытым пространством и запросы /api/lookup отвечают двоичным
+поиском без перебора. Для пространств, где полная таблица слишком велика,
+строится радужная таблица (--rainbow): память - 16 байт на цепочку,
+поиск - /api/rainbow.
+
+Запуск:
+    python build_tables.py md5 --charset abcdefghijklmnopqrstuvwxyz0123456789 --length 5
+    python build_tables.py sha1 --length 4 --workers 4
+    python build_tables.py md5 --charset abcdefghijklmnopqrstuvwxyz --length 7 --rainbow \
+        --chain-length 2000 --table-index 0
+"""
+
+import argparse
+import hashlib
+import os
+import time
+
+from app.core.config import settings
+from app.services.keyspace import Keyspace
+from app.services.lookup import (
+    DEFAULT_PREFIX_BYTES, TABLE_SUFFIX, build_table, index_bytes
+)
+from app.services.rainbow import (
+    DEFAULT_CHAIN_LENGTH, RAINBOW_HASH_TYPES, RAINBOW_SUFFIX, build_rainbow_table
+)
+
+
+def table_name(hash_type: str, charset: str, max_length: int, suffix: str = TABLE_SUFFIX) -> str:
+    """Имя файла таблицы: тип хеша, длина и отпечаток charset"""
+    fingerprint = hashlib.sha1(charset.encode()).hexdigest()[:8]
+    return f"{hash_type.lower()}-{len(charset)}c-{max_length}-{fingerprint}{suffix}"
+
+
+def progress(done: int, total: int):
+    print(f"\r⏳ Серии: {done}/{total}", end="", flush=True)
+
+
+def build_lookup(args, keyspace: Keyspace, partial: str):
+    """Полная таблица поиска"""
+    record_size = args.prefix_bytes + index_bytes(keyspace.size)
+    print(f"📦 Пространство: {len(args.charset)} символов, длина до {args.length} "
+          f"({keyspace.size} кандидатов, ~{keyspace.size * record_size / 2**20:.1f} МБ)")
+    return build_table(partial, args.hash_type, args.charset, args.length,
+                       prefix_bytes=args.prefix_bytes, workers=args.workers,
+                       progress_callback=progress)
+
+
+def build_rainbow(args, keyspace: Keyspace, partial: str):
+    """Радужная таблица: по умолчанию цепочки вместе проходят пространство дважды"""
+    if args.hash_type not in RAINBOW_HASH_TYPES:
+        raise SystemExit(f"Радужные таблицы поддерживают только {', '.join(RAINBOW_HASH_TYPES)}")
+    chains = args.chains or max(1, keyspace.size * 2 // args.chain_length)
+    print(f"🌈 Пространство: {keyspace.size} кандидатов, {chains} цепочек длины "
+          f"{args.chain_length} (~{chains * 16 / 2**20:.1f} МБ), таблица №{args.table_index}")
+    return build_rainbow_table(partial, args.hash_type, args.charset, args.length, chains,
+                               chain_length=args.chain_length, table_index=args.table_index,
+                               workers=args.workers, progress_callback=progress)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Построение таблиц поиска")
+    parser.add_argument("hash_type", choices=["md5", "sha1", "sha256", "sha512"],
+                        help="Тип хеша")
+    parser.add_argument("--charset", default=settings.default_charset, help="Набор символов")
+    parser.add_argument("--length", type=int, required=True, help="Максимальная длина пароля")
+    parser.add_argument("--prefix-bytes", type=int, default=DEFAULT_PREFIX_BYTES,
+                        help="Сколько байт хеша хранить в записи")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Количество процессов (0 - по числу ядер)")
+    parser.add_argument("--output", default=settings.tables_dir, help="Каталог таблиц")
+    parser.add_argument("--rainbow", action="store_true", help="Построить радужную таблицу")
+    parser.add_argument("--chain-length", type=int, default=DEFAULT_CHAIN_LENGTH,
+                        help="Длина цепочки: длиннее - меньше памяти, но медленнее поиск")
+    parser.add_argument("--chains", type=int, default=0,
+                        help="Количество цепочек (0 - размер пространства * 2 / длина цепочки)")
+    parser.add_argument("--table-index", type=int, default=0,
+                        help="Номер таблицы: таблицы с разными номерами дополняют друг друга")
+    args = parser.parse_args()
+
+    keyspace = Keyspace(args.charset, args.length)
+    os.makedirs(args.output, exist_ok=True)
+    if args.rainbow:
+        name = table_name(args.hash_type, args.charset, args.length,
+                          f"-{args.chain_length}-{args.table_index}{RAINBOW_SUFFIX}")
+    else:
+        name = table_name(args.hash_type, args.charset, args.length)
+    path = os.path.join(args.output, name)
+    # Таблица пишется под временным именем: сервер не увидит недописанный файл
+    partial = path + ".partial"
+
+    start = time.perf_counter()
+    table = (build_rainbow if args.rainbow else build_lookup)(args, keyspace, partial)
+    table.close()
+    os.replace(partial, path)
+    print(f"\n✅ {path}: {os.path.getsize(path)} байт за {time.perf_counter() - start:.1f} c")
+
+
+if __name__ == "__main__":
+    main()
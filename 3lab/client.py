@@ -121,9 +121,12 @@ class BruteforceClient:
                             print(f"  Прогресс: {data.get('progress', 0)}%")
                             print(f"  Текущая комбинация: {data.get('current_combination', 'N/A')}")
                             print(f"  Комбинаций в секунду: {data.get('combinations_per_second', 0)}")
+                            if data.get('eta_seconds') is not None:
+                                print(f"  Осталось примерно: {data['eta_seconds']} с")
                             
                         elif data['status'] == 'COMPLETED':
                             print(f"  Результат: {data.get('result', 'Не найден')}")
+                            print(f"  Исход: {data.get('outcome', 'N/A')}")
                             print(f"  Время выполнения: {data.get('elapsed_time', 'N/A')}")
                             break
                             
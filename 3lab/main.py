@@ -22,6 +22,13 @@ app.add_middleware(
 app.include_router(api_router, prefix="/api")
 app.include_router(websocket_router)
 
+
+@app.on_event("startup")
+async def resume_tasks():
+    """Продолжаем задачи, прерванные перезапуском сервера"""
+    from app.services.task_manager import task_manager
+    await task_manager.resume_unfinished_tasks()
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
@@ -72,7 +72,7 @@ def test_algorithms():
     """Тест всех алгоритмов хеширования"""
     print("🔐 Тестирование алгоритмов...")
     
-    algorithms = ["md5", "sha1", "sha256", "sha512"]
+    algorithms = ["md5", "sha1", "sha256", "sha512", "ntlm"]
     success = 0
     
     for algo in algorithms:
@@ -89,6 +89,43 @@ def test_algorithms():
     
     return success == len(algorithms)
 
+def test_ntlm_vectors():
+    """Тест MD4/NTLM на известных векторах (RFC 1320), без сервера"""
+    print("🔑 Тестирование MD4/NTLM...")
+    
+    from app.services import kernels
+    from app.services.batches import CandidateBatch
+    
+    md4_vectors = {
+        b"": "31d6cfe0d16ae931b73c59d7e0c089c0",
+        b"a": "bde52cb31de33e46245e05fbdbd6fb24",
+        b"abc": "a448017aaf21d8525fc10ae87aa6729d",
+        b"message digest": "d9130a8164549fe818874806e1c7014b",
+        b"abcdefghijklmnopqrstuvwxyz": "d79e1c308aa5bbcdeea8ed63df412da9",
+        b"1234567890" * 8: "e33b4ddc9c38f2199c3e7b164fcc0536",
+    }
+    ntlm_vectors = {
+        b"password": "8846f7eaee8fb117ad06bdd830b7586c",
+        b"hashcat": "b4b9b02e6f09a9bd760f388b67351e2b",
+    }
+    
+    success = all(kernels.md4(message).hex() == digest for message, digest in md4_vectors.items())
+    success &= all(kernels.ntlm(password).hex() == digest for password, digest in ntlm_vectors.items())
+    print(f"   {'✅' if success else '❌'} Python MD4: {len(md4_vectors) + len(ntlm_vectors)} векторов")
+    
+    if kernels.KERNELS_AVAILABLE:
+        targets = {bytes.fromhex(digest): digest for digest in ntlm_vectors.values()}
+        candidates = list(ntlm_vectors) + [b"passwore", b"hashcau"]
+        batch = CandidateBatch.from_candidates(candidates)
+        found = {key: candidate for key, candidate in kernels.ntlm_batch(batch, targets)}
+        batch_ok = found == {digest: password for password, digest in ntlm_vectors.items()}
+        print(f"   {'✅' if batch_ok else '❌'} NumPy NTLM: пакетная проверка")
+        success &= batch_ok
+    else:
+        print("   ⚠️ NumPy не установлен, пакетное ядро не проверено")
+    
+    return success
+
 def test_parallel_tasks():
     """Тест параллельных задач"""
     print("⚡ Тестирование параллельных задач...")
@@ -194,6 +231,7 @@ def main():
         ("REST API", test_api),
         ("WebSocket", test_websocket),
         ("Алгоритмы", test_algorithms),
+        ("MD4/NTLM", test_ntlm_vectors),
         ("Параллельные задачи", test_parallel_tasks),
         ("Производительность", test_performance),
     ]
@@ -0,0 +1,40 @@
+"""Строки цели ZIP: данные больших файлов обрезаются, пароль по-прежнему находится"""
+import os
+
+import pytest
+
+from app.services.archives import ZIP_DATA_LIMIT, ZipFormat, write_encrypted_zip, zip_target
+
+
+PASSWORD = b"cab"
+# Все кандидаты длины 3 из строчных букв
+CANDIDATES = [bytes([a, b, c]) for a in range(97, 123) for b in range(97, 123) for c in range(97, 123)]
+
+
+def _hits(target):
+    zip_format = ZipFormat()
+    return [candidate for _, candidate in zip_format.verify_batch(CANDIDATES, zip_format.prepare([target]))]
+
+
+def test_small_file_inlined(tmp_path):
+    path = str(tmp_path / "small.zip")
+    write_encrypted_zip(path, {"a.txt": b"hello world" * 10}, PASSWORD)
+    target = zip_target(path)
+    assert target.startswith("$zip$0*")
+    assert _hits(target) == [PASSWORD]
+
+
+def test_large_file_truncated(tmp_path):
+    path = str(tmp_path / "large.zip")
+    write_encrypted_zip(path, {"a.bin": os.urandom(20000)}, PASSWORD)
+    target = zip_target(path)
+    assert target.startswith("$zip$2*")
+    assert len(target) < 2 * ZIP_DATA_LIMIT + 100
+    assert _hits(target) == [PASSWORD]
+
+
+def test_large_aes_rejected(tmp_path):
+    path = str(tmp_path / "aes.zip")
+    write_encrypted_zip(path, {"a.bin": os.urandom(20000)}, PASSWORD, encryption="aes")
+    with pytest.raises(ValueError):
+        zip_target(path)
@@ -0,0 +1,43 @@
+"""Бюджет по кандидатам у словаря: индекс - байты, бюджет - число слов"""
+import hashlib
+
+import pytest
+
+from app.services.engine import ParallelBruteforceEngine
+from app.services.keyspace import Keyspace
+from app.services.progress import Budget, OUTCOME_BUDGET_EXCEEDED, OUTCOME_EXHAUSTED, OUTCOME_FOUND
+from app.services.wordlist import WordlistKeyspace
+
+
+WORDS = [f"word{number:03d}" for number in range(40)]
+
+
+def _md5(word: str) -> str:
+    return hashlib.md5(word.encode()).hexdigest()
+
+
+@pytest.fixture
+def wordlist(tmp_path):
+    path = tmp_path / "words.txt"
+    path.write_text("\n".join(WORDS) + "\n")
+    return WordlistKeyspace(str(path))
+
+
+@pytest.mark.parametrize("max_candidates", [len(WORDS), 3 * len(WORDS)])
+def test_wordlist_budget_covers_all_words(wordlist, max_candidates):
+    engine = ParallelBruteforceEngine("md5", workers=2, chunk_size=64)
+    budget = Budget(max_candidates=max_candidates)
+
+    assert engine.run(_md5(WORDS[-1]), wordlist, budget=budget) == WORDS[-1]
+    assert engine.outcome == OUTCOME_FOUND
+
+    found = engine.run_many([_md5(WORDS[-1]), _md5("missing")], wordlist, budget=budget)
+    assert found == {_md5(WORDS[-1]): WORDS[-1]}
+    assert engine.outcome == OUTCOME_EXHAUSTED
+
+
+def test_keyspace_budget_exceeded():
+    keyspace = Keyspace("abc", 4)
+    engine = ParallelBruteforceEngine("md5", workers=2, chunk_size=10)
+    assert engine.run(_md5("cccc"), keyspace, budget=Budget(max_candidates=50)) is None
+    assert engine.outcome == OUTCOME_BUDGET_EXCEEDED
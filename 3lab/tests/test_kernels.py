@@ -0,0 +1,83 @@
+"""Пакетные ядра MD4/MD5/SHA1 и NTLM на известных векторах (без сервера)"""
+import hashlib
+import os
+
+import pytest
+
+from app.services import kernels
+from app.services.batches import CandidateBatch
+
+np = pytest.importorskip("numpy")
+
+
+# RFC 1320, приложение A.5
+MD4_VECTORS = {
+    b"": "31d6cfe0d16ae931b73c59d7e0c089c0",
+    b"a": "bde52cb31de33e46245e05fbdbd6fb24",
+    b"abc": "a448017aaf21d8525fc10ae87aa6729d",
+    b"message digest": "d9130a8164549fe818874806e1c7014b",
+    b"abcdefghijklmnopqrstuvwxyz": "d79e1c308aa5bbcdeea8ed63df412da9",
+    b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789":
+        "043f8582f241db351ce627e153e7f0e4",
+    b"1234567890" * 8: "e33b4ddc9c38f2199c3e7b164fcc0536",
+}
+
+NTLM_VECTORS = {
+    b"password": "8846f7eaee8fb117ad06bdd830b7586c",
+    b"hashcat": "b4b9b02e6f09a9bd760f388b67351e2b",
+}
+
+# Длины на границах блока: 55 - последняя с дополнением в том же блоке, 56 - первая
+# со вторым блоком; 63/64 и 119/120 - те же границы для одного и двух блоков данных
+BOUNDARY_LENGTHS = (0, 1, 55, 56, 63, 64, 119, 120)
+
+
+def _matrix(messages):
+    """Матрица uint8 (строки, длина) из сообщений одной длины"""
+    length = len(messages[0])
+    return np.frombuffer(b"".join(messages), dtype=np.uint8).reshape(len(messages), length)
+
+
+def _random_messages(length, count=5):
+    return [os.urandom(length) for _ in range(count)]
+
+
+@pytest.mark.parametrize("message, digest", MD4_VECTORS.items())
+def test_md4_rfc1320(message, digest):
+    assert kernels.md4(message).hex() == digest
+    assert kernels.md4_batch(_matrix([message]))[0].tobytes().hex() == digest
+
+
+@pytest.mark.parametrize("length", BOUNDARY_LENGTHS)
+def test_md4_batch_block_boundaries(length):
+    messages = _random_messages(length)
+    digests = kernels.md4_batch(_matrix(messages))
+    assert [row.tobytes() for row in digests] == [kernels.md4(message) for message in messages]
+
+
+@pytest.mark.parametrize("length", BOUNDARY_LENGTHS)
+@pytest.mark.parametrize("kernel, name", [(kernels.md5_batch, "md5"), (kernels.sha1_batch, "sha1")])
+def test_digest_batch_matches_hashlib(kernel, name, length):
+    messages = _random_messages(length)
+    digests = kernel(_matrix(messages))
+    assert [row.tobytes() for row in digests] == [hashlib.new(name, message).digest()
+                                                  for message in messages]
+
+
+@pytest.mark.parametrize("password, digest", NTLM_VECTORS.items())
+def test_ntlm_vectors(password, digest):
+    assert kernels.ntlm(password).hex() == digest
+    assert kernels.utf16(password) == password.decode().encode("utf-16-le")
+
+
+def test_ntlm_batch_utf16le():
+    # ASCII переводится в UTF-16LE векторно, остальные кандидаты - по одному
+    candidates = [b"password", b"hashcat", "пароль".encode(), "Straße".encode(), b"a" * 27,
+                  b"a" * 28, b"", b"passwore"]
+    expected = {kernels.md4(candidate.decode().encode("utf-16-le")): candidate
+                for candidate in candidates[:-1]}
+    assert kernels.md4(b"password".decode().encode("utf-16-le")).hex() == NTLM_VECTORS[b"password"]
+
+    targets = {digest: digest.hex() for digest in expected}
+    found = dict(kernels.ntlm_batch(CandidateBatch.from_candidates(candidates), targets))
+    assert found == {digest.hex(): candidate for digest, candidate in expected.items()}
@@ -0,0 +1,90 @@
+"""Продолжение прохода с контрольной точки: кандидаты не пропускаются и не повторяются"""
+import hashlib
+
+import pytest
+
+from app.services.bruteforce import BruteforceService
+from app.services.engine import ParallelBruteforceEngine
+from app.services.keyspace import Keyspace
+from app.services.progress import Budget, OUTCOME_BUDGET_EXCEEDED, OUTCOME_EXHAUSTED
+
+
+CHARSET = "abc"
+MAX_LENGTH = 4
+
+
+def _targets(keyspace):
+    """Хеш каждого кандидата -> его индекс в пространстве"""
+    return {
+        hashlib.md5(keyspace.candidate_at(index).encode()).hexdigest(): index
+        for index in range(keyspace.size)
+    }
+
+
+def _interrupted_then_resumed(run, targets):
+    """
+    Первый проход обрывается бюджетом, второй продолжает с последней контрольной точки
+
+    Returns:
+        (индексы найденных в первом проходе, контрольная точка, индексы второго прохода)
+    """
+    checkpoints = []
+    first = []
+    run(budget=Budget(max_candidates=55),
+        found_callback=lambda target_hash, password: first.append(targets[target_hash]),
+        checkpoint_callback=lambda index, attempts, elapsed: checkpoints.append(index),
+        start_index=0)
+    assert checkpoints
+    checkpoint = checkpoints[-1]
+
+    second = []
+    run(budget=None,
+        found_callback=lambda target_hash, password: second.append(targets[target_hash]),
+        checkpoint_callback=None,
+        start_index=checkpoint)
+    return first, checkpoint, second
+
+
+def _check(first, checkpoint, second, size):
+    # До контрольной точки все проверено в первом проходе...
+    assert set(range(checkpoint)) <= set(first)
+    # ...а второй проход начинает ровно с нее, без повторов
+    assert sorted(second) == list(range(checkpoint, size))
+    assert set(first) | set(second) == set(range(size))
+
+
+def test_single_process_resume():
+    keyspace = Keyspace(CHARSET, MAX_LENGTH)
+    targets = _targets(keyspace)
+    service = BruteforceService("md5")
+
+    def run(budget, found_callback, checkpoint_callback, start_index):
+        service.bruteforce_many(list(targets), CHARSET, MAX_LENGTH,
+                                found_callback=found_callback, workers=1,
+                                start_index=start_index,
+                                checkpoint_callback=checkpoint_callback,
+                                checkpoint_interval=0, progress_interval=0, budget=budget)
+
+    first, checkpoint, second = _interrupted_then_resumed(run, targets)
+    assert 0 < checkpoint <= 55
+    _check(first, checkpoint, second, keyspace.size)
+    assert service.outcome == OUTCOME_EXHAUSTED
+
+
+@pytest.mark.parametrize("start_method", ["spawn", "fork"])
+def test_engine_resume(start_method):
+    keyspace = Keyspace(CHARSET, MAX_LENGTH)
+    targets = _targets(keyspace)
+    engine = ParallelBruteforceEngine("md5", workers=2, chunk_size=10, start_method=start_method)
+    outcomes = []
+
+    def run(budget, found_callback, checkpoint_callback, start_index):
+        engine.run_many(list(targets), keyspace, found_callback=found_callback,
+                        start_index=start_index, checkpoint_callback=checkpoint_callback,
+                        checkpoint_interval=0, progress_interval=0, budget=budget)
+        outcomes.append(engine.outcome)
+
+    first, checkpoint, second = _interrupted_then_resumed(run, targets)
+    assert 0 < checkpoint <= 55
+    _check(first, checkpoint, second, keyspace.size)
+    assert outcomes == [OUTCOME_BUDGET_EXCEEDED, OUTCOME_EXHAUSTED]
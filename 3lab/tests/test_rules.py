@@ -0,0 +1,16 @@
+"""Дедупликация правил: только по тексту после нормализации записи"""
+from app.services.rules import dedupe_rules, parse_rules
+
+
+def test_textual_duplicates_removed():
+    assert dedupe_rules(["lc", "l c", "lc :", "uT0", ": uT0", "u T0"]) == ["lc", "uT0"]
+
+
+def test_equivalent_on_some_words_kept():
+    # 's-_' не меняет слова без '-', но это другое правило
+    assert dedupe_rules([":", "s-_", "", "l", "c"]) == [":", "s-_", "l", "c"]
+
+
+def test_parse_rules_skips_comments_and_duplicates():
+    lines = ["# комментарий\n", "lc\n", "\n", "lc\r\n", "$1\n"]
+    assert parse_rules(lines) == ["lc", "$1"]